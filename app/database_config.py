@@ -1,19 +1,103 @@
 import os
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 # database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./momo.db")
+# optional separate database for reads (e.g. a replica); defaults to the same one
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL", DATABASE_URL)
 
-# SQLite needs this argument for FastAPI’s multi-threaded dev server
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# Production SQLite profile, applied to every new connection:
+# - WAL: readers never block on the writer and the writer never blocks readers
+# - synchronous=NORMAL: durable across app crashes in WAL mode, far fewer fsyncs
+# - 64 MB page cache and 256 MB memory-mapped I/O per connection
+# - busy_timeout: writers queue for the write lock instead of failing at once
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": "-64000",
+    "mmap_size": str(256 * 1024 * 1024),
+    "temp_store": "MEMORY",
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+}
 
-# Create engine = “connection manager” to your DB
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+
+def apply_sqlite_pragmas(engine: Engine, read_only: bool = False) -> None:
+    """Run `SQLITE_PRAGMAS` on every new connection of a SQLite engine.
+
+    `read_only` additionally sets `query_only`, so a read engine can never
+    take the write lock by accident.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+
+def create_engines(url: str, read_url: str | None = None) -> tuple[Engine, Engine]:
+    """Create the (write, read) engine pair for a database.
+
+    For SQLite the write engine holds a single connection: SQLite has one
+    writer at a time anyway, and queueing in the pool is cheaper than spinning
+    on the database lock. The read engine has a pool sized for concurrent
+    requests and its connections are query-only.
+    """
+    read_url = read_url or url
+    if not url.startswith("sqlite"):
+        write = create_engine(url, pool_pre_ping=True)
+        return write, create_engine(read_url, pool_pre_ping=True) if read_url != url else write
+
+    # SQLite needs this argument for FastAPI’s multi-threaded dev server
+    connect_args = {"check_same_thread": False}
+    write = create_engine(url, connect_args=connect_args, pool_size=1, max_overflow=0)
+    read = create_engine(
+        read_url,
+        connect_args=connect_args,
+        pool_size=int(os.getenv("DB_READ_POOL_SIZE", "8")),
+        max_overflow=int(os.getenv("DB_READ_MAX_OVERFLOW", "8")),
+    )
+    apply_sqlite_pragmas(write)
+    apply_sqlite_pragmas(read, read_only=True)
+    return write, read
+
+
+# Create engines = “connection managers” to your DB: writes (ingest, residents)
+# go through `engine`, the read-only endpoints through `read_engine`
+engine, read_engine = create_engines(DATABASE_URL, DATABASE_READ_URL)
 
 # SessionLocal gives each request its own DB session
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver (aiosqlite / asyncpg)."""
+    for prefix, async_prefix in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(prefix):
+            return async_prefix + url[len(prefix) :]
+    return url
+
+
+# Async engine for the async (read-only) routes: read database, async driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_READ_URL))
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+apply_sqlite_pragmas(async_engine.sync_engine, read_only=True)
+
+# AsyncSessionLocal gives each async request its own AsyncSession
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Base class: all your model classes will inherit from this
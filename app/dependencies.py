@@ -1,4 +1,4 @@
-from app.database_config import SessionLocal
+from app.database_config import AsyncSessionLocal, ReadSessionLocal, SessionLocal
 
 
 def get_db():
@@ -11,3 +11,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """
+    Like `get_db`, but the session comes from the read-only engine.
+    Used by the GET endpoints so they never queue behind an ingest.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of `get_db` for the async routes.
+    Yields an AsyncSession and closes it after the request.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
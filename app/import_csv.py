@@ -1,75 +1,149 @@
+"""Import Bedsense CSV exports into the `inbed_daily` table.
+
+Each export file is streamed in fixed-size chunks and upserted independently,
+one transaction per chunk. Because rows are keyed on (resident_id, date) and
+every file only writes its own columns, the three exports do not need to be
+merged in memory, files can be re-imported safely, and memory use stays
+bounded no matter how large the input is.
+
+A file may cover several residents: if it has a `resident_id` column that
+column is used, otherwise every row belongs to `--resident-id`.
+
+Usage:
+    python -m app.import_csv \\
+        --time-in-bed app/data/timeinbed.csv \\
+        --activity app/data/activityinbed.csv \\
+        --times-out app/data/timesoutofbed.csv \\
+        [--resident-id 1] [--chunk-size 50000]
+"""
+
+import argparse
+import math
+import time
+from typing import Any, Dict, Iterator, List
+
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.database_config import SessionLocal
-from app.orm_models.inbed_daily import InBedDaily
+from app.services.ingest_service import store_daily_rows
 
-# Paths to your CSV files (adjust names if needed)
+# Default paths of the Bedsense exports
 FILE_TIME_IN_BED = "app/data/timeinbed.csv"
 FILE_ACTIVITY_IN_BED = "app/data/activityinbed.csv"
 FILE_TIMES_OUT_BED = "app/data/timesoutofbed.csv"
 
-# Insert into the database
-db: Session = SessionLocal()
-
-# Insert resident
-# resident_name = "John Doe"
-# room_number = "100"
-
-# new_resident = Resident(name=resident_name, room_number=room_number)
-# db.add(new_resident)
-# db.commit()
-# db.refresh(new_resident)
-# resident_id = new_resident.id
-# print(f"Created new resident '{resident_name}' with ID {resident_id} ")
-
-# Load all CSVs with correct date parsing
-time_in_bed = pd.read_csv(
-    FILE_TIME_IN_BED, parse_dates=[0], dayfirst=True, skipinitialspace=True, decimal="."
-)
-activity = pd.read_csv(
-    FILE_ACTIVITY_IN_BED,
-    parse_dates=[0],
-    dayfirst=True,
-    skipinitialspace=True,
-    decimal=".",
-)
-times_out = pd.read_csv(FILE_TIMES_OUT_BED, parse_dates=[0], dayfirst=True)
-
-# Rename columns after reading
-time_in_bed.columns = ["date", "time_in_bed"]
-activity.columns = ["date", "at_rest", "low_activity", "high_activity"]
-times_out.columns = ["date", "times_out_bed_night", "times_out_bed_day"]
-
-# Merge all CSVs on 'date'
-merged = time_in_bed.merge(activity, on="date").merge(times_out, on="date")
-
-# Convert date column to datetime
-merged["date"] = pd.to_datetime(merged["date"], errors="coerce").dt.date
-
-
-print(merged.dtypes)
-print(merged.head())
-print(merged.iloc[0].to_dict())
-
-print("Merged data preview:")
-print(merged.head())
-
-
-for _, row in merged.iterrows():
-    record = InBedDaily(
-        date=row["date"],
-        time_in_bed=row["time_in_bed"],
-        at_rest=row["at_rest"],
-        low_activity=row["low_activity"],
-        high_activity=row["high_activity"],
-        times_out_bed_night=row["times_out_bed_night"],
-        times_out_bed_day=row["times_out_bed_day"],
-        resident_id=1,  # assume this data belongs to resident with ID=1
+DEFAULT_CHUNK_SIZE = 50_000
+RESIDENT_COLUMN = "resident_id"
+
+# Metric columns of each export, in file order (after the date column)
+FILE_COLUMNS: Dict[str, List[str]] = {
+    "time_in_bed": ["time_in_bed"],
+    "activity": ["at_rest", "low_activity", "high_activity"],
+    "times_out": ["times_out_bed_night", "times_out_bed_day"],
+}
+INTEGER_COLUMNS = {"times_out_bed_night", "times_out_bed_day"}
+
+
+def _clean(value: Any, integer: bool) -> Any:
+    """Map NaN to None (NULL) and cast count columns to int."""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return int(value) if integer else float(value)
+
+
+def chunk_to_rows(chunk: pd.DataFrame, kind: str, resident_id: int) -> List[Dict[str, Any]]:
+    """Convert one CSV chunk into row dicts for `store_daily_rows`.
+
+    Columns are matched by position (date first, then the metrics of `kind`);
+    an optional `resident_id` column may appear anywhere. Rows without a valid
+    date are skipped.
+    """
+    columns = FILE_COLUMNS[kind]
+    chunk.columns = [str(c).strip() for c in chunk.columns]
+
+    if RESIDENT_COLUMN in chunk.columns:
+        residents = pd.to_numeric(chunk.pop(RESIDENT_COLUMN), errors="coerce")
+    else:
+        residents = pd.Series(resident_id, index=chunk.index)
+
+    if chunk.shape[1] < len(columns) + 1:
+        raise ValueError(f"{kind} export needs a date column and {len(columns)} metric column(s)")
+    chunk = chunk.iloc[:, : len(columns) + 1]
+    chunk.columns = ["date"] + columns
+
+    dates = pd.to_datetime(chunk["date"], dayfirst=True, errors="coerce")
+    valid = dates.notna() & residents.notna()
+
+    # column-wise conversion; far cheaper than building a dict per iterrows() row
+    out: Dict[str, list] = {
+        RESIDENT_COLUMN: residents[valid].astype(int).tolist(),
+        "date": dates[valid].dt.date.tolist(),
+    }
+    for col in columns:
+        values = pd.to_numeric(chunk.loc[valid, col], errors="coerce").tolist()
+        out[col] = [_clean(v, col in INTEGER_COLUMNS) for v in values]
+
+    keys = list(out)
+    return [dict(zip(keys, values, strict=True)) for values in zip(*out.values(), strict=True)]
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Stream a CSV file in chunks of `chunk_size` rows."""
+    yield from pd.read_csv(
+        path, chunksize=chunk_size, skipinitialspace=True, decimal=".", dtype=str
     )
-    db.add(record)
 
-db.commit()
-db.close()
 
-print("Data imported successfully into 'inbed_daily' table.")
+def import_file(
+    db: Session, path: str, kind: str, resident_id: int, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> int:
+    """Import one export file, committing once per chunk. Returns rows stored."""
+    total = 0
+    started = time.perf_counter()
+    for chunk in read_chunks(path, chunk_size):
+        rows = chunk_to_rows(chunk, kind, resident_id)
+        store_daily_rows(db, rows)
+        total += len(rows)
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"{path}: {total} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    return total
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Import Bedsense CSV exports into inbed_daily.")
+    parser.add_argument("--time-in-bed", default=FILE_TIME_IN_BED, help="time in bed export")
+    parser.add_argument("--activity", default=FILE_ACTIVITY_IN_BED, help="activity in bed export")
+    parser.add_argument("--times-out", default=FILE_TIMES_OUT_BED, help="times out of bed export")
+    parser.add_argument(
+        "--resident-id",
+        type=int,
+        default=1,
+        help="resident for files without a resident_id column",
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    total = 0
+    db = SessionLocal()
+    try:
+        for kind, path in (
+            ("time_in_bed", args.time_in_bed),
+            ("activity", args.activity),
+            ("times_out", args.times_out),
+        ):
+            if path:
+                total += import_file(db, path, kind, args.resident_id, args.chunk_size)
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - started
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"Imported {total} rows into 'inbed_daily' in {elapsed:.2f}s ({rate:,.0f} rows/s).")
+
+
+if __name__ == "__main__":
+    main()
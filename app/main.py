@@ -1,19 +1,56 @@
+import asyncio
+import logging
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
-from app.routers import insights_router, resident_router
+from app.migrations import run_migrations
+from app.responses import GZIP_LEVEL, GZIP_MIN_SIZE
+from app.routers import (
+    async_insights_router,
+    async_resident_router,
+    export_router,
+    ingest_router,
+    insights_router,
+    monitoring_router,
+    resident_router,
+)
+from app.services.analysis_pool import analysis_pool
+from app.services.instrumentation import RequestTimingMiddleware
+from app.services.warmup import readiness, recheck, warm_up
+
+from .database_config import Base, async_engine, engine
 
-from .database_config import Base, engine
+# Application logs (e.g. per-request analysis details at DEBUG). Below the
+# configured level the services skip building the messages entirely.
+app_logger = logging.getLogger("app")
+if not app_logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    app_logger.addHandler(_handler)
+app_logger.setLevel(os.getenv("LOG_LEVEL", "WARNING").upper())
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # runs once at startup
     Base.metadata.create_all(bind=engine)
+    # bring databases created by older versions up to the current schema
+    run_migrations(engine)
+    # start the worker processes and pay first-call costs in the background;
+    # GET /ready reports when that is done
+    readiness.reset()
+    warmup = asyncio.create_task(run_in_threadpool(warm_up))
     yield
     # runs once at shutdown (optional cleanup)
+    await warmup
+    analysis_pool.shutdown()
+    await async_engine.dispose()
 
 
 # Initialize app
@@ -34,13 +71,38 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    # let browser dashboards read the revalidation and paging headers
+    expose_headers=["ETag", "X-Next-After-Id"],
 )
 
+# gzip for clients that accept it, above a size threshold (see app.responses)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+
+# Latency histograms for /metrics (outermost, so it times the whole request)
+app.add_middleware(RequestTimingMiddleware)
+
 # Register routers
 app.include_router(insights_router.router)
 app.include_router(resident_router.router)
+app.include_router(async_insights_router.router)
+app.include_router(async_resident_router.router)
+app.include_router(ingest_router.router)
+app.include_router(export_router.router)
+app.include_router(monitoring_router.router)
+app.include_router(monitoring_router.metrics_router)
 
 
 @app.get("/")
 def read_root():
     return {"message": "FastAPI is running successfully!"}
+
+
+@app.get("/ready")
+def read_ready():
+    """Readiness probe: 503 until the startup warm-up has finished.
+
+    A required warm-up step that failed (the database) is retried here.
+    """
+    recheck()
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
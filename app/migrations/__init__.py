@@ -0,0 +1,20 @@
+"""Lightweight, idempotent schema migrations for existing databases.
+
+`Base.metadata.create_all` only creates missing tables; it never changes a
+table that already exists. Each module in this package upgrades an older
+database file in place and is safe to run repeatedly.
+"""
+
+from sqlalchemy.engine import Engine
+
+from app.migrations import inbed_daily_resident_date, resident_data_revision_rows
+
+
+def run_migrations(engine: Engine) -> None:
+    """Apply all migrations in order (no-ops when already applied).
+
+    Never deletes rows: a migration that would have to raises instead, and
+    is run manually after review.
+    """
+    inbed_daily_resident_date.upgrade(engine, remove_duplicates=False)
+    resident_data_revision_rows.upgrade(engine)
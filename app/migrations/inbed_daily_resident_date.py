@@ -0,0 +1,80 @@
+"""Add the unique (resident_id, date) index to an existing `inbed_daily` table.
+
+Older databases (e.g. a `momo.db` created before the index existed) only have
+single-column indexes on `id` and `date`. This migration:
+
+1. Removes duplicate (resident_id, date) rows, keeping the most recently
+   inserted one (highest id), so the unique index can be created.
+2. Creates `ux_inbed_daily_resident_date` if it does not exist yet.
+
+The app's startup runs it with `remove_duplicates=False`: a table without
+duplicates gets the index, one with duplicates stops the startup with
+`DuplicateRowsError` instead of losing rows nobody reviewed. Remove them
+(step 1) by running it manually:  python -m app.migrations.inbed_daily_resident_date
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.orm_models.inbed_daily import InBedDaily
+
+INDEX_NAME = "ux_inbed_daily_resident_date"
+
+
+class DuplicateRowsError(RuntimeError):
+    """`inbed_daily` holds duplicate days and removing them was not allowed."""
+
+
+# Rows with a NULL key are left alone: the unique index does not cover them.
+_COUNT_DUPLICATES = text("""
+    SELECT COALESCE(SUM(n - 1), 0) FROM (
+        SELECT COUNT(*) AS n FROM inbed_daily
+        WHERE resident_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY resident_id, date
+        HAVING COUNT(*) > 1
+    ) AS duplicates
+    """)
+_DELETE_DUPLICATES = text("""
+    DELETE FROM inbed_daily
+    WHERE resident_id IS NOT NULL
+      AND date IS NOT NULL
+      AND id NOT IN (
+        SELECT MAX(id) FROM inbed_daily
+        WHERE resident_id IS NOT NULL AND date IS NOT NULL
+        GROUP BY resident_id, date
+      )
+    """)
+
+
+def upgrade(engine: Engine, remove_duplicates: bool = True) -> int:
+    """Apply the migration. Returns the number of duplicate rows removed.
+
+    With `remove_duplicates=False`, raises `DuplicateRowsError` (changing
+    nothing) when there are duplicates to remove.
+    """
+    inspector = inspect(engine)
+    if not inspector.has_table(InBedDaily.__tablename__):
+        return 0
+    if any(ix["name"] == INDEX_NAME for ix in inspector.get_indexes(InBedDaily.__tablename__)):
+        return 0
+
+    index = next(ix for ix in InBedDaily.__table__.indexes if ix.name == INDEX_NAME)
+    with engine.begin() as conn:
+        if not remove_duplicates:
+            duplicates = conn.execute(_COUNT_DUPLICATES).scalar_one()
+            if duplicates:
+                raise DuplicateRowsError(
+                    f"inbed_daily has {duplicates} duplicate (resident_id, date) rows; review "
+                    "them, then run `python -m app.migrations.inbed_daily_resident_date` to "
+                    "keep the newest row of each day"
+                )
+        removed = conn.execute(_DELETE_DUPLICATES).rowcount or 0
+        index.create(conn, checkfirst=True)
+    return removed
+
+
+if __name__ == "__main__":
+    from app.database_config import engine
+
+    n_removed = upgrade(engine)
+    print(f"inbed_daily: unique (resident_id, date) index in place, {n_removed} duplicates removed")
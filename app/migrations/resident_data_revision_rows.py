@@ -0,0 +1,64 @@
+"""Add the row count to `resident_data_revisions` and fill it from `inbed_daily`.
+
+The data version of a resident reads its row count from the counter the
+ingest path keeps next to the revision, instead of counting the rows. Older
+databases have a revisions table without the `n_rows` column, or (created
+before the table existed) daily rows without any revision. This migration:
+
+1. Adds `n_rows` if it does not exist yet.
+2. When it added the column, or the table is empty while `inbed_daily` has
+   rows, counts every resident's rows once, adding a revision 0 for residents
+   that have none.
+"""
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from app.orm_models.data_revision import ResidentDataRevision
+from app.orm_models.inbed_daily import InBedDaily
+
+_ADD_COLUMN = text(
+    "ALTER TABLE resident_data_revisions ADD COLUMN n_rows INTEGER NOT NULL DEFAULT 0"
+)
+_NEEDS_COUNTS = text("""
+    SELECT NOT EXISTS (SELECT 1 FROM resident_data_revisions)
+       AND EXISTS (SELECT 1 FROM inbed_daily WHERE resident_id IS NOT NULL)
+    """)
+_COUNT_ROWS = text("""
+    UPDATE resident_data_revisions
+    SET n_rows = (
+        SELECT COUNT(*) FROM inbed_daily
+        WHERE inbed_daily.resident_id = resident_data_revisions.resident_id
+    )
+    """)
+_ADD_MISSING = text("""
+    INSERT INTO resident_data_revisions (resident_id, revision, n_rows)
+    SELECT resident_id, 0, COUNT(*) FROM inbed_daily
+    WHERE resident_id IS NOT NULL
+      AND resident_id NOT IN (SELECT resident_id FROM resident_data_revisions)
+    GROUP BY resident_id
+    """)
+
+
+def upgrade(engine: Engine) -> bool:
+    """Apply the migration. Returns whether the row counts were (re)computed."""
+    inspector = inspect(engine)
+    table = ResidentDataRevision.__tablename__
+    if not inspector.has_table(table) or not inspector.has_table(InBedDaily.__tablename__):
+        return False
+    has_column = any(c["name"] == "n_rows" for c in inspector.get_columns(table))
+    with engine.begin() as conn:
+        if has_column and not conn.execute(_NEEDS_COUNTS).scalar_one():
+            return False
+        if not has_column:
+            conn.execute(_ADD_COLUMN)
+        conn.execute(_COUNT_ROWS)
+        conn.execute(_ADD_MISSING)
+    return True
+
+
+if __name__ == "__main__":
+    from app.database_config import engine
+
+    counted = upgrade(engine)
+    print(f"resident_data_revisions: n_rows in place, {'counted' if counted else 'up to date'}")
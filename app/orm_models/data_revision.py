@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer
+
+from ..database_config import Base
+
+
+class ResidentDataRevision(Base):
+    """
+    Per-resident revision counter of the `inbed_daily` data.
+
+    Bumped by the ingest path on every write (including corrections of existing
+    days), so derived results can be invalidated even when neither the row
+    count nor the newest date changes. The ingest path also keeps the row
+    count here, so reading a data version does not count the rows.
+    """
+
+    __tablename__ = "resident_data_revisions"
+
+    resident_id = Column(Integer, ForeignKey("residents.id"), primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+    n_rows = Column(Integer, nullable=False, default=0)  # days stored by the ingest path
+    updated_at = Column(DateTime)  # UTC time of the last write
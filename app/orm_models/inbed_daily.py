@@ -1,5 +1,5 @@
 # app/models/inbed_daily.py
-from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from sqlalchemy import Column, Date, Float, ForeignKey, Index, Integer
 from sqlalchemy.orm import relationship
 
 from ..database_config import Base
@@ -12,6 +12,10 @@ class InBedDaily(Base):
     """
 
     __tablename__ = "inbed_daily"
+    # One row per resident per day. The unique (resident_id, date) index also
+    # serves the insight queries: filter on resident, ORDER BY date DESC LIMIT n
+    # becomes an index range scan instead of a table scan plus sort.
+    __table_args__ = (Index("ux_inbed_daily_resident_date", "resident_id", "date", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, index=True)
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+
+from ..database_config import Base
+
+
+class MetricRollingDaily(Base):
+    """
+    Materialized rolling aggregates of one metric, one row per resident day.
+
+    For every `inbed_daily` row the sums and counts over the last 7 and 28
+    rows ending on that day (the windows of the trend insight). Sums are over
+    non-null values only; `n_rows` counts all rows in the 28-row window
+    (including gaps), so it is below 28 only early in a resident's history.
+    """
+
+    __tablename__ = "metric_rolling_daily"
+
+    resident_id = Column(Integer, ForeignKey("residents.id"), primary_key=True)
+    metric = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+
+    n_rows = Column(Integer, nullable=False)  # rows in the last 28, up to and including this day
+    sum_7 = Column(Float, nullable=False, default=0.0)  # sum of values in the last 7 rows (sec)
+    count_7 = Column(Integer, nullable=False, default=0)  # non-null values in the last 7 rows
+    sum_28 = Column(Float, nullable=False, default=0.0)  # sum of values in the last 28 rows (sec)
+    count_28 = Column(Integer, nullable=False, default=0)  # non-null values in the last 28 rows
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, String
+
+from ..database_config import Base
+
+
+class MetricWindowStats(Base):
+    """
+    Running aggregates of one metric over a resident's most recent rows.
+
+    Maintained on every write to `inbed_daily` so that the newest day can be
+    z-scored without reading the window. Sums are over non-null values only;
+    `n_rows` counts all rows in the window (including gaps).
+    """
+
+    __tablename__ = "metric_window_stats"
+
+    resident_id = Column(Integer, ForeignKey("residents.id"), primary_key=True)
+    metric = Column(String, primary_key=True)
+    window_size = Column(Integer, nullable=False)
+
+    n_rows = Column(Integer, nullable=False, default=0)  # rows in the window
+    n_values = Column(Integer, nullable=False, default=0)  # non-null values
+    total = Column(Float, nullable=False, default=0.0)  # sum of values (sec)
+    total_sq = Column(Float, nullable=False, default=0.0)  # sum of squared values
+
+    first_date = Column(Date)  # oldest day in the window
+    last_date = Column(Date)  # newest day in the window
+    last_value = Column(Float)  # metric value on last_date (sec)
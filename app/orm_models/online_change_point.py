@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer, LargeBinary, String, Text
+
+from ..database_config import Base
+
+
+class OnlineChangePointState(Base):
+    """
+    State of the online change-point detector of one resident and metric.
+
+    Updated by the ingest path as days arrive (see
+    `online_change_point_service`), so the current change points can be read
+    without re-running PELT. `n_rows` counts the days folded in (including
+    days without a value for this metric); `state` holds the warm-up values
+    or, once `offset` and `scale` are set, the `OnlinePelt` state (float64
+    bytes); `change_points` is the JSON list of its current result.
+    """
+
+    __tablename__ = "online_change_points"
+
+    resident_id = Column(Integer, ForeignKey("residents.id"), primary_key=True)
+    metric = Column(String, primary_key=True)
+
+    n_rows = Column(Integer, nullable=False, default=0)  # days folded in
+    n_values = Column(Integer, nullable=False, default=0)  # non-null values folded in
+    first_date = Column(Date)  # oldest day folded in
+    last_date = Column(Date)  # newest day folded in
+    offset = Column(Float)  # baseline level the values are centred on (sec)
+    scale = Column(Float)  # day-to-day noise the values are scaled by (sec)
+    state = Column(LargeBinary, nullable=False)  # warm-up values or detector state
+    change_points = Column(Text, nullable=False)  # JSON: [[index, date, value], ...]
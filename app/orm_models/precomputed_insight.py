@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, String, Text
+
+from ..database_config import Base
+
+
+class PrecomputedInsight(Base):
+    """
+    Insight responses computed ahead of time by the precompute job.
+
+    One row per resident, analysis, metric and window as served by the insight
+    endpoints (`metric` is "all" for the summary). `payload` is the response
+    JSON, or `null` when there was not enough data. The `data_*` columns hold
+    the `DataVersion` the result was computed from: a row is only served
+    while the resident's data still has that version.
+    """
+
+    __tablename__ = "precomputed_insights"
+
+    resident_id = Column(Integer, ForeignKey("residents.id"), primary_key=True)
+    analysis = Column(String, primary_key=True)
+    metric = Column(String, primary_key=True)
+    window_size = Column(Integer, primary_key=True)
+
+    data_rows = Column(Integer, nullable=False)  # DataVersion.n_rows
+    data_last_date = Column(Date)  # DataVersion.last_date
+    data_revision = Column(Integer, nullable=False, default=0)  # DataVersion.revision
+    payload = Column(Text, nullable=False)
+    computed_at = Column(DateTime)  # UTC
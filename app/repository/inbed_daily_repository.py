@@ -0,0 +1,291 @@
+from bisect import bisect_left
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Sequence, Set, Tuple
+
+from sqlalchemy import Integer, Select, column, desc, exists, func, select, values
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.orm_models.data_revision import ResidentDataRevision
+from app.orm_models.inbed_daily import InBedDaily
+from app.repository.insights_repository import METRIC_COLUMNS
+
+# Natural key of a daily row; matches the unique index on the model.
+KEY_COLUMNS = ("resident_id", "date")
+
+# Columns of a daily row as exported, key first
+EXPORT_COLUMNS = (
+    InBedDaily.resident_id,
+    InBedDaily.date,
+    InBedDaily.time_in_bed,
+    InBedDaily.at_rest,
+    InBedDaily.low_activity,
+    InBedDaily.high_activity,
+    InBedDaily.times_out_bed_night,
+    InBedDaily.times_out_bed_day,
+)
+
+# days `get_rows_around` reads beyond one day per context row wanted, so that a
+# few missing days do not send a resident to the per-resident lookup
+CONTEXT_SLACK_DAYS = 7
+
+
+def _insert_for(db: Session):
+    """Return the dialect-specific INSERT construct that supports ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+def upsert_daily_rows(db: Session, rows: Sequence[Mapping[str, Any]]) -> int:
+    """Insert or update InBedDaily rows keyed on (resident_id, date).
+
+    - rows: mappings with `resident_id`, `date` and any subset of the metric
+      columns. All rows must share the same keys (they are sent as one
+      executemany batch).
+    - Only the columns present in the rows are written on conflict, so a file
+      that carries e.g. just `time_in_bed` does not wipe the activity columns.
+
+    Running the same batch twice leaves the table unchanged (idempotent).
+    The caller owns the transaction (commit/rollback). Returns the batch size.
+    """
+    if not rows:
+        return 0
+
+    columns = list(rows[0].keys())
+    missing = [c for c in KEY_COLUMNS if c not in columns]
+    if missing:
+        raise ValueError(f"Rows are missing key columns: {missing}")
+
+    stmt = _insert_for(db)(InBedDaily)
+    update_cols = {c: stmt.excluded[c] for c in columns if c not in KEY_COLUMNS}
+    if update_cols:
+        stmt = stmt.on_conflict_do_update(index_elements=list(KEY_COLUMNS), set_=update_cols)
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=list(KEY_COLUMNS))
+
+    db.execute(stmt, list(rows))
+    return len(rows)
+
+
+def get_existing_keys(db: Session, rows: Sequence[Mapping[str, Any]]) -> Set[Tuple[int, date]]:
+    """Return the (resident_id, date) keys of `rows` that are already stored.
+
+    Reads the residents of the batch within its date range (one range scan on
+    the unique index) and intersects in memory, which is cheap for the usual
+    batch of one or a few days per resident.
+    """
+    if not rows:
+        return set()
+    keys = {(r["resident_id"], r["date"]) for r in rows}
+    resident_ids = {k[0] for k in keys}
+    dates = [k[1] for k in keys]
+    stored = db.execute(
+        select(InBedDaily.resident_id, InBedDaily.date).where(
+            InBedDaily.resident_id.in_(resident_ids),
+            InBedDaily.date.between(min(dates), max(dates)),
+        )
+    )
+    return keys & {(r[0], r[1]) for r in stored}
+
+
+class DataVersion(NamedTuple):
+    """Cheap fingerprint of a resident's daily data.
+
+    The revision changes on every ingest write, including corrections of
+    existing days, and the row count is kept next to it by the ingest path.
+    The newest date also catches days appended by writers that bypass it.
+    """
+
+    n_rows: int
+    last_date: date | None
+    revision: int
+
+
+def _data_version_stmt(resident_id: int) -> Select:
+    def counter(column: Any) -> Any:
+        return select(column).where(ResidentDataRevision.resident_id == resident_id)
+
+    # scalar subqueries: a count over the resident's rows would grow with history
+    last_date = select(func.max(InBedDaily.date)).where(InBedDaily.resident_id == resident_id)
+    return select(
+        counter(ResidentDataRevision.n_rows).scalar_subquery(),
+        last_date.scalar_subquery(),
+        counter(ResidentDataRevision.revision).scalar_subquery(),
+    )
+
+
+def get_data_version(db: Session, resident_id: int) -> DataVersion:
+    """Return the current data version of a resident (three index seeks)."""
+    row = db.execute(_data_version_stmt(resident_id)).one()
+    return DataVersion(n_rows=row[0] or 0, last_date=row[1], revision=row[2] or 0)
+
+
+async def get_data_version_async(db: AsyncSession, resident_id: int) -> DataVersion:
+    """Async mirror of `get_data_version`."""
+    row = (await db.execute(_data_version_stmt(resident_id))).one()
+    return DataVersion(n_rows=row[0] or 0, last_date=row[1], revision=row[2] or 0)
+
+
+def get_data_versions(db: Session) -> Dict[int, DataVersion]:
+    """Data version of every resident with rows, from one grouped scan of the index."""
+    counters = {
+        r[0]: (r[1], r[2])
+        for r in db.execute(
+            select(
+                ResidentDataRevision.resident_id,
+                ResidentDataRevision.n_rows,
+                ResidentDataRevision.revision,
+            )
+        )
+    }
+    rows = db.execute(
+        select(InBedDaily.resident_id, func.max(InBedDaily.date))
+        .where(InBedDaily.resident_id.is_not(None))
+        .group_by(InBedDaily.resident_id)
+    )
+    versions: Dict[int, DataVersion] = {}
+    for resident_id, last_date in rows:
+        n_rows, revision = counters.get(resident_id, (0, 0))
+        versions[resident_id] = DataVersion(n_rows, last_date, revision)
+    return versions
+
+
+def bump_revisions(
+    db: Session, resident_ids: Iterable[int], inserted: Mapping[int, int] | None = None
+) -> None:
+    """Increment the data revision of each resident (part of the caller's transaction).
+
+    - inserted: resident id -> days the write added, added to the row count.
+    """
+    ids = sorted(set(resident_ids))
+    if not ids:
+        return
+    inserted = inserted or {}
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = _insert_for(db)(ResidentDataRevision)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ResidentDataRevision.resident_id],
+        set_={
+            "revision": ResidentDataRevision.revision + 1,
+            "n_rows": ResidentDataRevision.n_rows + stmt.excluded.n_rows,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    db.execute(
+        stmt,
+        [
+            {"resident_id": i, "revision": 1, "n_rows": inserted.get(i, 0), "updated_at": now}
+            for i in ids
+        ],
+    )
+
+
+def oldest_day_per_resident(rows: Iterable[Mapping[str, Any]]) -> Dict[int, date]:
+    """Resident id -> oldest `date` among `rows` (where derived data must be recomputed)."""
+    starts: Dict[int, date] = {}
+    for r in rows:
+        resident_id, day = int(r["resident_id"]), r["date"]
+        if resident_id not in starts or day < starts[resident_id]:
+            starts[resident_id] = day
+    return starts
+
+
+def get_rows_around(
+    db: Session, starts: Mapping[int, date], n_context: int
+) -> Dict[int, Tuple[List[Any], List[Any]]]:
+    """Rows around the oldest written day of many residents, for derived data.
+
+    - starts: resident id -> oldest day written by the current batch.
+    - Returns resident id -> (up to `n_context` rows before its start, every
+      row from its start on), oldest first; rows are (date, *metrics,
+      resident_id) and have the column names as attributes.
+
+    Residents sharing a start date (e.g. a nightly push) are read with one
+    range query reaching `n_context + CONTEXT_SLACK_DAYS` days back. Only
+    residents whose context is not complete within that range and who have
+    older rows (gaps in their data) get a lookup of their own.
+    """
+    # resident_id last, so rows index like (date, *metrics) rows
+    columns = (InBedDaily.date, *METRIC_COLUMNS.values(), InBedDaily.resident_id)
+    by_start: Dict[date, List[int]] = {}
+    for resident_id, start in starts.items():
+        by_start.setdefault(start, []).append(resident_id)
+
+    out: Dict[int, Tuple[List[Any], List[Any]]] = {}
+    for start, resident_ids in by_start.items():
+        lower = start - timedelta(days=n_context + CONTEXT_SLACK_DAYS)
+        found: Dict[int, Tuple[List[Any], List[Any]]] = {rid: ([], []) for rid in resident_ids}
+        # executed on the connection: for the few hundred thousand rows of a
+        # large batch, the ORM result layer costs as much as the query itself
+        result = db.connection().execute(
+            select(*columns)
+            .where(InBedDaily.resident_id.in_(resident_ids), InBedDaily.date >= lower)
+            .order_by(InBedDaily.resident_id, InBedDaily.date)
+        )
+        for resident_id, group in groupby(result, key=itemgetter(-1)):
+            rows = list(group)
+            split = bisect_left(rows, start, key=itemgetter(0))
+            found[resident_id] = (rows[:split], rows[split:])
+
+        short = [rid for rid, (context, _) in found.items() if len(context) < n_context]
+        older: List[int] = []
+        if short:
+            # probed from the daily rows (rows may have no `residents` row), one
+            # index seek per resident: a DISTINCT would scan their older history
+            short_rows = [(rid,) for rid in short]
+            ids = values(column("resident_id", Integer), name="short").data(short_rows).cte()
+            older = db.scalars(
+                select(ids.c.resident_id).where(
+                    exists().where(
+                        InBedDaily.resident_id == ids.c.resident_id, InBedDaily.date < lower
+                    )
+                )
+            ).all()
+        for resident_id in older:
+            context = db.execute(
+                select(*columns)
+                .where(InBedDaily.resident_id == resident_id, InBedDaily.date < start)
+                .order_by(desc(InBedDaily.date))
+                .limit(n_context)
+            ).all()
+            found[resident_id] = (context[::-1], found[resident_id][1])
+
+        for resident_id, (context, changed) in found.items():
+            out[resident_id] = (context[-n_context:] if n_context else [], changed)
+    return out
+
+
+def iter_daily_rows(
+    db: Session,
+    resident_id: int | None,
+    start: date | None,
+    end: date | None,
+    batch_size: int,
+) -> Iterator[Sequence[Any]]:
+    """Yield the `EXPORT_COLUMNS` of stored days in batches of `batch_size` rows.
+
+    - resident_id: one resident, or None for all of them.
+    - start / end: inclusive date bounds, None for open-ended.
+    Rows are ordered by resident and date (the unique index). The result is
+    fetched `batch_size` rows at a time rather than buffered, so memory does
+    not grow with the number of rows; the whole iteration reads one snapshot.
+    """
+    stmt = select(*EXPORT_COLUMNS).where(InBedDaily.resident_id.is_not(None))
+    if resident_id is not None:
+        stmt = stmt.where(InBedDaily.resident_id == resident_id)
+    if start is not None:
+        stmt = stmt.where(InBedDaily.date >= start)
+    if end is not None:
+        stmt = stmt.where(InBedDaily.date <= end)
+    stmt = stmt.order_by(InBedDaily.resident_id, InBedDaily.date)
+    # plain rows on the session's connection, without the ORM result layer
+    result = db.connection().execute(stmt, execution_options={"yield_per": batch_size})
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
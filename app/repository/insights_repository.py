@@ -1,9 +1,44 @@
-from typing import Any, List, Tuple
+from datetime import date
+from typing import Any, Dict, List, Sequence, Tuple
 
-from sqlalchemy import desc
+from sqlalchemy import Date, Select, case, cast, desc, func, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.orm_models.inbed_daily import InBedDaily
+from app.repository.metric_series import MetricSeries, date_column, value_column
+from app.repository.series_store import SeriesStore
+
+# map metric name to column attribute
+METRIC_COLUMNS = {
+    "time_in_bed": InBedDaily.time_in_bed,
+    "low_activity": InBedDaily.low_activity,
+    "high_activity": InBedDaily.high_activity,
+    "at_rest": InBedDaily.at_rest,
+}
+
+# Resolutions of `get_metric_buckets`: one point per day, ISO week (starting
+# Monday) or calendar month
+RESOLUTIONS = ("day", "week", "month")
+
+# Memory-mapped copy of the metric columns shared by all workers (see
+# series_store), read instead of SQL where it is current; None unless
+# SERIES_STORE_DIR is set
+SERIES_STORE = SeriesStore.from_env(list(METRIC_COLUMNS))
+
+
+def _last_n_metric_rows_stmt(
+    resident_id: int, metric: str, limit: int, end: date | None = None
+) -> Select:
+    """Build the newest-first (date, value) query shared by the sync and async functions."""
+    col = METRIC_COLUMNS.get(metric)
+    if col is None:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    stmt = select(InBedDaily.date, col).where(InBedDaily.resident_id == resident_id)
+    if end is not None:
+        stmt = stmt.where(InBedDaily.date <= end)
+    return stmt.order_by(desc(InBedDaily.date)).limit(limit)
 
 
 def get_last_n_metric_rows(
@@ -14,24 +49,176 @@ def get_last_n_metric_rows(
     Allowed metrics map to columns on the InBedDaily model. Returns rows in
     chronological order (oldest first).
     """
-    # map metric name to column attribute
-    metric_map = {
-        "time_in_bed": InBedDaily.time_in_bed,
-        "low_activity": InBedDaily.low_activity,
-        "high_activity": InBedDaily.high_activity,
-        "at_rest": InBedDaily.at_rest,
-    }
+    rows = db.execute(_last_n_metric_rows_stmt(resident_id, metric, limit)).all()
+    rows = list(reversed(rows))
+    return [(r[0], r[1]) for r in rows]
+
 
-    col = metric_map.get(metric)
+async def get_last_n_metric_rows_async(
+    resident_id: int, metric: str, limit: int, db: AsyncSession
+) -> List[Tuple[Any, Any]]:
+    """Async mirror of `get_last_n_metric_rows` (same rows, same order)."""
+    result = await db.execute(_last_n_metric_rows_stmt(resident_id, metric, limit))
+    rows = list(reversed(result.all()))
+    return [(r[0], r[1]) for r in rows]
+
+
+def get_last_n_metric_rows_for_residents(
+    metric: str, limit: int, db: Session, resident_ids: Sequence[int] | None = None
+) -> List[Tuple[int, int, Any]]:
+    """Return the last `limit` values of a metric for many residents in one query.
+
+    Rows are (resident_id, rank, value) where rank 1 is the resident's newest
+    day. `resident_ids=None` means all residents. Uses a window function so the
+    database only has to walk the (resident_id, date) index once.
+    """
+    col = METRIC_COLUMNS.get(metric)
     if col is None:
         raise ValueError(f"Unknown metric: {metric}")
 
-    rows = (
-        db.query(InBedDaily.date, col)
-        .filter(InBedDaily.resident_id == resident_id)
+    rank = (
+        func.row_number()
+        .over(partition_by=InBedDaily.resident_id, order_by=desc(InBedDaily.date))
+        .label("rank")
+    )
+    ranked = select(InBedDaily.resident_id, rank, col.label("value")).where(
+        InBedDaily.resident_id.is_not(None)
+    )
+    if resident_ids is not None:
+        ranked = ranked.where(InBedDaily.resident_id.in_(list(resident_ids)))
+    sub = ranked.subquery()
+
+    rows = db.execute(
+        select(sub.c.resident_id, sub.c.rank, sub.c.value).where(sub.c.rank <= limit)
+    ).all()
+    return [(r[0], r[1], r[2]) for r in rows]
+
+
+def get_last_n_metric_series(
+    resident_id: int, metric: str, limit: int, db: Session, end: date | None = None
+) -> MetricSeries:
+    """Return the last `limit` rows of a metric as a `MetricSeries` (oldest first).
+
+    Same rows as `get_last_n_metric_rows`, but the arrays are filled straight
+    from the result rows without building intermediate tuples. With `end`,
+    the last rows on or before that day.
+    """
+    if SERIES_STORE is not None:
+        series = SERIES_STORE.get_last_n_series(resident_id, metric, limit, end)
+        if series is not None:
+            return series
+    rows = db.execute(_last_n_metric_rows_stmt(resident_id, metric, limit, end)).all()
+    return MetricSeries.from_rows(rows, newest_first=True)
+
+
+async def get_last_n_metric_series_async(
+    resident_id: int, metric: str, limit: int, db: AsyncSession
+) -> MetricSeries:
+    """Async mirror of `get_last_n_metric_series`."""
+    if SERIES_STORE is not None:
+        series = SERIES_STORE.get_last_n_series(resident_id, metric, limit)
+        if series is not None:
+            return series
+    result = await db.execute(_last_n_metric_rows_stmt(resident_id, metric, limit))
+    return MetricSeries.from_rows(result.all(), newest_first=True)
+
+
+def get_last_n_series_all_metrics(
+    resident_id: int, limit: int, db: Session
+) -> Dict[str, MetricSeries]:
+    """Return the last `limit` rows of every metric from a single query.
+
+    Maps each metric name to a `MetricSeries` (oldest first); all series share
+    one dates array. Metrics of a resident without rows map to empty series.
+    """
+    if SERIES_STORE is not None:
+        by_metric = SERIES_STORE.get_last_n_series_all_metrics(resident_id, limit)
+        if by_metric is not None:
+            return by_metric
+    stmt = (
+        select(InBedDaily.date, *METRIC_COLUMNS.values())
+        .where(InBedDaily.resident_id == resident_id)
         .order_by(desc(InBedDaily.date))
         .limit(limit)
-        .all()
     )
-    rows = list(reversed(rows))
-    return [(r[0], r[1]) for r in rows]
+    rows = db.execute(stmt).all()
+    dates = date_column(rows)[::-1]
+    return {
+        metric: MetricSeries(dates, value_column(rows, i)[::-1])
+        for i, metric in enumerate(METRIC_COLUMNS, start=1)
+    }
+
+
+def _bucket_start(resolution: str, dialect: str):
+    """SQL expression for the first day of the week / month each row falls in."""
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+    if dialect == "postgresql":
+        return cast(func.date_trunc(resolution, InBedDaily.date), Date)
+    # SQLite: back to the Monday on or before the day / to the 1st of the month
+    modifiers = ("-6 days", "weekday 1") if resolution == "week" else ("start of month",)
+    return type_coerce(func.date(InBedDaily.date, *modifiers), Date)
+
+
+def _metric_buckets_stmt(
+    resident_id: int,
+    metric: str,
+    start: date | None,
+    end: date | None,
+    resolution: str,
+    dialect: str,
+) -> Select:
+    col = METRIC_COLUMNS.get(metric)
+    if col is None:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    if resolution == "day":
+        # one row per day already (unique index): no GROUP BY needed
+        bucket = InBedDaily.date
+        columns = (col, col, col, case((col.is_(None), 0), else_=1))
+    else:
+        bucket = _bucket_start(resolution, dialect).label("bucket")
+        columns = (func.avg(col), func.min(col), func.max(col), func.count(col))
+    stmt = select(bucket, *columns).where(InBedDaily.resident_id == resident_id)
+    if start is not None:
+        stmt = stmt.where(InBedDaily.date >= start)
+    if end is not None:
+        stmt = stmt.where(InBedDaily.date <= end)
+    if resolution != "day":
+        stmt = stmt.group_by(bucket)
+    return stmt.order_by(bucket)
+
+
+def get_metric_buckets(
+    resident_id: int,
+    metric: str,
+    db: Session,
+    start: date | None = None,
+    end: date | None = None,
+    resolution: str = "day",
+) -> List[Any]:
+    """Aggregate a metric per day, week or month within an inclusive date range.
+
+    Rows are (bucket_start, mean, min, max, n_values), oldest first; the
+    aggregation runs in the database, so a multi-year range at `month`
+    resolution returns a few dozen rows. Buckets whose days all lack the
+    metric have a NULL mean and n_values 0.
+    """
+    dialect = db.get_bind().dialect.name
+    return db.execute(
+        _metric_buckets_stmt(resident_id, metric, start, end, resolution, dialect)
+    ).all()
+
+
+def get_metric_range_series(
+    resident_id: int,
+    metric: str,
+    db: Session,
+    start: date | None = None,
+    end: date | None = None,
+    resolution: str = "day",
+) -> MetricSeries:
+    """The bucket means of `get_metric_buckets` as a `MetricSeries` (oldest first)."""
+    return MetricSeries.from_rows(
+        get_metric_buckets(resident_id, metric, db, start, end, resolution)
+    )
@@ -0,0 +1,66 @@
+from datetime import date
+from typing import Any, Dict, List, Mapping, Sequence
+
+from sqlalchemy import desc
+from sqlalchemy.orm import Session
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.metric_window_stats import MetricWindowStats
+from app.repository.inbed_daily_repository import _insert_for
+from app.repository.insights_repository import METRIC_COLUMNS
+
+
+def get_stats(db: Session, resident_id: int) -> Dict[str, MetricWindowStats]:
+    """Return the stored window stats of a resident keyed by metric name."""
+    rows = db.query(MetricWindowStats).filter(MetricWindowStats.resident_id == resident_id).all()
+    return {r.metric: r for r in rows}
+
+
+def upsert_stats(db: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+    """Insert or replace window stats rows keyed on (resident_id, metric), in one executemany."""
+    if not rows:
+        return
+    stmt = _insert_for(db)(MetricWindowStats.__table__)
+    columns = [c for c in rows[0] if c not in ("resident_id", "metric")]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["resident_id", "metric"], set_={c: stmt.excluded[c] for c in columns}
+    )
+    db.execute(stmt, list(rows))
+
+
+def get_metric_stats(db: Session, resident_id: int, metric: str) -> MetricWindowStats | None:
+    """Return the stored window stats of one resident/metric, or None."""
+    return db.get(MetricWindowStats, (resident_id, metric))
+
+
+def get_latest_rows(db: Session, resident_id: int, limit: int) -> List[Any]:
+    """Return up to `limit` newest rows (date + all metrics), newest first."""
+    return (
+        db.query(InBedDaily.date, *METRIC_COLUMNS.values())
+        .filter(InBedDaily.resident_id == resident_id)
+        .order_by(desc(InBedDaily.date))
+        .limit(limit)
+        .all()
+    )
+
+
+def get_rows_from(db: Session, resident_id: int, start: date, limit: int) -> List[Any]:
+    """Return up to `limit` rows (date + all metrics) on or after `start`, oldest first."""
+    return (
+        db.query(InBedDaily.date, *METRIC_COLUMNS.values())
+        .filter(InBedDaily.resident_id == resident_id, InBedDaily.date >= start)
+        .order_by(InBedDaily.date)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_last_date(db: Session, resident_id: int) -> date | None:
+    """Return the newest stored day of a resident (index lookup)."""
+    row = (
+        db.query(InBedDaily.date)
+        .filter(InBedDaily.resident_id == resident_id)
+        .order_by(desc(InBedDaily.date))
+        .first()
+    )
+    return row[0] if row else None
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.online_change_point import OnlineChangePointState
+from app.repository.inbed_daily_repository import _insert_for
+from app.repository.insights_repository import METRIC_COLUMNS
+
+
+def get_state(db: Session, resident_id: int, metric: str) -> OnlineChangePointState | None:
+    """Return the detector state of one resident/metric, or None."""
+    return db.get(OnlineChangePointState, (resident_id, metric))
+
+
+def get_states(
+    db: Session, resident_ids: Sequence[int]
+) -> Dict[Tuple[int, str], OnlineChangePointState]:
+    """Detector states of many residents keyed by (resident_id, metric), in one query."""
+    if not resident_ids:
+        return {}
+    rows = db.scalars(
+        select(OnlineChangePointState).where(
+            OnlineChangePointState.resident_id.in_(list(resident_ids))
+        )
+    )
+    return {(r.resident_id, r.metric): r for r in rows}
+
+
+def upsert_states(db: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+    """Insert or replace detector states keyed on (resident_id, metric), in one executemany."""
+    if not rows:
+        return
+    stmt = _insert_for(db)(OnlineChangePointState.__table__)
+    columns = [c for c in rows[0] if c not in ("resident_id", "metric")]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["resident_id", "metric"], set_={c: stmt.excluded[c] for c in columns}
+    )
+    db.execute(stmt, list(rows))
+
+
+def get_history_rows(db: Session, resident_id: int) -> List[Any]:
+    """Every row (date + all metrics) of a resident, oldest first."""
+    return db.execute(
+        select(InBedDaily.date, *METRIC_COLUMNS.values())
+        .where(InBedDaily.resident_id == resident_id)
+        .order_by(InBedDaily.date)
+    ).all()
@@ -0,0 +1,88 @@
+from typing import Any, Dict, Mapping, Sequence
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.orm_models.precomputed_insight import PrecomputedInsight
+from app.repository.inbed_daily_repository import DataVersion, _insert_for
+
+KEY_COLUMNS = ("resident_id", "analysis", "metric", "window_size")
+
+# built once: the lookup runs on every insight request that misses the
+# in-process cache
+_GET_STMT = select(
+    PrecomputedInsight.payload,
+    PrecomputedInsight.data_rows,
+    PrecomputedInsight.data_last_date,
+    PrecomputedInsight.data_revision,
+).where(
+    PrecomputedInsight.resident_id == bindparam("resident_id"),
+    PrecomputedInsight.analysis == bindparam("analysis"),
+    PrecomputedInsight.metric == bindparam("metric"),
+    PrecomputedInsight.window_size == bindparam("window_size"),
+)
+
+
+def _params(analysis: str, resident_id: int, metric: str, window: int) -> Dict[str, Any]:
+    return {
+        "resident_id": resident_id,
+        "analysis": analysis,
+        "metric": metric,
+        "window_size": window,
+    }
+
+
+def _current_payload(row: Any, version: DataVersion) -> str | None:
+    if row is None or DataVersion(row[1], row[2], row[3]) != version:
+        return None
+    return row[0]
+
+
+def get_payload(
+    db: Session, analysis: str, resident_id: int, metric: str, window: int, version: DataVersion
+) -> str | None:
+    """The stored response JSON of an insight, if it was computed at `version`.
+
+    None when there is no row or the data changed since it was computed.
+    """
+    row = db.execute(_GET_STMT, _params(analysis, resident_id, metric, window)).first()
+    return _current_payload(row, version)
+
+
+async def get_payload_async(
+    db: AsyncSession,
+    analysis: str,
+    resident_id: int,
+    metric: str,
+    window: int,
+    version: DataVersion,
+) -> str | None:
+    """Async mirror of `get_payload`."""
+    result = await db.execute(_GET_STMT, _params(analysis, resident_id, metric, window))
+    return _current_payload(result.first(), version)
+
+
+def get_summary_versions(db: Session, window: int) -> Dict[int, DataVersion]:
+    """Resident id -> data version of its stored summary (the last precompute of it)."""
+    rows = db.execute(
+        select(
+            PrecomputedInsight.resident_id,
+            PrecomputedInsight.data_rows,
+            PrecomputedInsight.data_last_date,
+            PrecomputedInsight.data_revision,
+        ).where(PrecomputedInsight.analysis == "summary", PrecomputedInsight.window_size == window)
+    )
+    return {r[0]: DataVersion(r[1], r[2], r[3]) for r in rows}
+
+
+def upsert(db: Session, rows: Sequence[Mapping[str, Any]]) -> None:
+    """Insert or replace precomputed rows keyed on `KEY_COLUMNS`, in one executemany."""
+    if not rows:
+        return
+    stmt = _insert_for(db)(PrecomputedInsight.__table__)
+    columns = [c for c in rows[0] if c not in KEY_COLUMNS]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS), set_={c: stmt.excluded[c] for c in columns}
+    )
+    db.execute(stmt, list(rows))
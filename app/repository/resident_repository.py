@@ -1,27 +1,69 @@
-from typing import List
+from typing import Any, Dict, Iterable, List, Set
 
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Import the ORM model for residents
 from app.orm_models.resident import Resident
 
+# Columns of a resident in list responses (no ORM objects are built for lists)
+LIST_COLUMNS = (Resident.id, Resident.name, Resident.room_number)
 
-def get_residents(db: Session, offset: int = 0, limit: int = 50) -> List[Resident]:
-    """Return a list of Resident ORM objects.
+
+def _residents_page_stmt(offset: int, limit: int, after_id: int | None) -> Select:
+    """Build the page query shared by the sync and async functions.
+
+    With `after_id` the page starts right after that id (keyset pagination: a
+    primary-key range scan, as fast on the last page as on the first);
+    otherwise `offset` rows are skipped.
+    """
+    stmt = select(*LIST_COLUMNS).order_by(Resident.id).limit(max(1, limit))
+    if after_id is not None:
+        return stmt.where(Resident.id > after_id)
+    return stmt.offset(max(0, offset))
+
+
+def get_residents(
+    db: Session, offset: int = 0, limit: int = 50, after_id: int | None = None
+) -> List[Dict[str, Any]]:
+    """Return one page of residents as plain dicts (id, name, room_number).
 
 
     Parameters
     - db: SQLAlchemy Session (injected by dependency)
-    - offset: number of rows to skip (for pagination)
+    - offset: number of rows to skip (for pagination); ignored with `after_id`
     - limit: maximum number of rows to return
+    - after_id: return residents with an id greater than this (keyset pagination)
 
-    Returns a list (possibly empty) of Resident instances.
+    Returns a list (possibly empty) ordered by id.
     """
-    return (
-        db.query(Resident).order_by(Resident.id).offset(max(0, offset)).limit(max(1, limit)).all()
-    )
+    result = db.execute(_residents_page_stmt(offset, limit, after_id))
+    return [dict(row) for row in result.mappings()]
 
 
 def get_resident(db: Session, resident_id: int) -> Resident | None:
     """Return a single Resident ORM instance or None if not found."""
     return db.query(Resident).filter(Resident.id == int(resident_id)).first()
+
+
+def get_existing_ids(db: Session, resident_ids: Iterable[int]) -> Set[int]:
+    """Return the subset of `resident_ids` that exist (one primary-key IN query)."""
+    ids = list(resident_ids)
+    if not ids:
+        return set()
+    return set(db.scalars(select(Resident.id).where(Resident.id.in_(ids))))
+
+
+async def get_residents_async(
+    db: AsyncSession, offset: int = 0, limit: int = 50, after_id: int | None = None
+) -> List[Dict[str, Any]]:
+    """Async mirror of `get_residents`."""
+    result = await db.execute(_residents_page_stmt(offset, limit, after_id))
+    return [dict(row) for row in result.mappings()]
+
+
+async def get_resident_async(db: AsyncSession, resident_id: int) -> Resident | None:
+    """Async mirror of `get_resident`."""
+    result = await db.execute(select(Resident).where(Resident.id == int(resident_id)).limit(1))
+    return result.scalars().first()
@@ -0,0 +1,109 @@
+from datetime import date
+from typing import Any, Dict, List, Mapping, Sequence
+
+from sqlalchemy import Row, bindparam, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.metric_rolling_daily import MetricRollingDaily
+from app.repository.insights_repository import METRIC_COLUMNS
+
+# built once: the lookup runs on every trend request, and a prebuilt statement
+# skips constructing the query and its cache key per call
+_ROLLING_COLUMNS = (
+    MetricRollingDaily.n_rows,
+    MetricRollingDaily.sum_7,
+    MetricRollingDaily.count_7,
+    MetricRollingDaily.sum_28,
+    MetricRollingDaily.count_28,
+)
+_CURRENT_STMT = select(*_ROLLING_COLUMNS).where(
+    MetricRollingDaily.resident_id == bindparam("resident_id"),
+    MetricRollingDaily.metric == bindparam("metric"),
+    MetricRollingDaily.date
+    == select(func.max(InBedDaily.date))
+    .where(InBedDaily.resident_id == bindparam("resident_id"))
+    .scalar_subquery(),
+)
+_AS_OF_STMT = select(*_ROLLING_COLUMNS).where(
+    MetricRollingDaily.resident_id == bindparam("resident_id"),
+    MetricRollingDaily.metric == bindparam("metric"),
+    MetricRollingDaily.date
+    == select(func.max(InBedDaily.date))
+    .where(
+        InBedDaily.resident_id == bindparam("resident_id"),
+        InBedDaily.date <= bindparam("end"),
+    )
+    .scalar_subquery(),
+)
+
+
+def get_current(db: Session, resident_id: int, metric: str) -> Row | None:
+    """Return the aggregates of one metric on the resident's newest stored day.
+
+    None when that day has no aggregate row, i.e. the table is missing or
+    behind rows appended outside the ingest path. One statement, two index seeks.
+    """
+    return db.execute(_CURRENT_STMT, {"resident_id": resident_id, "metric": metric}).first()
+
+
+def get_as_of(db: Session, resident_id: int, metric: str, end: date) -> Row | None:
+    """Like `get_current`, for the resident's newest stored day on or before `end`."""
+    return db.execute(
+        _AS_OF_STMT, {"resident_id": resident_id, "metric": metric, "end": end}
+    ).first()
+
+
+def rebuild(db: Session, windows: Sequence[int]) -> None:
+    """Recompute the whole table inside the database with window functions.
+
+    One INSERT ... SELECT per metric: `windows` are the short and long window
+    sizes (in rows) stored as sum/count_<size>. Replaces all existing rows; the
+    caller owns the transaction.
+    """
+    db.execute(delete(MetricRollingDaily))
+    for metric, col in METRIC_COLUMNS.items():
+        columns = {}
+        for size in windows:
+            over = {
+                "partition_by": InBedDaily.resident_id,
+                "order_by": InBedDaily.date,
+                "rows": (-(size - 1), 0),
+            }
+            if size == max(windows):
+                columns["n_rows"] = func.count().over(**over)
+            columns[f"sum_{size}"] = func.coalesce(func.sum(col).over(**over), 0.0)
+            columns[f"count_{size}"] = func.count(col).over(**over)
+        query = select(
+            InBedDaily.resident_id,
+            literal(metric),
+            InBedDaily.date,
+            *(c.label(name) for name, c in columns.items()),
+        ).where(InBedDaily.resident_id.is_not(None))
+        db.execute(
+            insert(MetricRollingDaily).from_select(
+                ["resident_id", "metric", "date", *columns], query
+            )
+        )
+
+
+def replace_from(
+    db: Session, starts: Mapping[int, date], rows: Sequence[Mapping[str, Any]]
+) -> None:
+    """Replace each resident's aggregates on or after its start date with `rows`.
+
+    One DELETE per distinct start date and one executemany INSERT; the caller
+    owns the transaction.
+    """
+    by_start: Dict[date, List[int]] = {}
+    for resident_id, start in starts.items():
+        by_start.setdefault(start, []).append(resident_id)
+    for start, resident_ids in by_start.items():
+        db.execute(
+            delete(MetricRollingDaily).where(
+                MetricRollingDaily.resident_id.in_(resident_ids), MetricRollingDaily.date >= start
+            )
+        )
+    if rows:
+        # Core insert on the table: skips the per-row ORM bookkeeping of a bulk insert
+        db.execute(insert(MetricRollingDaily.__table__), list(rows))
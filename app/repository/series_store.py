@@ -0,0 +1,470 @@
+"""Optional memory-mapped copy of the metric columns, shared by all workers.
+
+With several uvicorn workers every process reads the same windows from SQLite
+and builds its own arrays from the rows. When `SERIES_STORE_DIR` is set, the
+ingest path also writes every stored day into a directory of flat files that
+each worker maps into memory (`np.memmap`), so all of them read the same pages
+of the OS page cache:
+
+- `<metric>-<gen>.f8`: one float64 residents x days grid per metric (NaN = NULL)
+- `valid-<gen>.u1`: bitmap of the days that have a row (packed, 8 days a byte)
+- `residents-<gen>.i8`: resident id of each grid row (the resident-offset index)
+- `last_day-<gen>.i8`: newest day with a row per grid row
+- `writers-<gen>.i8`: writes staged but not yet published per grid row; rows
+  with any are read from SQL instead
+- `version-<gen>.i8`: bumped by every write staged to a grid row
+- `layout-<gen>.i8`: (epoch day ordinal, days, grid rows)
+- `header.i8`: (current generation, residents in use)
+
+The window of the last `limit` rows of a resident is a copy of a slice of its
+grid row, checked against the row's version after copying: a write staged
+meanwhile sends the read to SQL. Growing the grid (more residents, days before the epoch
+or past the end) writes a new generation of files; readers switch to it on
+their next read, and the old files stay readable until they let go.
+
+Writes are staged in the store before the database commit and published
+after it (`stage` / `publish`), under a file lock shared by the workers.
+`stage` counts one more writer on the grid rows it writes and `publish` one
+less, so a row is read from the store only when every write to it has been
+committed. A rollback or a crash in between leaves the count above zero:
+those residents are read from SQL until the store is rebuilt. Residents
+whose history is not in the store (stored before it was enabled, or written
+by other means) are read from SQL as well. Rebuild it from the database with:
+    SERIES_STORE_DIR=... python -m app.repository.series_store
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from app.repository.metric_series import MetricSeries, RowBatch
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no locking between processes on Windows
+    fcntl = None
+
+# date.toordinal() of 1970-01-01, the datetime64 epoch
+_EPOCH_ORDINAL = 719163
+# The days axis is kept a multiple of this, so the bitmap shifts by whole bytes
+DAY_BLOCK = 64
+# Minimum number of days (and grid rows) added when the grid grows
+MIN_GROWTH_DAYS = 366
+MIN_GROWTH_ROWS = 64
+# header.i8 fields
+_GENERATION, _N_RESIDENTS = 0, 1
+
+
+def _round_up(n: int, block: int) -> int:
+    return -(-n // block) * block
+
+
+class _Generation:
+    """The mapped files of one generation of the store."""
+
+    def __init__(self, path: str, generation: int, metrics: Sequence[str], mode: str):
+        def name(stem: str, suffix: str) -> str:
+            return os.path.join(path, f"{stem}-{generation}.{suffix}")
+
+        self.generation = generation
+        self.epoch, self.n_days, self.capacity = (
+            int(x) for x in np.fromfile(name("layout", "i8"), dtype="<i8")
+        )
+
+        def mapped(stem: str, suffix: str, dtype: Any, shape: Tuple[int, ...]) -> np.ndarray:
+            # a plain ndarray over the mapping: np.memmap slices cost several
+            # times more to create, and the mapping lives as long as any view
+            return np.memmap(name(stem, suffix), dtype=dtype, mode=mode, shape=shape).view(
+                np.ndarray
+            )
+
+        shape = (self.capacity, self.n_days)
+        self.values = {m: mapped(m, "f8", "<f8", shape) for m in metrics}
+        self.valid = mapped("valid", "u1", np.uint8, (self.capacity, self.n_days // 8))
+        self.resident_ids = mapped("residents", "i8", "<i8", (self.capacity,))
+        self.last_day = mapped("last_day", "i8", "<i8", (self.capacity,))
+        self.writers = mapped("writers", "i8", "<i8", (self.capacity,))
+        self.version = mapped("version", "i8", "<i8", (self.capacity,))
+        # resident id -> grid row, extended as residents are added
+        self.rows: Dict[int, int] = {}
+
+    @staticmethod
+    def create(
+        path: str, generation: int, metrics: Sequence[str], epoch: int, n_days: int, capacity: int
+    ) -> None:
+        """Write the (sparse) files of a new, empty generation."""
+
+        def create_file(stem: str, suffix: str, dtype: Any, shape: Tuple[int, ...], fill: Any):
+            out = np.memmap(
+                os.path.join(path, f"{stem}-{generation}.{suffix}"), dtype, "w+", shape=shape
+            )
+            if fill:
+                out[:] = fill
+            out.flush()
+
+        np.array([epoch, n_days, capacity], dtype="<i8").tofile(
+            os.path.join(path, f"layout-{generation}.i8")
+        )
+        for metric in metrics:
+            # rows without a day in the bitmap are never read, so no NaN fill
+            create_file(metric, "f8", "<f8", (capacity, n_days), 0)
+        create_file("valid", "u1", np.uint8, (capacity, n_days // 8), 0)
+        create_file("residents", "i8", "<i8", (capacity,), 0)
+        create_file("last_day", "i8", "<i8", (capacity,), -1)
+        create_file("writers", "i8", "<i8", (capacity,), 0)
+        create_file("version", "i8", "<i8", (capacity,), 0)
+
+    def sync_rows(self, n_residents: int) -> None:
+        """Index the residents added since the last call."""
+        n_residents = min(n_residents, self.capacity)
+        if n_residents > len(self.rows):
+            new = self.resident_ids[len(self.rows) : n_residents].tolist()
+            self.rows.update(zip(new, range(len(self.rows), n_residents), strict=True))
+
+    def row_days(self, row: int, last: int, limit: int) -> np.ndarray:
+        """Day indices of the last `limit` rows on or before day `last`, oldest first."""
+        # a little wider than the window, so a few missing days need no second pass
+        span = limit + limit // 4 + 8
+        while True:
+            lo = max(0, last + 1 - span)
+            bits = np.unpackbits(self.valid[row, lo // 8 : last // 8 + 1], bitorder="little")[
+                lo % 8 : lo % 8 + last + 1 - lo
+            ]
+            days = np.flatnonzero(bits)
+            if len(days) >= limit or lo == 0:
+                return days[-limit:] + lo
+            span *= 4
+
+
+class SeriesStore:
+    """Memory-mapped residents x days grids of the metrics in one directory."""
+
+    def __init__(self, path: str, metrics: Sequence[str]):
+        self.path = path
+        self.metrics = list(metrics)
+        self._header: np.ndarray | None = None
+        self._read: _Generation | None = None
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, metrics: Sequence[str]) -> "SeriesStore | None":
+        """The store in `SERIES_STORE_DIR`, or None when it is not set."""
+        path = os.getenv("SERIES_STORE_DIR")
+        return cls(path, metrics) if path else None
+
+    # -- reading --------------------------------------------------------
+
+    def _reader(self) -> _Generation | None:
+        """The current generation, mapped read-only; None before the first write."""
+        if self._header is None:
+            header_path = os.path.join(self.path, "header.i8")
+            if not os.path.exists(header_path):
+                return None
+            self._header = np.memmap(header_path, dtype="<i8", mode="r", shape=(2,)).view(
+                np.ndarray
+            )
+        generation, n_residents = int(self._header[_GENERATION]), int(self._header[_N_RESIDENTS])
+        if generation == 0:
+            return None
+        current = self._read
+        if current is None or current.generation != generation or len(current.rows) < n_residents:
+            with self._refresh_lock:
+                current = self._read
+                if current is None or current.generation != generation:
+                    current = _Generation(self.path, generation, self.metrics, "r")
+                current.sync_rows(n_residents)
+                self._read = current
+        return current
+
+    def _row_days(
+        self, resident_id: int, limit: int, end: date | None
+    ) -> Tuple[_Generation, int, int, np.ndarray] | None:
+        """(generation, grid row, row version, day indices) of a resident's last `limit` rows."""
+        gen = self._reader()
+        if gen is None:
+            return None
+        row = gen.rows.get(resident_id)
+        if row is None:
+            return None
+        # the version before the writers: a write staged after this check
+        # bumps the version before touching the grid
+        version = int(gen.version[row])
+        if gen.writers[row]:
+            return None
+        last = int(gen.last_day[row])
+        if end is not None:
+            last = min(last, end.toordinal() - gen.epoch)
+        if last < 0 or limit <= 0:
+            return gen, row, version, np.empty(0, dtype=np.int64)
+        return gen, row, version, gen.row_days(row, last, limit)
+
+    @staticmethod
+    def _window(gen: _Generation, metric: str, row: int, days: np.ndarray) -> np.ndarray:
+        """A copy of the row's values on `days`, so later writes don't change it."""
+        values = gen.values[metric]
+        if len(days) and days[-1] - days[0] == len(days) - 1:
+            return values[row, days[0] : days[-1] + 1].copy()
+        return values[row, days]
+
+    @staticmethod
+    def _unchanged(gen: _Generation, row: int, version: int) -> bool:
+        """Whether no write was staged to the row since `version` was read."""
+        return not gen.writers[row] and int(gen.version[row]) == version
+
+    def get_last_n_series(
+        self, resident_id: int, metric: str, limit: int, end: date | None = None
+    ) -> MetricSeries | None:
+        """The last `limit` rows of a metric (on or before `end`), or None to read SQL.
+
+        Same series as `insights_repository.get_last_n_metric_series`.
+        """
+        if metric not in self.metrics:
+            raise ValueError(f"Unknown metric: {metric}")
+        found = self._row_days(resident_id, limit, end)
+        if found is None:
+            return None
+        gen, row, version, days = found
+        values = self._window(gen, metric, row, days)
+        if not self._unchanged(gen, row, version):
+            return None
+        dates = (days + (gen.epoch - _EPOCH_ORDINAL)).astype("datetime64[D]")
+        return MetricSeries(dates, values)
+
+    def get_last_n_series_all_metrics(
+        self, resident_id: int, limit: int
+    ) -> Dict[str, MetricSeries] | None:
+        """`get_last_n_series` of every metric, sharing one dates array."""
+        found = self._row_days(resident_id, limit, None)
+        if found is None:
+            return None
+        gen, row, version, days = found
+        values = {m: self._window(gen, m, row, days) for m in self.metrics}
+        if not self._unchanged(gen, row, version):
+            return None
+        dates = (days + (gen.epoch - _EPOCH_ORDINAL)).astype("datetime64[D]")
+        return {m: MetricSeries(dates, values[m]) for m in self.metrics}
+
+    # -- writing --------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[np.memmap]:
+        """Hold the writer lock; yields the header mapped read-write."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "lock"), "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            header_path = os.path.join(self.path, "header.i8")
+            if not os.path.exists(header_path):
+                np.zeros(2, dtype="<i8").tofile(header_path)
+            yield np.memmap(header_path, dtype="<i8", mode="r+", shape=(2,))
+
+    def _writer(
+        self, header: np.memmap, gen: _Generation | None, days: np.ndarray, n_new: int
+    ) -> _Generation:
+        """`gen` (read-write), or a new generation grown to hold `days` and `n_new` residents."""
+        lo, hi = int(days.min()), int(days.max())
+        if gen is None:
+            n_days = _round_up(hi - lo + 1 + MIN_GROWTH_DAYS, DAY_BLOCK)
+            capacity = max(n_new, MIN_GROWTH_ROWS)
+            generation = int(header[_GENERATION]) + 1
+            _Generation.create(self.path, generation, self.metrics, lo, n_days, capacity)
+            header[_GENERATION] = generation
+            return _Generation(self.path, generation, self.metrics, "r+")
+
+        # grow by at least half, so appending day by day stays amortized O(1)
+        shift = _round_up(max(gen.epoch - lo, 0), DAY_BLOCK)
+        if shift:
+            shift = max(shift, _round_up(gen.n_days // 2, DAY_BLOCK))
+        epoch, n_days = gen.epoch - shift, gen.n_days + shift
+        if hi - epoch >= n_days:
+            n_days = _round_up(max(hi - epoch + 1, n_days + n_days // 2), DAY_BLOCK)
+        capacity = gen.capacity
+        n_residents = int(header[_N_RESIDENTS])
+        if n_residents + n_new > capacity:
+            capacity = max(n_residents + n_new, 2 * capacity)
+        if (epoch, n_days, capacity) == (gen.epoch, gen.n_days, gen.capacity):
+            return gen
+        return self._grow(header, gen, epoch, n_days, capacity)
+
+    def _grow(
+        self, header: np.memmap, old: _Generation, epoch: int, n_days: int, capacity: int
+    ) -> _Generation:
+        """Copy `old` into a new, larger generation and make it current."""
+        generation = old.generation + 1
+        _Generation.create(self.path, generation, self.metrics, epoch, n_days, capacity)
+        new = _Generation(self.path, generation, self.metrics, "r+")
+        n, shift = old.capacity, old.epoch - epoch
+        for metric in self.metrics:
+            new.values[metric][:n, shift : shift + old.n_days] = old.values[metric]
+        new.valid[:n, shift // 8 : (shift + old.n_days) // 8] = old.valid
+        new.resident_ids[:n] = old.resident_ids
+        new.last_day[:n] = np.where(old.last_day >= 0, old.last_day + shift, -1)
+        new.writers[:n] = old.writers
+        new.version[:n] = old.version
+        new.rows = old.rows
+        header[_GENERATION] = generation
+        self._remove_generation(old.generation)
+        return new
+
+    def _remove_generation(self, generation: int) -> None:
+        """Unlink a generation's files (readers that still map them keep them alive)."""
+        stems = (*self.metrics, "valid", "residents", "last_day", "writers", "version", "layout")
+        for stem in stems:
+            for suffix in ("f8", "u1", "i8"):
+                path = os.path.join(self.path, f"{stem}-{generation}.{suffix}")
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _current_for_write(self, header: np.memmap) -> _Generation | None:
+        """The current generation mapped read-write (under the lock), None before the first."""
+        generation = int(header[_GENERATION])
+        if generation == 0:
+            return None
+        gen = _Generation(self.path, generation, self.metrics, "r+")
+        gen.sync_rows(int(header[_N_RESIDENTS]))
+        return gen
+
+    def stage(self, batch: RowBatch, n_context: int) -> List[int]:
+        """Write the changed rows of an ingest batch; returns the residents to `publish`.
+
+        Call before the database commit: the written rows are read from SQL
+        until `publish` is called after it (and after the commits of any
+        other writes staged to them). Residents not in the
+        store are added when the batch holds their whole history (fewer than
+        `n_context` context rows), and left to the rebuild otherwise.
+        """
+        with self._locked() as header:
+            gen = self._current_for_write(header)
+            known = gen.rows if gen is not None else {}
+            positions: List[np.ndarray] = []
+            new_ids: List[int] = []
+            for k, resident_id in enumerate(batch.resident_ids):
+                lo, first_changed, hi = (
+                    int(batch.starts[k]),
+                    int(batch.changed_starts[k]),
+                    int(batch.ends[k]),
+                )
+                if resident_id in known:
+                    positions.append(np.arange(first_changed, hi))
+                elif lo < hi and first_changed - lo < n_context:
+                    # the batch holds the resident's whole history
+                    positions.append(np.arange(lo, hi))
+                    new_ids.append(resident_id)
+            pos = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+            if not len(pos):
+                return []
+            ordinals = np.fromiter(
+                (batch.dates[p].toordinal() for p in pos.tolist()), dtype=np.int64, count=len(pos)
+            )
+            gen = self._writer(header, gen, ordinals, len(new_ids))
+            n_residents = int(header[_N_RESIDENTS])
+            rows = dict(gen.rows)
+            rows.update(zip(new_ids, range(n_residents, n_residents + len(new_ids)), strict=True))
+            segment_rows = np.array([rows.get(rid, -1) for rid in batch.resident_ids])
+            grid_rows = segment_rows[batch.segment[pos]]
+            days = ordinals - gen.epoch
+
+            # rows past the residents in use may hold an aborted write
+            new = slice(n_residents, n_residents + len(new_ids))
+            gen.resident_ids[new] = new_ids
+            gen.last_day[new] = -1
+            gen.valid[new] = 0
+            gen.writers[new] = 0
+            staged = np.unique(grid_rows)
+            # writers first, then the version, then the grid: see _row_days
+            gen.writers[staged] += 1
+            gen.version[staged] += 1
+            self._write(gen, grid_rows, days, batch.values[pos])
+            # new residents become visible to readers last (still being written)
+            header[_N_RESIDENTS] = n_residents + len(new_ids)
+            ids = gen.resident_ids[staged]
+            return [int(rid) for rid in ids]
+
+    def _write(
+        self, gen: _Generation, grid_rows: np.ndarray, days: np.ndarray, values: np.ndarray
+    ) -> None:
+        """Store (grid row, day index) -> metric values, oldest first."""
+        for i, metric in enumerate(self.metrics):
+            gen.values[metric][grid_rows, days] = values[:, i]
+        bits = np.left_shift(1, days % 8).astype(np.uint8)
+        np.bitwise_or.at(gen.valid, (grid_rows, days // 8), bits)
+        np.maximum.at(gen.last_day, grid_rows, days)
+
+    def publish(self, pending: Sequence[int] | None) -> None:
+        """Count the write `stage` returned `pending` for as committed.
+
+        Rows are readable again once no other staged write is pending on them.
+        """
+        if not pending:
+            return
+        with self._locked() as header:
+            gen = self._current_for_write(header)
+            if gen is None:
+                return
+            # residents, not grid rows: a rebuild in between moves them (and
+            # starts every count at zero)
+            rows = [gen.rows[rid] for rid in pending if rid in gen.rows]
+            gen.writers[rows] = np.maximum(gen.writers[rows] - 1, 0)
+
+    def rebuild(self, rows: Iterable[Sequence[Any]]) -> int:
+        """Replace the contents with (resident_id, date, *metrics) rows; returns residents.
+
+        Rows must be grouped by resident. They are written into a new
+        generation, which readers switch to as a whole.
+        """
+        ids: List[int] = []
+        grid_rows: List[int] = []
+        ordinals: List[int] = []
+        values: List[Sequence[Any]] = []
+        for r in rows:
+            if not ids or ids[-1] != r[0]:
+                ids.append(r[0])
+            grid_rows.append(len(ids) - 1)
+            ordinals.append(r[1].toordinal())
+            values.append(r[2 : 2 + len(self.metrics)])
+
+        with self._locked() as header:
+            old = int(header[_GENERATION])
+            # no residents while switching generations
+            header[_N_RESIDENTS] = 0
+            day = np.array(ordinals or [date.today().toordinal()], dtype=np.int64)
+            epoch = int(day.min())
+            n_days = _round_up(int(day.max()) - epoch + 1 + MIN_GROWTH_DAYS, DAY_BLOCK)
+            capacity = max(len(ids), MIN_GROWTH_ROWS)
+            _Generation.create(self.path, old + 1, self.metrics, epoch, n_days, capacity)
+            gen = _Generation(self.path, old + 1, self.metrics, "r+")
+            gen.resident_ids[: len(ids)] = ids
+            self._write(
+                gen,
+                np.array(grid_rows, dtype=np.int64),
+                day[: len(ordinals)] - epoch,
+                np.array(values, dtype=np.float64).reshape(len(values), len(self.metrics)),
+            )
+            header[_GENERATION] = old + 1
+            header[_N_RESIDENTS] = len(ids)
+            if old:
+                self._remove_generation(old)
+        return len(ids)
+
+
+if __name__ == "__main__":
+    from app.database_config import SessionLocal
+    from app.repository.inbed_daily_repository import iter_daily_rows
+    from app.repository.insights_repository import SERIES_STORE
+
+    if SERIES_STORE is None:
+        raise SystemExit("SERIES_STORE_DIR is not set.")
+    session = SessionLocal()
+    try:
+        rows = (
+            (r.resident_id, r.date, *(getattr(r, metric) for metric in SERIES_STORE.metrics))
+            for batch in iter_daily_rows(session, None, None, None, 10_000)
+            for r in batch
+        )
+        print(f"Rebuilt the series store for {SERIES_STORE.rebuild(rows)} residents.")
+    finally:
+        session.close()
@@ -0,0 +1,39 @@
+"""JSON responses for the read endpoints.
+
+For an endpoint that returns a model, FastAPI validates the value against the
+`response_model` again, converts it to plain Python objects and then encodes
+those with `json.dumps`. The services already build valid `...Read` models, so
+the insight and resident endpoints return `json_response(...)` instead: the
+value is encoded once by pydantic-core's Rust serializer, straight from the
+models. The routes keep `response_model` for the OpenAPI schema.
+
+Compression is negotiated by `GZipMiddleware` (see `app.main`) for bodies of at
+least `GZIP_MIN_SIZE` bytes.
+"""
+
+import os
+from typing import Any
+
+import pydantic_core
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+# Smaller bodies are sent uncompressed (the gzip framing is not worth it)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse encoded by pydantic-core (models, dataclasses, dates, lists, dicts)."""
+
+    def render(self, content: Any) -> bytes:
+        return pydantic_core.to_json(content)
+
+
+def json_response(content: Any, response: Response | None = None) -> FastJSONResponse:
+    """Send `content` as JSON without re-validation.
+
+    Headers already set on the injected `response` (e.g. the ETag) are kept.
+    """
+    headers = dict(response.headers) if response is not None else None
+    return FastJSONResponse(content, headers=headers)
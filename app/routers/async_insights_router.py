@@ -0,0 +1,159 @@
+"""Async variants of the insight endpoints.
+
+Same responses as `insights_router`, but the database is accessed through an
+AsyncSession so requests do not occupy a worker thread while waiting on I/O.
+The analysis (PELT in particular) is CPU-bound and still runs in the threadpool so it
+never blocks the event loop.
+"""
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies import get_async_db
+from app.repository import insights_repository
+from app.repository.inbed_daily_repository import DataVersion, get_data_version_async
+from app.responses import FastJSONResponse, json_response
+from app.routers.insights_router import (
+    DEFAULT_WINDOW,
+    Metric,
+    analysis_unavailable,
+    not_modified_or_tag,
+)
+from app.schemas.anomaly_get import AnomalyRead
+from app.schemas.change_point import ChangePointRead
+from app.schemas.trend import TrendRead
+from app.services import anomaly_service, change_point_service, trend_service
+from app.services.analysis_pool import AnalysisUnavailableError
+from app.services.insight_cache import cached_insight_async, insight_etag
+
+router = APIRouter(prefix="/api/async/insights", tags=["Insights (async)"])
+
+
+async def check_insight_etag_async(
+    db: AsyncSession,
+    response: Response,
+    if_none_match: str | None,
+    analysis: str,
+    resident_id: int,
+    metric: str,
+    window: int,
+) -> DataVersion:
+    """Async counterpart of `insights_router.check_insight_etag` (same ETags)."""
+    version = await get_data_version_async(db, resident_id)
+    etag = insight_etag(analysis, resident_id, metric, window, version)
+    not_modified_or_tag(response, if_none_match, etag)
+    return version
+
+
+@router.get("/trend/{metric}/{resident_id}", response_model=TrendRead)
+async def get_metric_trend(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Async variant of `GET /api/insights/trend/{metric}/{resident_id}`."""
+    version = await check_insight_etag_async(
+        db, response, if_none_match, "trend", resident_id, metric.value, trend_service.BASELINE
+    )
+
+    async def compute() -> TrendRead | None:
+        series = await insights_repository.get_last_n_metric_series_async(
+            resident_id, metric.value, trend_service.BASELINE, db
+        )
+        return await run_in_threadpool(
+            trend_service.trend_from_series, resident_id, metric.value, series
+        )
+
+    insight = await cached_insight_async(
+        db,
+        "trend",
+        resident_id,
+        metric.value,
+        trend_service.BASELINE,
+        compute,
+        version=version,
+        model=TrendRead,
+    )
+    if not insight:
+        raise HTTPException(status_code=404, detail="No data found for this resident.")
+    return json_response(insight, response)
+
+
+@router.get("/changepoints/{metric}/{resident_id}", response_model=ChangePointRead)
+async def get_metric_changepoints(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Async variant of `GET /api/insights/changepoints/{metric}/{resident_id}`."""
+    version = await check_insight_etag_async(
+        db, response, if_none_match, "changepoints", resident_id, metric.value, DEFAULT_WINDOW
+    )
+
+    async def compute() -> ChangePointRead | None:
+        series = await insights_repository.get_last_n_metric_series_async(
+            resident_id, metric.value, DEFAULT_WINDOW, db
+        )
+        return await run_in_threadpool(
+            change_point_service.change_points_from_series, resident_id, metric.value, series
+        )
+
+    try:
+        result = await cached_insight_async(
+            db,
+            "changepoints",
+            resident_id,
+            metric.value,
+            DEFAULT_WINDOW,
+            compute,
+            version=version,
+            model=ChangePointRead,
+        )
+    except AnalysisUnavailableError as exc:
+        raise analysis_unavailable(exc) from exc
+    if not result:
+        raise HTTPException(
+            status_code=404, detail="No data found or change-point detection failed"
+        )
+    return json_response(result, response)
+
+
+@router.get("/anomalies/{metric}/{resident_id}", response_model=AnomalyRead)
+async def get_metric_anomalies(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Async variant of `GET /api/insights/anomalies/{metric}/{resident_id}`."""
+    version = await check_insight_etag_async(
+        db, response, if_none_match, "anomalies", resident_id, metric.value, DEFAULT_WINDOW
+    )
+
+    async def compute() -> AnomalyRead | None:
+        series = await insights_repository.get_last_n_metric_series_async(
+            resident_id, metric.value, DEFAULT_WINDOW, db
+        )
+        return await run_in_threadpool(
+            anomaly_service.anomalies_from_series, resident_id, metric.value, series
+        )
+
+    result = await cached_insight_async(
+        db,
+        "anomalies",
+        resident_id,
+        metric.value,
+        DEFAULT_WINDOW,
+        compute,
+        version=version,
+        model=AnomalyRead,
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found or anomaly detection failed")
+    return json_response(result, response)
@@ -0,0 +1,50 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.dependencies import get_async_db
+from app.responses import FastJSONResponse
+from app.routers.resident_router import (
+    DEFAULT_LIMIT,
+    DEFAULT_OFFSET,
+    MAX_LIMIT,
+    MIN_LIMIT,
+    NEXT_PAGE_HEADER,
+    page_response,
+)
+from app.schemas.resident import ResidentRead
+from app.services import residents_service
+
+# Async variants of the resident endpoints (AsyncSession, no worker thread per request)
+router = APIRouter(prefix="/api/async/residents", tags=["Residents (async)"])
+
+
+@router.get("/", response_model=List[ResidentRead])
+async def get_residents(
+    db: AsyncSession = Depends(get_async_db),
+    offset: int = Query(DEFAULT_OFFSET, ge=0, description="Number of rows to skip"),
+    limit: int = Query(
+        DEFAULT_LIMIT,
+        ge=MIN_LIMIT,
+        le=MAX_LIMIT,
+        description=f"Max rows to return (capped at {MAX_LIMIT})",
+    ),
+    after_id: int | None = Query(
+        None, description=f"Return residents after this id (value of the {NEXT_PAGE_HEADER} header)"
+    ),
+) -> FastJSONResponse:
+    """Async variant of `GET /api/residents/`."""
+    rows = await residents_service.get_residents_async(
+        db, offset=offset, limit=limit, after_id=after_id
+    )
+    return page_response(rows, limit)
+
+
+@router.get("/{resident_id}", response_model=ResidentRead)
+async def get_resident(resident_id: int, db: AsyncSession = Depends(get_async_db)) -> ResidentRead:
+    """Async variant of `GET /api/residents/{resident_id}`. Returns 404 if not found."""
+    resident = await residents_service.get_resident_async(db, resident_id)
+    if resident is None:
+        raise HTTPException(status_code=404, detail="Resident not found")
+    return resident
@@ -0,0 +1,49 @@
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.dependencies import get_read_db
+from app.repository.inbed_daily_repository import iter_daily_rows
+from app.services import export_service, residents_service
+
+router = APIRouter(prefix="/api/export", tags=["Export"])
+
+# rows fetched from the cursor and encoded per chunk of the response
+FETCH_ROWS = 5000
+
+MEDIA_TYPES = {"csv": "text/csv", "columnar": "application/x-momo-columnar"}
+EXTENSIONS = {"csv": "csv", "columnar": "mcol"}
+
+
+@router.get("/daily")
+def export_daily(
+    resident_id: int | None = Query(None, description="One resident; all residents when omitted"),
+    start: date | None = Query(None, description="First day (inclusive)"),
+    end: date | None = Query(None, description="Last day (inclusive)"),
+    format: Literal["csv", "columnar"] = Query("csv", description="csv or columnar (binary)"),
+    db: Session = Depends(get_read_db),
+) -> StreamingResponse:
+    """
+    Stream the stored daily rows (raw seconds and counts) ordered by resident
+    and date. The rows are read in batches of `FETCH_ROWS` and sent as they
+    are encoded, so memory use does not depend on the size of the export.
+    See `export_service` for the columnar layout.
+    """
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+    if resident_id is not None and residents_service.get_resident(db, resident_id) is None:
+        raise HTTPException(status_code=404, detail="Resident not found")
+
+    batches = iter_daily_rows(db, resident_id, start, end, FETCH_ROWS)
+    encode = export_service.iter_csv if format == "csv" else export_service.iter_columnar
+    filename = (
+        f"inbed_daily_{resident_id if resident_id is not None else 'all'}.{EXTENSIONS[format]}"
+    )
+    return StreamingResponse(
+        encode(batches),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
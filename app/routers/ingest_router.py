@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies import get_db
+from app.schemas.ingest import IngestResult, RejectedRecord
+from app.services import bulk_ingest_service
+from app.services.bulk_ingest_service import IngestCounts, LineTooLongError
+
+router = APIRouter(prefix="/api/ingest", tags=["Ingest"])
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+CSV_TYPES = {"text/csv"}
+
+
+@router.post("/daily", response_model=IngestResult)
+async def ingest_daily(request: Request, db: Session = Depends(get_db)) -> IngestResult:
+    """
+    Bulk upload of daily rows as NDJSON (one object per line) or CSV with a
+    header line. Fields: `resident_id`, `date` (YYYY-MM-DD) and any of the
+    metric columns; absent metrics keep their stored value.
+
+    The body is streamed and stored in batches, one transaction each. Invalid
+    records are skipped and reported; returns 415 for other content types
+    and 413 for a line longer than 64 KB (the batches before it are kept).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in NDJSON_TYPES | CSV_TYPES:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv.")
+
+    counts = IngestCounts()
+    csv_header = None
+    try:
+        async for lines, first_line in bulk_ingest_service.iter_line_batches(request.stream()):
+            if content_type in CSV_TYPES and csv_header is None:
+                try:
+                    csv_header = bulk_ingest_service.parse_csv_header(lines[0])
+                except (ValueError, StopIteration) as exc:
+                    raise HTTPException(status_code=422, detail=str(exc) or "Empty CSV") from exc
+                lines, first_line = lines[1:], first_line + 1
+            # parsing, validation and the database work run off the event loop
+            await run_in_threadpool(
+                bulk_ingest_service.ingest_lines, db, lines, first_line, counts, csv_header
+            )
+    except LineTooLongError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+
+    return IngestResult(
+        inserted=counts.inserted,
+        updated=counts.updated,
+        rejected=counts.rejected,
+        errors=[RejectedRecord(line=line, reason=reason) for line, reason in counts.errors],
+    )
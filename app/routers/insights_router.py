@@ -1,13 +1,29 @@
+from datetime import date
 from enum import Enum
+from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
-from app.dependencies import get_db
-from app.schemas.anomaly_get import AnomalyRead
+from app.dependencies import get_read_db
+from app.repository.inbed_daily_repository import DataVersion, get_data_version
+from app.responses import FastJSONResponse, json_response
+from app.schemas.anomaly_get import AnomalyRead, AnomalyScanRead, LatestAnomalyRead
 from app.schemas.change_point import ChangePointRead
+from app.schemas.history import HistoryRead
+from app.schemas.summary import InsightSummaryRead
 from app.schemas.trend import TrendRead
-from app.services import anomaly_service, change_point_service, trend_service
+from app.services import (
+    anomaly_service,
+    change_point_service,
+    history_service,
+    online_change_point_service,
+    summary_service,
+    trend_service,
+)
+from app.services.analysis_pool import AnalysisTimeoutError, AnalysisUnavailableError
+from app.services.change_point_service import RangeTooLargeError
+from app.services.insight_cache import cached_insight, insight_etag
 
 
 # Router-level allowed metrics
@@ -18,57 +34,409 @@ class Metric(str, Enum):
     at_rest = "at_rest"
 
 
+class Resolution(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class ScanMethod(str, Enum):
+    zscore = "zscore"
+    robust = "robust"
+
+
+# Number of most recent rows analysed by the change-point and anomaly endpoints
+DEFAULT_WINDOW = summary_service.DEFAULT_WINDOW
+
+# Bounds of `max_points` on the history endpoint
+MIN_HISTORY_POINTS = 3
+MAX_HISTORY_POINTS = 5000
+
+
+def check_range(start: date | None, end: date | None) -> None:
+    """422 when `start` is after `end`."""
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+
+
+def range_window(
+    window: int, start: date | None, end: date | None, resolution: Resolution
+) -> int | str:
+    """Cache / ETag window of a request: `window` rows, or the requested date range."""
+    check_range(start, end)
+    if start is None and end is None:
+        return window
+    return f"{start}..{end}/{resolution.value}"
+
+
+def analysis_unavailable(exc: AnalysisUnavailableError) -> HTTPException:
+    """Translate a busy/timed-out analysis pool into a retryable HTTP error."""
+    if isinstance(exc, AnalysisTimeoutError):
+        return HTTPException(status_code=504, detail="Change-point analysis timed out, retry later")
+    return HTTPException(
+        status_code=503,
+        detail="Change-point analysis is busy, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+# Clients may keep insight responses but must revalidate them (ETag) before use
+CACHE_CONTROL = "no-cache"
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag."""
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def not_modified_or_tag(response: Response, if_none_match: str | None, etag: str) -> None:
+    """Raise 304 when the client holds the current response, else tag the response."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def check_insight_etag(
+    db: Session,
+    response: Response,
+    if_none_match: str | None,
+    analysis: str,
+    resident_id: int,
+    metric: str,
+    window: int | str,
+) -> DataVersion:
+    """Look up the data version, answer 304 if the client is current; returns the version.
+
+    Runs before anything is read or analysed, so a revalidation costs one
+    indexed version lookup.
+    """
+    version = get_data_version(db, resident_id)
+    etag = insight_etag(analysis, resident_id, metric, window, version)
+    not_modified_or_tag(response, if_none_match, etag)
+    return version
+
+
 # Each router handles one feature (clean separation)
 router = APIRouter(prefix="/api/insights", tags=["Insights"])
 
 
+@router.get("/summary/{resident_id}", response_model=InsightSummaryRead)
+def get_resident_summary(
+    resident_id: int,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Trend, change points and anomalies for every metric of one resident.
+
+    - Replaces the 12 per-metric calls a resident card needs: the last 30 rows
+      of all metrics are read with one query and analysed in memory.
+    - Analyses without enough data are null in the response; 404 only when the
+      resident has no data at all.
+    - 503/504 as for the change-point endpoint.
+    """
+    version = check_insight_etag(
+        db, response, if_none_match, "summary", resident_id, "all", DEFAULT_WINDOW
+    )
+    try:
+        result = cached_insight(
+            db,
+            "summary",
+            resident_id,
+            "all",
+            DEFAULT_WINDOW,
+            lambda: summary_service.compute_summary(resident_id, db, window=DEFAULT_WINDOW),
+            version=version,
+            model=InsightSummaryRead,
+        )
+    except AnalysisUnavailableError as exc:
+        raise analysis_unavailable(exc) from exc
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found for this resident.")
+    return json_response(result, response)
+
+
 @router.get("/trend/{metric}/{resident_id}", response_model=TrendRead)
-def get_metric_trend(metric: Metric, resident_id: int, db: Session = Depends(get_db)) -> TrendRead:
+def get_metric_trend(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    end: date | None = Query(None, description="Trend as of this day (default: newest day)"),
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
     """
     Trend endpoint that accepts a metric name and resident id.
     Unknown metrics return HTTP 400.
     """
+    window = range_window(trend_service.BASELINE, None, end, Resolution.day)
+    version = check_insight_etag(
+        db, response, if_none_match, "trend", resident_id, metric.value, window
+    )
     # metric is validated by FastAPI against Metric enum; pass string value to service
-    insight = trend_service.compute_trend(resident_id, metric.value, db)
+    insight = cached_insight(
+        db,
+        "trend",
+        resident_id,
+        metric.value,
+        window,
+        lambda: trend_service.compute_trend(resident_id, metric.value, db, end=end),
+        version=version,
+        model=TrendRead,
+    )
 
     if not insight:
         raise HTTPException(status_code=404, detail="No data found for this resident.")
-    return insight
+    return json_response(insight, response)
+
+
+@router.get("/trend/{metric}", response_model=List[TrendRead])
+def get_cohort_trend(
+    metric: Metric,
+    resident_ids: List[int] | None = Query(
+        None, description="Residents to include (repeat the parameter); all when omitted"
+    ),
+    db: Session = Depends(get_read_db),
+) -> FastJSONResponse:
+    """Trend for many residents (e.g. a whole ward) in a single call.
+
+    Returns one entry per resident with at least 7 days of data; residents
+    without enough data are omitted rather than failing the whole request.
+    """
+    return json_response(trend_service.compute_cohort_trend(metric.value, db, resident_ids))
 
 
 @router.get("/changepoints/{metric}/{resident_id}", response_model=ChangePointRead)
 def get_metric_changepoints(
     metric: Metric,
     resident_id: int,
-    db: Session = Depends(get_db),
-) -> ChangePointRead:
+    response: Response,
+    start: date | None = Query(None, description="First day of the range (inclusive)"),
+    end: date | None = Query(None, description="Last day of the range (inclusive)"),
+    resolution: Resolution = Query(Resolution.day, description="Bucket size of a date range"),
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
     """Detect change points for a metric for a resident using automatic detection.
 
     - Uses PELT (penalty-based) to select the number of change points.
-    - The endpoint inspects the last 30 rows by default.
+    - The endpoint inspects the last 30 rows by default; with `start` / `end`
+      the whole range, as one mean per `resolution` bucket computed in SQL.
+      422 when the range holds more than 1000 buckets.
+    - PELT runs in a bounded process pool: 503 when the pool is saturated,
+      504 when the analysis misses its deadline.
     """
+    window = range_window(DEFAULT_WINDOW, start, end, resolution)
+    version = check_insight_etag(
+        db, response, if_none_match, "changepoints", resident_id, metric.value, window
+    )
     # Service handles penalty selection internally; router does not expose tuning.
-    result = change_point_service.compute_change_points(resident_id, metric.value, db, limit=30)
+    try:
+        result = cached_insight(
+            db,
+            "changepoints",
+            resident_id,
+            metric.value,
+            window,
+            lambda: change_point_service.compute_change_points(
+                resident_id,
+                metric.value,
+                db,
+                limit=DEFAULT_WINDOW,
+                start=start,
+                end=end,
+                resolution=resolution.value,
+            ),
+            version=version,
+            model=ChangePointRead,
+        )
+    except AnalysisUnavailableError as exc:
+        raise analysis_unavailable(exc) from exc
+    except RangeTooLargeError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
     if not result:
         raise HTTPException(
             status_code=404, detail="No data found or change-point detection failed"
         )
-    return result
+    return json_response(result, response)
+
+
+@router.get("/changepoints/{metric}/{resident_id}/online", response_model=ChangePointRead)
+def get_online_changepoints(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Current change points of a resident's whole history, from the online detector.
+
+    - The detector is updated as days are stored, so this reads its result
+      (constant time) instead of re-running PELT; the change points do not
+      move as a window slides.
+    - Up to the 20 newest change points; none during the first 30 values,
+      which fix the resident's baseline level and noise.
+    """
+    check_insight_etag(
+        db, response, if_none_match, "changepoints_online", resident_id, metric.value, "all"
+    )
+    result = online_change_point_service.current_change_points(db, resident_id, metric.value)
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found for this resident.")
+    return json_response(result, response)
 
 
 @router.get("/anomalies/{metric}/{resident_id}", response_model=AnomalyRead)
 def get_metric_anomalies(
     metric: Metric,
     resident_id: int,
-    db: Session = Depends(get_db),
-) -> AnomalyRead:
+    response: Response,
+    start: date | None = Query(None, description="First day of the range (inclusive)"),
+    end: date | None = Query(None, description="Last day of the range (inclusive)"),
+    resolution: Resolution = Query(Resolution.day, description="Bucket size of a date range"),
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
     """Detect anomalies for the chosen metric and resident.
 
-    - Runs a simple internal z-score based detector on the last 30 rows.
+    - Runs a simple internal z-score based detector on the last 30 rows, or
+      on the `resolution` buckets of the `start` / `end` range.
     - The detector uses a conservative threshold and does not expose tuning
       via the API; it's intended as a lightweight anomaly signal for insights.
     """
-    result = anomaly_service.compute_anomalies(resident_id, metric.value, db, limit=30)
+    window = range_window(DEFAULT_WINDOW, start, end, resolution)
+    version = check_insight_etag(
+        db, response, if_none_match, "anomalies", resident_id, metric.value, window
+    )
+    result = cached_insight(
+        db,
+        "anomalies",
+        resident_id,
+        metric.value,
+        window,
+        lambda: anomaly_service.compute_anomalies(
+            resident_id,
+            metric.value,
+            db,
+            limit=DEFAULT_WINDOW,
+            start=start,
+            end=end,
+            resolution=resolution.value,
+        ),
+        version=version,
+        model=AnomalyRead,
+    )
     if not result:
         raise HTTPException(status_code=404, detail="No data found or anomaly detection failed")
-    return result
+    return json_response(result, response)
+
+
+@router.get("/anomalies/{metric}/{resident_id}/history", response_model=AnomalyScanRead)
+def get_anomaly_history(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    start: date | None = Query(None, description="First day of the range (inclusive)"),
+    end: date | None = Query(None, description="Last day of the range (inclusive)"),
+    method: ScanMethod = Query(ScanMethod.zscore, description="zscore (mean/std) or robust"),
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Every anomalous day of a resident over months or years, in one call.
+
+    - Each day is scored against the rolling window of 30 rows ending on it
+      (the baseline of the latest-day endpoint), all days in one vectorized
+      pass; `robust` uses the median and MAD instead of mean and std.
+    - Whole history when `start` / `end` are omitted.
+    """
+    check_range(start, end)
+    key = f"{start}..{end}/{method.value}"
+    version = check_insight_etag(
+        db, response, if_none_match, "anomaly_scan", resident_id, metric.value, key
+    )
+    result = cached_insight(
+        db,
+        "anomaly_scan",
+        resident_id,
+        metric.value,
+        key,
+        lambda: anomaly_service.scan_history(
+            resident_id, metric.value, db, start, end, method.value
+        ),
+        version=version,
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found for this resident in range.")
+    return json_response(result, response)
+
+
+@router.get("/anomalies/{metric}/{resident_id}/latest", response_model=LatestAnomalyRead)
+def get_latest_anomaly(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Score only the newest day of a resident against its recent window.
+
+    - Served from incrementally maintained window statistics (constant time),
+      so it does not read or re-analyse the whole window.
+    - Uses the same threshold as the anomalies endpoint.
+    """
+    check_insight_etag(
+        db, response, if_none_match, "latest", resident_id, metric.value, DEFAULT_WINDOW
+    )
+    result = anomaly_service.score_latest_day(resident_id, metric.value, db)
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found for this resident.")
+    return json_response(result, response)
+
+
+@router.get("/history/{metric}/{resident_id}", response_model=HistoryRead)
+def get_metric_history(
+    metric: Metric,
+    resident_id: int,
+    response: Response,
+    start: date | None = Query(None, description="First day of the range (inclusive)"),
+    end: date | None = Query(None, description="Last day of the range (inclusive)"),
+    resolution: Resolution = Query(Resolution.day, description="day, week or month buckets"),
+    max_points: int | None = Query(
+        None,
+        ge=MIN_HISTORY_POINTS,
+        le=MAX_HISTORY_POINTS,
+        description="Reduce to at most this many points, keeping the shape of the curve",
+    ),
+    db: Session = Depends(get_read_db),
+    if_none_match: str | None = Header(None),
+) -> FastJSONResponse:
+    """Metric values of a resident over a date range, for charts.
+
+    - Whole history when `start` / `end` are omitted.
+    - Week and month buckets (mean, min, max, days with a value) are
+      aggregated in SQL; `max_points` then applies a shape-preserving
+      reduction (LTTB), so the payload stays bounded for any range.
+    """
+    check_range(start, end)
+    key = f"{start}..{end}/{resolution.value}/{max_points}"
+    version = check_insight_etag(
+        db, response, if_none_match, "history", resident_id, metric.value, key
+    )
+    result = cached_insight(
+        db,
+        "history",
+        resident_id,
+        metric.value,
+        key,
+        lambda: history_service.compute_history(
+            resident_id, metric.value, db, start, end, resolution.value, max_points
+        ),
+        version=version,
+    )
+    if not result:
+        raise HTTPException(status_code=404, detail="No data found for this resident in range.")
+    return json_response(result, response)
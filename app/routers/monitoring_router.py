@@ -0,0 +1,86 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.services import instrumentation
+from app.services.analysis_pool import analysis_pool
+from app.services.insight_cache import insight_cache
+
+router = APIRouter(prefix="/api/monitoring", tags=["Monitoring"])
+
+# Prometheus scrapes /metrics at the root by convention
+metrics_router = APIRouter(tags=["Monitoring"])
+
+
+@router.get("/analysis-pool")
+def get_analysis_pool_stats() -> Dict[str, Any]:
+    """Utilisation of the change-point analysis process pool."""
+    return analysis_pool.stats()
+
+
+@router.get("/insight-cache")
+def get_insight_cache_stats() -> Dict[str, Any]:
+    """Size and hit/miss counters of the insight cache."""
+    return insight_cache.stats()
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """Request latency, per-stage service timings, cache and pool counters (Prometheus format)."""
+    return PlainTextResponse(
+        instrumentation.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def _cache_metrics():
+    stats = insight_cache.stats()
+    return {
+        "momo_insight_cache_entries": (
+            "gauge",
+            "Entries in the insight cache.",
+            {(): stats["size"]},
+        ),
+        "momo_insight_cache_hits_total": ("counter", "Insight cache hits.", {(): stats["hits"]}),
+        "momo_insight_cache_misses_total": (
+            "counter",
+            "Insight cache misses.",
+            {(): stats["misses"]},
+        ),
+        "momo_insight_cache_evictions_total": (
+            "counter",
+            "Insight cache evictions.",
+            {(): stats["evictions"]},
+        ),
+    }
+
+
+def _pool_metrics():
+    stats = analysis_pool.stats()
+    outcomes = ("submitted", "completed", "failed", "cancelled", "rejected", "timeouts")
+    return {
+        "momo_analysis_pool_in_flight": (
+            "gauge",
+            "Running plus queued change-point analyses.",
+            {(): stats["in_flight"]},
+        ),
+        "momo_analysis_pool_queue_size": (
+            "gauge",
+            "Maximum running plus queued analyses.",
+            {(): stats["queue_size"]},
+        ),
+        "momo_analysis_pool_tasks_total": (
+            "counter",
+            "Change-point analyses by outcome.",
+            {(("outcome", o),): stats[o] for o in outcomes},
+        ),
+        "momo_analysis_pool_restarts_total": (
+            "counter",
+            "Worker pools replaced after a worker died.",
+            {(): stats["restarts"]},
+        ),
+    }
+
+
+instrumentation.register_collector("insight_cache", _cache_metrics)
+instrumentation.register_collector("analysis_pool", _pool_metrics)
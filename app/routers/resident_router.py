@@ -1,9 +1,10 @@
-from typing import List
+from typing import Any, Dict, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from app.dependencies import get_db
+from app.dependencies import get_read_db
+from app.responses import FastJSONResponse
 from app.schemas.resident import ResidentRead
 from app.services import residents_service
 
@@ -16,9 +17,23 @@ MAX_LIMIT = 500
 MIN_LIMIT = 1
 
 
+# Response header carrying the `after_id` of the next page
+NEXT_PAGE_HEADER = "X-Next-After-Id"
+
+
+def page_response(rows: List[Dict[str, Any]], limit: int) -> FastJSONResponse:
+    """JSON list of resident rows, plus the next-page cursor when the page is full.
+
+    The rows already have the `ResidentRead` shape, so they are serialized
+    directly (see `app.responses`) instead of being validated into models first.
+    """
+    headers = {NEXT_PAGE_HEADER: str(rows[-1]["id"])} if len(rows) == limit else None
+    return FastJSONResponse(content=rows, headers=headers)
+
+
 @router.get("/", response_model=List[ResidentRead])
 def get_residents(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     offset: int = Query(DEFAULT_OFFSET, ge=0, description="Number of rows to skip"),
     limit: int = Query(
         DEFAULT_LIMIT,
@@ -26,19 +41,25 @@ def get_residents(
         le=MAX_LIMIT,
         description=f"Max rows to return (capped at {MAX_LIMIT})",
     ),
-) -> List[ResidentRead]:
-    """List residents with simple pagination.
+    after_id: int | None = Query(
+        None, description=f"Return residents after this id (value of the {NEXT_PAGE_HEADER} header)"
+    ),
+) -> FastJSONResponse:
+    """List residents, ordered by id.
 
     Query parameters:
-    - offset: skip this many rows, used for pagination
+    - after_id: keyset pagination; pass the `X-Next-After-Id` header of the
+      previous page. Cost does not grow with the page depth.
+    - offset: skip this many rows (ignored with after_id); deep offsets get slower
     - limit: max number of rows to return
 
     """
-    return residents_service.get_residents(db, offset=offset, limit=limit)
+    rows = residents_service.get_residents(db, offset=offset, limit=limit, after_id=after_id)
+    return page_response(rows, limit)
 
 
 @router.get("/{resident_id}", response_model=ResidentRead)
-def get_resident(resident_id: int, db: Session = Depends(get_db)) -> ResidentRead:
+def get_resident(resident_id: int, db: Session = Depends(get_read_db)) -> ResidentRead:
     """Fetch a single resident by id. Returns 404 if not found."""
     resident = residents_service.get_resident(db, resident_id)
     if resident is None:
@@ -24,3 +24,57 @@ class AnomalyRead(BaseModel):
     anomaly_dates: List[date]
     anomaly_values: List[str]
     description: str
+
+
+class LatestAnomalyRead(BaseModel):
+    """Response model for scoring a resident's newest day.
+
+    Fields:
+    - resident_id / metric: as in `AnomalyRead`
+    - date: the newest day with data
+    - value: formatted value on that day (e.g. '2h 30min'), 'N/A' when missing
+    - z_score: z-score against the last `window_days` rows (None without variance)
+    - is_anomaly: True when |z_score| reaches the detector threshold
+    - window_days: number of rows the baseline is computed over
+    - description: short human-friendly summary
+    """
+
+    resident_id: int
+    metric: str
+    date: date
+    value: str
+    z_score: float | None
+    is_anomaly: bool
+    window_days: int
+    description: str
+
+
+class AnomalyScanRead(BaseModel):
+    """Response model for scanning a resident's history for anomalous days.
+
+    Every day is scored against a rolling baseline of the `window_days` rows
+    ending on it (the same baseline the latest-day endpoint uses).
+
+    Fields:
+    - resident_id / metric: as in `AnomalyRead`
+    - method: "zscore" (mean / std) or "robust" (median / scaled MAD)
+    - window_days: rows in each day's baseline
+    - start / end: requested range (None = open-ended)
+    - n_scored: days with a value and a usable baseline
+    - n_anomalies: number of flagged days
+    - anomaly_dates / anomaly_values / anomaly_z_scores: the flagged days, oldest first
+    - description: short human-friendly summary
+    """
+
+    resident_id: int
+    metric: str
+    method: str
+    window_days: int
+    start: date | None
+    end: date | None
+    n_scored: int
+    n_anomalies: int
+    anomaly_dates: List[date]
+    anomaly_values: List[str]
+    anomaly_z_scores: List[float]
+    description: str
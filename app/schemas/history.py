@@ -0,0 +1,37 @@
+from datetime import date
+from typing import List
+
+from pydantic import BaseModel
+
+
+class HistoryPoint(BaseModel):
+    """One point of a metric history: a day, or the aggregate of a week / month.
+
+    Values are raw seconds (for charting); `date` is the first day of the bucket.
+    """
+
+    date: date
+    value_seconds: float
+    min_seconds: float
+    max_seconds: float
+    n_days: int
+
+
+class HistoryRead(BaseModel):
+    """Metric history of one resident over a date range.
+
+    Fields:
+    - resolution: day, week or month (aggregated in the database)
+    - n_buckets: buckets with a value in the range, before any `max_points` reduction
+    - points: oldest first; at most `max_points` when a reduction was requested
+    - downsampled: True when the points were reduced (largest-triangle-three-buckets)
+    """
+
+    resident_id: int
+    metric: str
+    resolution: str
+    start: date | None
+    end: date | None
+    n_buckets: int
+    downsampled: bool
+    points: List[HistoryPoint]
@@ -0,0 +1,17 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class RejectedRecord(BaseModel):
+    # 1-based line of the request body (the CSV header is line 1)
+    line: int
+    reason: str
+
+
+class IngestResult(BaseModel):
+    inserted: int
+    updated: int
+    rejected: int
+    # first rejected records with the reason; `rejected` has the full count
+    errors: List[RejectedRecord]
@@ -0,0 +1,27 @@
+from typing import Dict
+
+from pydantic import BaseModel
+
+from app.schemas.anomaly_get import AnomalyRead
+from app.schemas.change_point import ChangePointRead
+from app.schemas.trend import TrendRead
+
+
+class MetricInsights(BaseModel):
+    """Trend, change points and anomalies for one metric.
+
+    Each field is None when there is not enough data for that analysis
+    (the per-metric endpoints answer 404 in the same situation).
+    """
+
+    trend: TrendRead | None = None
+    change_points: ChangePointRead | None = None
+    anomalies: AnomalyRead | None = None
+
+
+class InsightSummaryRead(BaseModel):
+    """All insights for one resident, keyed by metric name."""
+
+    resident_id: int
+    window_days: int
+    metrics: Dict[str, MetricInsights]
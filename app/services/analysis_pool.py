@@ -0,0 +1,215 @@
+"""Bounded process pool for CPU-bound analysis (PELT change-point detection).
+
+PELT holds the GIL for the whole computation, so running it on request threads
+stalls every other endpoint. Analyses submitted through `analysis_pool.run`
+execute in separate worker processes instead:
+
+- The pool is created and pre-warmed (workers started, analysis libraries
+  imported) by the app's lifespan hook, so the first request does not pay for it.
+- At most `queue_size` analyses may be running or waiting at once. Further
+  calls fail immediately with `PoolSaturatedError` instead of piling up.
+- Every call has a deadline. When it passes the caller gets
+  `AnalysisTimeoutError`; a queued task is cancelled, a task that already
+  started keeps its slot until it finishes (a worker cannot be interrupted).
+- A worker that dies (killed for memory, a crash) breaks its pool: the calls
+  it fails raise `AnalysisUnavailableError`, and the pool is replaced by a
+  fresh one for later calls.
+- `stats()` exposes utilisation counters for monitoring.
+
+Configuration (environment):
+- ANALYSIS_POOL_WORKERS: worker processes (default 2; 0 runs analyses inline)
+- ANALYSIS_POOL_QUEUE: max running + waiting analyses (default 4 x workers;
+  inline, one per request thread)
+- ANALYSIS_TIMEOUT: per-call deadline in seconds (default 5)
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+# Inline analyses run on the request threads: anyio's default thread limit,
+# which FastAPI's sync endpoints share
+INLINE_QUEUE_SIZE = 40
+
+
+class AnalysisUnavailableError(RuntimeError):
+    """The analysis could not be run right now (the caller may retry)."""
+
+
+class PoolSaturatedError(AnalysisUnavailableError):
+    """All worker slots and queue places are taken."""
+
+
+class AnalysisTimeoutError(AnalysisUnavailableError):
+    """The analysis did not finish before its deadline."""
+
+
+def _init_worker() -> None:
+    # import the analysis code once per worker, not per task
+    import app.services.change_point_service  # noqa: F401
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+class AnalysisPool:
+    """Process pool with bounded queue depth, per-call deadlines and counters."""
+
+    def __init__(self, workers: int = 2, queue_size: int | None = None, timeout: float = 5.0):
+        self.workers = max(0, workers)
+        if queue_size is None:
+            queue_size = 4 * self.workers if self.workers else INLINE_QUEUE_SIZE
+        self.queue_size = max(1, queue_size)
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "restarts": 0,
+        }
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        """Create the worker processes and wait until each one is warm."""
+        if self.workers == 0 or self._executor is not None:
+            return
+        self._executor = self._new_executor()
+        warm = [self._executor.submit(_ping) for _ in range(self.workers)]
+        for f in warm:
+            f.result()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: workers never inherit the server's threads or open connections
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def _replace_broken(self, broken: ProcessPoolExecutor) -> None:
+        """Swap a pool whose worker died for a fresh one (once per broken pool)."""
+        with self._lock:
+            if self._executor is not broken:
+                return
+            self._executor = self._new_executor()
+            self._counters["restarts"] += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # -- execution ---------------------------------------------------------
+
+    def run(self, fn: Callable[..., T], *args: Any, timeout: float | None = None) -> T:
+        """Run `fn(*args)` in a worker and wait for the result.
+
+        `fn` and its arguments must be picklable (module-level function, plain
+        data / NumPy arrays). Raises `PoolSaturatedError` or `AnalysisTimeoutError`,
+        or `AnalysisUnavailableError` when a worker died.
+        """
+        if not self._slots.acquire(blocking=False):
+            self._count("rejected")
+            raise PoolSaturatedError("analysis pool is saturated")
+
+        with self._lock:
+            self._in_flight += 1
+            self._counters["submitted"] += 1
+
+        executor = self._executor
+        if executor is None:
+            # inline mode (no workers configured, or pool not started)
+            try:
+                result = fn(*args)
+            except Exception:
+                self._finish("failed")
+                raise
+            self._finish("completed")
+            return result
+
+        try:
+            try:
+                future: Future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # a worker died since the last call: retry once on a fresh pool
+                self._replace_broken(executor)
+                executor = self._executor
+                if executor is None:
+                    raise
+                future = executor.submit(fn, *args)
+        except BrokenProcessPool as exc:
+            self._finish("failed")
+            raise AnalysisUnavailableError("analysis workers are unavailable") from exc
+        except BaseException:
+            self._finish("failed")
+            raise
+        # the slot is released when the task really ends, not when the caller gives up
+        future.add_done_callback(self._on_done)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            self._count("timeouts")
+            raise AnalysisTimeoutError("analysis did not finish in time") from None
+        except BrokenProcessPool as exc:
+            # a worker died while running it: later calls get a fresh pool
+            self._replace_broken(executor)
+            raise AnalysisUnavailableError("analysis worker died") from exc
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            self._finish("cancelled")
+        elif future.exception() is not None:
+            self._finish("failed")
+        else:
+            self._finish("completed")
+
+    def _finish(self, outcome: str) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._counters[outcome] += 1
+        self._slots.release()
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    # -- monitoring --------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Utilisation counters (in_flight counts running and queued analyses)."""
+        with self._lock:
+            in_flight = self._in_flight
+            counters = dict(self._counters)
+        return {
+            "workers": self.workers,
+            "running": self._executor is not None,
+            "queue_size": self.queue_size,
+            "in_flight": in_flight,
+            "utilisation": in_flight / self.queue_size if self.queue_size else 0.0,
+            "timeout_seconds": self.timeout,
+            **counters,
+        }
+
+
+analysis_pool = AnalysisPool(
+    workers=int(os.getenv("ANALYSIS_POOL_WORKERS", "2")),
+    queue_size=int(os.environ["ANALYSIS_POOL_QUEUE"]) if os.getenv("ANALYSIS_POOL_QUEUE") else None,
+    timeout=float(os.getenv("ANALYSIS_TIMEOUT", "5")),
+)
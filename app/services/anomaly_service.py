@@ -10,90 +10,97 @@ deterministic:
 
 The endpoint and service intentionally do not expose internal tuning (threshold)
 to the API; values are chosen to be conservative for short windows (30 rows).
+
+`scan_history` flags anomalous days across a whole history instead: every day
+is scored against the rolling baseline of the `running_stats_service.WINDOW`
+rows ending on it (the baseline of the latest-day score), for all days in one
+vectorized pass over a strided window view: mean / std, or the robust median /
+MAD. The cost is linear in the length of the history.
 """
 
-from typing import Any, List, Tuple
+import logging
+import warnings
+from datetime import date, timedelta
+from typing import Tuple
 
-import pandas as pd
+import numpy as np
 
-from app.repository.insights_repository import get_last_n_metric_rows
-from app.schemas.anomaly_get import AnomalyRead
+from app.repository.insights_repository import get_last_n_metric_series, get_metric_range_series
+from app.repository.metric_series import MetricSeries
+from app.schemas.anomaly_get import AnomalyRead, AnomalyScanRead, LatestAnomalyRead
+from app.services import running_stats_service
+from app.services.formatting import format_seconds_h_min
+from app.services.instrumentation import stage
 
+logger = logging.getLogger(__name__)
 
-def records_to_df(rows: List[Tuple[Any, Any]]) -> pd.DataFrame:
-    """Convert DB rows into a DataFrame.
+# service label of the stage timings
+SERVICE = "anomalies"
 
-    The repository returns a list of tuples (date, value) ordered oldest->newest.
-    This helper ensures we always have a DataFrame with columns ["date","value"].
-    """
-    # If no rows, return an empty DataFrame with the expected columns.
-    # returning an empty DataFrame lets downstream code call ffill/bfill safely
-    return (
-        pd.DataFrame(rows, columns=["date", "value"])
-        if rows
-        else pd.DataFrame(columns=["date", "value"])
-    )
+# Conservative threshold for short windows. Kept internal deliberately.
+Z_THRESHOLD: float = 1.0
 
+# Baselines of `scan_history`
+SCAN_METHODS = ("zscore", "robust")
+# MAD of normally distributed data times this estimates its standard deviation,
+# so robust scores are on the same scale as (and share the threshold with) z-scores
+MAD_SCALE: float = 1.4826
 
-def format_seconds_h_min(val_sec: float) -> str:
-    """Format seconds into a concise 'Xh Ymin' string.
 
-    - Returns 'N/A' for NaN inputs.
-    - Always formats from the absolute value (we don't show a negative unit part).
-    - Examples: 9000 -> '2h 30min', 3600 -> '1h', 120 -> '2min'
-    """
-    if pd.isna(val_sec):
-        return "N/A"
-    sec = float(val_sec)
-    # Use absolute value so unit parts (hours/minutes) are never negative
-    sec_abs = abs(sec)
-    hours = int(sec_abs // 3600)
-    minutes = int((sec_abs % 3600) // 60)
-    if hours and minutes:
-        return f"{hours}h {minutes}min"
-    if hours:
-        return f"{hours}h"
-    return f"{minutes}min"
-
-
-def compute_anomalies(resident_id: int, metric: str, db, limit: int = 30) -> AnomalyRead | None:
+def compute_anomalies(
+    resident_id: int,
+    metric: str,
+    db,
+    limit: int = 30,
+    start: date | None = None,
+    end: date | None = None,
+    resolution: str = "day",
+) -> AnomalyRead | None:
     """Compute anomalies for a resident/metric over the last `limit` rows.
 
+    With `start` and/or `end`, over the inclusive date range instead, one mean
+    per `resolution` bucket (aggregated in the database).
     Returns a plain dict suitable for FastAPI to serialize to `AnomalyRead`.
     If there is no data, returns an empty result (n_anomalies == 0).
     """
-    rows = get_last_n_metric_rows(resident_id, metric, limit, db)
+    with stage(SERVICE, "fetch"):
+        if start is not None or end is not None:
+            series = get_metric_range_series(resident_id, metric, db, start, end, resolution)
+        else:
+            series = get_last_n_metric_series(resident_id, metric, limit, db)
+    return anomalies_from_series(resident_id, metric, series)
+
+
+def anomalies_from_series(
+    resident_id: int, metric: str, series: MetricSeries
+) -> AnomalyRead | None:
+    """Detect anomalies in an already fetched series (oldest->newest).
+
+    Pure computation (no database access), shared by the sync and async routes.
+    """
     # If repository returned no rows, nothing to analyze -> bail out
-    if not rows:
+    if not len(series):
         return None
 
-    # Build a DataFrame for cleaner handling (dates, values)
-    # DataFrame columns: ['date', 'value'] with oldest->newest ordering
-    df = records_to_df(rows)
-
-    # Fill small gaps using pandas (forward then back fill)
+    # Fill small gaps (forward then back fill)
     # - forward fill propagates last known value forward
     # - back fill fills leading NAs with the first available value
     # This keeps interior small gaps from breaking the window analysis.
-    df["value"] = df["value"].ffill().bfill()
+    with stage(SERVICE, "prepare"):
+        series = series.filled()
 
-    # If after filling there are still no numeric values, bail out
-    if df["value"].isna().all():
-        return None
+        # If after filling there are still no numeric values, bail out
+        if series.all_missing():
+            return None
 
-    # Convert to numeric (floats) - coercing non-numeric entries to NaN
-    # (e.g., if DB had stray text); after this we can safely compute mean/std.
-    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-    if df["value"].isna().all():
-        return None
-
-    # Population statistics (ddof=0 for population std to match pstdev)
-    # mean (mu) and sigma (population standard deviation) are used to compute z-scores.
-    mu = df["value"].mean()
-    sigma = df["value"].std(ddof=0)
+        # Population statistics (ddof=0 for population std to match pstdev)
+        # mean (mu) and sigma (population standard deviation) are used to compute z-scores.
+        values = series.values
+        mu = series.mean()
+        sigma = series.std()
 
     # Return empty result instead of None when data exists but has no variance
-    if sigma == 0 or len(df["value"]) < 2 or pd.isna(sigma):
+    if sigma == 0 or len(values) < 2 or np.isnan(sigma):
         return AnomalyRead(
             resident_id=resident_id,
             metric=metric,
@@ -104,21 +111,35 @@ def compute_anomalies(resident_id: int, metric: str, db, limit: int = 30) -> Ano
             description="no anomalies detected (insufficient variance)",
         )
 
-    # Conservative threshold for short windows. Kept internal deliberately.
-    threshold = 1.0
-
-    # Vectorized z-score computation using pandas Series arithmetic
+    # Vectorized z-score computation
     # - z = (value - mu) / sigma
     # - mask marks rows where |z| >= threshold
-    z_scores = (df["value"] - mu) / sigma
-    mask = z_scores.abs() >= threshold
+    with stage(SERVICE, "analysis"):
+        z_scores = (values - mu) / sigma
+        mask = np.abs(z_scores) >= Z_THRESHOLD
+    logger.debug(
+        "anomalies resident=%s metric=%s n=%d mu=%.1f sigma=%.1f",
+        resident_id,
+        metric,
+        len(values),
+        mu,
+        sigma,
+    )
 
+    with stage(SERVICE, "serialize"):
+        return _anomaly_read(resident_id, metric, series, mask)
+
+
+def _anomaly_read(
+    resident_id: int, metric: str, series: MetricSeries, mask: np.ndarray
+) -> AnomalyRead:
+    """Build the response for the rows flagged in `mask`."""
     # Convert results to plain Python types for the response model
-    anomalies_idx = [int(i) for i in df.index[mask]]
-    # Format anomaly values (seconds) into human-readable strings using the
-    # repository-local helper so API returns consistent, user-friendly units.
-    anomalies_vals = [format_seconds_h_min(v) for v in df.loc[mask, "value"].tolist()]
-    anomalies_dates = df.loc[mask, "date"].tolist()
+    anomalies_idx = np.flatnonzero(mask).tolist()
+    # Format anomaly values (seconds) into human-readable strings so the API
+    # returns consistent, user-friendly units.
+    anomalies_vals = [format_seconds_h_min(v) for v in series.values[mask].tolist()]
+    anomalies_dates = series.dates[mask].tolist()
 
     n_anom = len(anomalies_idx)
     desc = f"{n_anom} anomalies detected" if n_anom else "no anomalies"
@@ -132,3 +153,151 @@ def compute_anomalies(resident_id: int, metric: str, db, limit: int = 30) -> Ano
         anomaly_values=anomalies_vals,
         description=desc,
     )
+
+
+def score_latest_day(resident_id: int, metric: str, db) -> LatestAnomalyRead | None:
+    """Score the newest day for a resident/metric from the running window stats.
+
+    Returns None when the resident has no data.
+    """
+    latest = running_stats_service.score_latest(db, resident_id, metric)
+    if latest is None:
+        return None
+
+    z = latest.z_score
+    is_anomaly = z is not None and abs(z) >= Z_THRESHOLD
+    if z is None:
+        desc = "no score (insufficient data or variance)"
+    else:
+        desc = "newest day is an anomaly" if is_anomaly else "newest day is within normal range"
+
+    return LatestAnomalyRead(
+        resident_id=resident_id,
+        metric=metric,
+        date=latest.date,
+        value=format_seconds_h_min(latest.value if latest.value is not None else float("nan")),
+        z_score=z,
+        is_anomaly=is_anomaly,
+        window_days=running_stats_service.WINDOW,
+        description=desc,
+    )
+
+
+def _trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """(n, window) view of the `window` values ending on each position (NaN-padded)."""
+    padded = np.concatenate((np.full(window - 1, np.nan), values))
+    return np.lib.stride_tricks.sliding_window_view(padded, window)
+
+
+def rolling_zscores(values: np.ndarray, window: int) -> np.ndarray:
+    """z-score of every value against the `window` values ending on it (mean / std).
+
+    NaN values are skipped in the baselines and get no score; a day whose
+    baseline has fewer than 2 values or no variance gets NaN. Population std,
+    as in `running_stats_service`. Mean and deviations are taken per window
+    (two passes over a strided view) rather than from differenced running
+    sums, which lose the variance of a decade-long series to rounding.
+    """
+    windows = _trailing_windows(values, window)
+    present = ~np.isnan(windows)
+    n = present.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(present, windows, 0.0).sum(axis=1) / n
+        deviation = np.where(present, windows - mean[:, None], 0.0)
+        std = np.sqrt((deviation * deviation).sum(axis=1) / n)
+        z = (values - mean) / std
+    return np.where(~np.isnan(values) & (n >= 2) & (std > 0), z, np.nan)
+
+
+def rolling_robust_zscores(values: np.ndarray, window: int) -> np.ndarray:
+    """Robust counterpart of `rolling_zscores`: (value - median) / (MAD_SCALE * MAD).
+
+    Median and median absolute deviation of the `window` values ending on
+    each day, from the same strided view.
+    """
+    windows = _trailing_windows(values, window)
+    n = window - np.isnan(windows).sum(axis=1)
+    with warnings.catch_warnings():
+        # leading days and long gaps have all-NaN windows
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(windows, axis=1)
+        mad = np.nanmedian(np.abs(windows - median[:, None]), axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (values - median) / (MAD_SCALE * mad)
+    return np.where(~np.isnan(values) & (n >= 2) & (mad > 0), z, np.nan)
+
+
+def scan_series(series: MetricSeries, window: int, method: str = "zscore") -> np.ndarray:
+    """Rolling z-scores of a series (oldest first) with the chosen baseline."""
+    if method not in SCAN_METHODS:
+        raise ValueError(f"Unknown scan method: {method}")
+    if not len(series):
+        return np.empty(0)
+    if method == "robust":
+        return rolling_robust_zscores(series.values, window)
+    return rolling_zscores(series.values, window)
+
+
+def _series_with_context(
+    resident_id: int, metric: str, db, start: date | None, end: date | None, n_context: int
+) -> Tuple[MetricSeries, int]:
+    """Daily series of the range preceded by up to `n_context` rows before `start`.
+
+    Returns (series, index of the first day in the range).
+    """
+    body = get_metric_range_series(resident_id, metric, db, start, end, "day")
+    if start is None or not n_context:
+        return body, 0
+    context = get_last_n_metric_series(
+        resident_id, metric, n_context, db, end=start - timedelta(days=1)
+    )
+    series = MetricSeries(
+        np.concatenate((context.dates, body.dates)), np.concatenate((context.values, body.values))
+    )
+    return series, len(context)
+
+
+def scan_history(
+    resident_id: int,
+    metric: str,
+    db,
+    start: date | None = None,
+    end: date | None = None,
+    method: str = "zscore",
+) -> AnomalyScanRead | None:
+    """Flag every anomalous day of a resident between `start` and `end` (inclusive).
+
+    The days just before `start` are read as well, so the first days of the
+    range are scored against a full baseline. Returns None when the range
+    holds no rows.
+    """
+    window = running_stats_service.WINDOW
+    with stage("anomaly_scan", "fetch"):
+        series, first = _series_with_context(resident_id, metric, db, start, end, window - 1)
+    if first == len(series):
+        return None
+
+    with stage("anomaly_scan", "analysis"):
+        z = scan_series(series, window, method)[first:]
+        values = series.values[first:]
+        dates = series.dates[first:]
+        scored = ~np.isnan(z)
+        mask = scored & (np.abs(np.where(scored, z, 0.0)) >= Z_THRESHOLD)
+
+    with stage("anomaly_scan", "serialize"):
+        n_anom = int(mask.sum())
+        n_scored = int(scored.sum())
+        return AnomalyScanRead(
+            resident_id=resident_id,
+            metric=metric,
+            method=method,
+            window_days=window,
+            start=start,
+            end=end,
+            n_scored=n_scored,
+            n_anomalies=n_anom,
+            anomaly_dates=dates[mask].tolist(),
+            anomaly_values=[format_seconds_h_min(v) for v in values[mask].tolist()],
+            anomaly_z_scores=np.round(z[mask], 3).tolist(),
+            description=f"{n_anom} anomalous days out of {n_scored} scored ({method} baseline)",
+        )
@@ -0,0 +1,325 @@
+"""Parsing and validation of bulk daily uploads (NDJSON or CSV).
+
+`POST /api/ingest/daily` reads the request body as a stream and hands it over
+in batches of raw lines (`BATCH_LINES`), so memory stays bounded however large
+the upload is. Each batch is:
+
+1. parsed into records: one JSON object per line, or CSV rows keyed by the
+   header line;
+2. validated column-wise: every field is converted with one NumPy call per
+   column (falling back to per-value conversion only for a column that
+   contains bad values) and checked with vectorized masks: known resident,
+   valid non-future date, seconds within a day, non-negative counts;
+3. stored in one transaction through `ingest_service.store_daily_upload`.
+
+A metric missing from a record (key absent in NDJSON, column absent in the
+CSV header) is left untouched on existing days; an empty value or `null`
+stores NULL. Batches are committed independently, like the chunks of the CSV
+import command, so a failure part-way keeps the batches before it.
+"""
+
+import csv
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.repository import resident_repository
+from app.services import ingest_service
+from app.services.instrumentation import stage
+
+# service label of the stage timings
+SERVICE = "ingest"
+
+KEY_FIELDS = ("resident_id", "date")
+SECONDS_FIELDS = ("time_in_bed", "at_rest", "low_activity", "high_activity")
+COUNT_FIELDS = ("times_out_bed_night", "times_out_bed_day")
+METRIC_FIELDS = SECONDS_FIELDS + COUNT_FIELDS
+
+BATCH_LINES = 10_000
+# longest accepted line; a body without newlines (e.g. a JSON array) is
+# rejected instead of buffered whole
+MAX_LINE_BYTES = 64 * 1024
+MAX_SECONDS = 24 * 3600
+# rejected records listed in the response; the count covers all of them
+MAX_ERRORS = 100
+
+# the only accepted form of `date`
+_ISO_DATE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+# marker for a field that is absent from the record (as opposed to null)
+_ABSENT = object()
+
+
+class LineTooLongError(ValueError):
+    """A line of the upload is longer than `MAX_LINE_BYTES`."""
+
+    def __init__(self, line: int):
+        super().__init__(
+            f"Line {line} is longer than {MAX_LINE_BYTES} bytes; send one record per line."
+        )
+        self.line = line
+
+
+@dataclass
+class IngestCounts:
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    def reject(self, line: int, reason: str) -> None:
+        self.rejected += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, reason))
+
+
+# -- parsing ---------------------------------------------------------------
+
+
+def parse_ndjson(
+    lines: Sequence[bytes], first_line: int, counts: IngestCounts
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Decode one JSON object per line. Returns the records and their line numbers."""
+    records, line_numbers = [], []
+    for n, line in enumerate(lines, start=first_line):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            counts.reject(n, "invalid JSON")
+            continue
+        if not isinstance(record, dict):
+            counts.reject(n, "expected a JSON object")
+            continue
+        records.append(record)
+        line_numbers.append(n)
+    return records, line_numbers
+
+
+def parse_csv_header(line: bytes) -> List[str]:
+    """Column names of a CSV upload; must include resident_id and date."""
+    header = [c.strip() for c in next(csv.reader([line.decode("utf-8-sig")]))]
+    missing = [f for f in KEY_FIELDS if f not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing column(s): {', '.join(missing)}")
+    return header
+
+
+def parse_csv(
+    lines: Sequence[bytes], header: List[str], first_line: int, counts: IngestCounts
+) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Decode CSV lines into records keyed by the header (empty cells become None)."""
+    known = [(i, name) for i, name in enumerate(header) if name in KEY_FIELDS + METRIC_FIELDS]
+    records, line_numbers = [], []
+    text_lines = (line.decode("utf-8", errors="replace") for line in lines)
+    for n, row in enumerate(csv.reader(text_lines), start=first_line):
+        if not row:
+            continue
+        if len(row) != len(header):
+            counts.reject(n, f"expected {len(header)} columns, got {len(row)}")
+            continue
+        records.append({name: row[i].strip() or None for i, name in known})
+        line_numbers.append(n)
+    return records, line_numbers
+
+
+# -- validation ------------------------------------------------------------
+
+
+def _is_scalar(value: Any) -> bool:
+    """A field value that may hold a number: number, string, null or absent."""
+    if isinstance(value, bool):
+        return False
+    return value is None or value is _ABSENT or isinstance(value, (int, float, str))
+
+
+def _column(records: List[Dict[str, Any]], name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """One field of every record as float64 (None/absent -> NaN).
+
+    Returns (values, present, bad): `present` marks fields given in the record
+    (including null), `bad` marks values that are not numbers.
+    """
+    raw = [r.get(name, _ABSENT) for r in records]
+    present = np.fromiter((v is not _ABSENT for v in raw), dtype=bool, count=len(raw))
+    # JSON true/false would silently become 1.0/0.0, and lists or objects
+    # (even of one length throughout) would not be one value per record
+    bad = np.fromiter((not _is_scalar(v) for v in raw), dtype=bool, count=len(raw))
+    cleaned = [v if _is_scalar(v) and v is not _ABSENT else None for v in raw]
+    try:
+        values = np.array(cleaned, dtype=np.float64)
+    except (TypeError, ValueError):
+        # at least one bad value: convert one by one to find it
+        values = np.full(len(raw), np.nan)
+        for i, v in enumerate(cleaned):
+            try:
+                values[i] = np.nan if v is None else float(v)
+            except (TypeError, ValueError):
+                bad[i] = True
+    return values, present, bad
+
+
+def _date_column(records: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """The `date` field as datetime64[D] (NaT when missing). Returns (dates, bad).
+
+    Only full `YYYY-MM-DD` dates are accepted: NumPy would read "2024-07" as
+    the 1st of the month.
+    """
+    raw = [r.get("date") for r in records]
+    bad = np.fromiter(
+        (v is not None and not (isinstance(v, str) and _ISO_DATE.fullmatch(v)) for v in raw),
+        dtype=bool,
+        count=len(raw),
+    )
+    cleaned = [None if b else v for v, b in zip(raw, bad.tolist(), strict=True)]
+    try:
+        dates = np.array(cleaned, dtype="datetime64[D]")
+    except ValueError:
+        # a well-formed but impossible day (e.g. 2025-02-30): find it
+        dates = np.full(len(raw), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, v in enumerate(cleaned):
+            try:
+                dates[i] = date.fromisoformat(v) if v is not None else np.datetime64("NaT")
+            except ValueError:
+                bad[i] = True
+    return dates, bad
+
+
+def validate(
+    db: Session, records: List[Dict[str, Any]], line_numbers: List[int], counts: IngestCounts
+) -> List[Dict[str, Any]]:
+    """Check a batch of records column-wise; returns the valid ones as row dicts.
+
+    Rejected records are added to `counts` with the first reason that applies.
+    """
+    if not records:
+        return []
+    n = len(records)
+    reason = np.full(n, "", dtype=object)
+
+    def reject(mask: np.ndarray, message: str) -> None:
+        reason[mask & (reason == "")] = message
+
+    resident, resident_present, resident_bad = _column(records, "resident_id")
+    reject(~resident_present | (np.isnan(resident) & ~resident_bad), "missing resident_id")
+    reject(resident_bad | (resident != np.floor(resident)) | (resident < 1), "invalid resident_id")
+
+    dates, date_bad = _date_column(records)
+    reject(date_bad, "invalid date (expected YYYY-MM-DD)")
+    reject(np.isnat(dates), "missing date")
+    tomorrow = np.datetime64(date.today() + timedelta(days=1), "D")
+    with np.errstate(invalid="ignore"):
+        reject(dates >= tomorrow, "date is in the future")
+
+    metrics: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    for name in METRIC_FIELDS:
+        values, present, bad = _column(records, name)
+        with np.errstate(invalid="ignore"):
+            out_of_range = (values < 0) | np.isinf(values)
+            if name in SECONDS_FIELDS:
+                out_of_range |= values > MAX_SECONDS
+            else:
+                out_of_range |= values != np.floor(values)
+        reject(bad, f"{name} is not a number")
+        reject(out_of_range & ~np.isnan(values), f"{name} out of range")
+        metrics[name] = (values, present)
+
+    candidates = reason == ""
+    resident_ids = resident[candidates].astype(np.int64)
+    known = resident_repository.get_existing_ids(db, set(resident_ids.tolist()))
+    unknown = np.zeros(n, dtype=bool)
+    unknown[candidates] = ~np.isin(resident_ids, list(known))
+    reject(unknown, "unknown resident_id")
+
+    valid = reason == ""
+    for i in np.flatnonzero(~valid).tolist():
+        counts.reject(line_numbers[i], reason[i])
+
+    return _to_rows(np.flatnonzero(valid), resident, dates, metrics)
+
+
+def _to_rows(
+    idx: np.ndarray,
+    resident: np.ndarray,
+    dates: np.ndarray,
+    metrics: Dict[str, Tuple[np.ndarray, np.ndarray]],
+) -> List[Dict[str, Any]]:
+    """Row dicts for `store_daily_rows` from the validated columns at positions `idx`."""
+    columns: Dict[str, list] = {}
+    present_cols: Dict[str, list] = {}
+    for name, (values, present) in metrics.items():
+        cast = int if name in COUNT_FIELDS else float
+        columns[name] = [None if math.isnan(v) else cast(v) for v in values[idx].tolist()]
+        present_cols[name] = present[idx].tolist()
+
+    resident_ids = resident[idx].astype(np.int64).tolist()
+    days = dates[idx].astype(object).tolist()
+    rows = []
+    for j, (resident_id, day) in enumerate(zip(resident_ids, days, strict=True)):
+        row = {"resident_id": resident_id, "date": day}
+        for name in METRIC_FIELDS:
+            if present_cols[name][j]:
+                row[name] = columns[name][j]
+        rows.append(row)
+    return rows
+
+
+async def iter_line_batches(
+    chunks: AsyncIterator[bytes], batch_lines: int = BATCH_LINES
+) -> AsyncIterator[Tuple[List[bytes], int]]:
+    """Split a streamed body into batches of lines; yields (lines, first line number).
+
+    Raises `LineTooLongError` for a line longer than `MAX_LINE_BYTES`; the
+    batches before it have been yielded.
+    """
+    # the unfinished last line, extended in place as chunks arrive
+    pending = bytearray()
+    batch: List[bytes] = []
+    first_line = 1
+    async for chunk in chunks:
+        lines = chunk.split(b"\n")
+        pending += lines[0]
+        if len(lines) > 1:
+            lines[0] = bytes(pending)
+            pending = bytearray(lines.pop())
+            for line in lines:
+                if len(line) > MAX_LINE_BYTES:
+                    raise LineTooLongError(first_line + len(batch))
+                batch.append(line.rstrip(b"\r"))
+                if len(batch) >= batch_lines:
+                    yield batch, first_line
+                    first_line += len(batch)
+                    batch = []
+        if len(pending) > MAX_LINE_BYTES:
+            raise LineTooLongError(first_line + len(batch))
+    if pending.strip():
+        batch.append(bytes(pending).rstrip(b"\r"))
+    if batch:
+        yield batch, first_line
+
+
+def ingest_lines(
+    db: Session,
+    lines: Sequence[bytes],
+    first_line: int,
+    counts: IngestCounts,
+    csv_header: List[str] | None = None,
+) -> None:
+    """Parse, validate and store one batch of lines (NDJSON, or CSV with `csv_header`)."""
+    with stage(SERVICE, "parse"):
+        if csv_header is None:
+            records, line_numbers = parse_ndjson(lines, first_line, counts)
+        else:
+            records, line_numbers = parse_csv(lines, csv_header, first_line, counts)
+    with stage(SERVICE, "validate"):
+        rows = validate(db, records, line_numbers, counts)
+    with stage(SERVICE, "store"):
+        inserted, updated = ingest_service.store_daily_upload(db, rows)
+    counts.inserted += inserted
+    counts.updated += updated
@@ -1,116 +1,159 @@
-from typing import Any, List, Tuple
+import logging
+from datetime import date
+from typing import List
 
 import numpy as np
-import pandas as pd
-import ruptures as rpt
 from sqlalchemy.orm import Session
 
 from app.repository import insights_repository
+from app.repository.metric_series import MetricSeries
 from app.schemas.change_point import ChangePointRead
+from app.services.analysis_pool import analysis_pool
+from app.services.formatting import format_seconds_h_min
+from app.services.instrumentation import stage
+from app.services.pelt import Pelt
 
+logger = logging.getLogger(__name__)
 
-def _format_seconds_h_min(val_sec: float) -> str:
-    """Format seconds into a concise 'Xh Ymin' string.
+# service label of the stage timings
+SERVICE = "changepoints"
 
-    Uses absolute value to produce stable unit strings.
-    """
-    if pd.isna(val_sec):
-        return "N/A"
-    sec_abs = abs(float(val_sec))
-    hours = int(sec_abs // 3600)
-    minutes = int((sec_abs % 3600) // 60)
-    if hours and minutes:
-        return f"{hours}h {minutes}min"
-    if hours:
-        return f"{hours}h"
-    return f"{minutes}min"
-
-
-def records_to_df(rows: List[Tuple[Any, Any]]) -> pd.DataFrame:
-    """Convert DB rows into a DataFrame.
-    The repository returns a list of tuples (date, value) ordered oldest->newest.
+# Longest date-range series PELT is run on; longer ranges must be requested at
+# a coarser resolution (PELT's cost grows up to quadratically with the length)
+MAX_RANGE_POINTS = 1000
+
+
+class RangeTooLargeError(ValueError):
+    """A date range holds more points than `MAX_RANGE_POINTS` at the requested resolution."""
+
+
+def detect_breakpoints(sig_std: np.ndarray, pen: float) -> List[int]:
+    """Run PELT (l2) on a standardized signal and return the breakpoints.
+
+    Uses the in-project NumPy engine, which returns the same breakpoints as
+    `ruptures.Pelt(model="l2")`. Module-level so it can be pickled and executed
+    in the analysis pool.
     """
-    # If no rows, return an empty DataFrame with the expected columns.
-    return (
-        pd.DataFrame(rows, columns=["date", "value"])
-        if rows
-        else pd.DataFrame(columns=["date", "value"])
-    )
+    return Pelt(model="l2").fit(sig_std).predict(pen=pen)
 
 
 def compute_change_points(
-    resident_id: int, metric: str, db: Session, limit: int = 30
+    resident_id: int,
+    metric: str,
+    db: Session,
+    limit: int = 30,
+    start: date | None = None,
+    end: date | None = None,
+    resolution: str = "day",
 ) -> ChangePointRead | None:
     """Detect change points on the last `limit` rows for `metric`.
 
+    With `start` and/or `end`, on every row in that inclusive range instead,
+    aggregated to one mean per `resolution` bucket in the database (see
+    `insights_repository.get_metric_buckets`); the returned dates are then the
+    first days of the buckets.
+
     Uses the PELT algorithm with an l2 cost and a penalty parameter to select
     the number of change points automatically. If `pen` is None the function
     computes a simple heuristic based on the signal variance and length.
 
-    Returns None when insufficient data.
+    Returns None when insufficient data. Raises `AnalysisUnavailableError` when
+    the analysis pool is saturated or the analysis misses its deadline, and
+    `RangeTooLargeError` for a range longer than `MAX_RANGE_POINTS` buckets.
     """
-    # fetch rows (date, value) returned oldest->newest
-    rows: List[Tuple[Any, Any]] = insights_repository.get_last_n_metric_rows(
-        resident_id, metric, limit, db
+    # fetch the series, ordered oldest->newest
+    ranged = start is not None or end is not None
+    with stage(SERVICE, "fetch"):
+        if ranged:
+            series = insights_repository.get_metric_range_series(
+                resident_id, metric, db, start, end, resolution
+            )
+        else:
+            series = insights_repository.get_last_n_metric_series(resident_id, metric, limit, db)
+    if ranged and len(series) > MAX_RANGE_POINTS:
+        raise RangeTooLargeError(
+            f"{len(series)} {resolution}s in range, at most {MAX_RANGE_POINTS}: "
+            "use a coarser resolution or a shorter range"
+        )
+    return change_points_from_series(
+        resident_id, metric, series, resolution=resolution if ranged else None
     )
-    if not rows or len(rows) < 2:
-        return None
 
-    df = records_to_df(rows)  # oldest->newest
-    # prepare numeric signal; fill small gaps
-    print(f"data frame: {df}")
-    # use explicit ffill()/bfill() to satisfy pandas stubs and linters
-    signal = df["value"].ffill().bfill().to_numpy()
-    print(f"signal: {signal}")
-    # ensure 2D signal is acceptable to ruptures (univariate -> 1d is fine)
 
-    if signal.size == 0:
+def change_points_from_series(
+    resident_id: int, metric: str, series: MetricSeries, resolution: str | None = None
+) -> ChangePointRead | None:
+    """Detect change points in an already fetched series (oldest->newest).
+
+    Pure computation (no database access), shared by the sync and async routes.
+    `resolution` names the unit of a date-range series in the description.
+    """
+    if len(series) < 2:
         return None
 
-    # Auto-only behavior: standardize the signal (z-score) and use PELT with a
-    # heuristic penalty when none is provided. Standardizing makes the penalty
-    # easier to reason about across different residents/metrics.
-    n = len(signal)
-    sig = signal.astype(float)
-    mean = float(np.mean(sig)) if n > 0 else 0.0
-    std = float(np.std(sig, ddof=0)) if n > 0 else 0.0
-    print(f"mean: {mean}, std: {std}")
-    if std > 0:
-        sig_std = (sig - mean) / std
-    else:
-        # constant signal -> zero-centered; no variance to exploit
-        sig_std = sig - mean
+    with stage(SERVICE, "prepare"):
+        # prepare numeric signal; fill small gaps
+        signal = series.filled().values
+
+        # nothing to segment when the metric was never recorded in the window
+        if np.isnan(signal).all():
+            return None
+
+        # Auto-only behavior: standardize the signal (z-score) and use PELT with a
+        # heuristic penalty when none is provided. Standardizing makes the penalty
+        # easier to reason about across different residents/metrics.
+        mean = float(np.mean(signal))
+        std = float(np.std(signal, ddof=0))
+        if std > 0:
+            sig_std = (signal - mean) / std
+        else:
+            # constant signal -> zero-centered; no variance to exploit
+            sig_std = signal - mean
 
     # pen = 3.0 * float(np.log(n + 1))
-
     pen = 1
-    algo = rpt.Pelt(model="l2").fit(sig_std)
-    print(f"using penalty: {pen}")
-    print(f"signal (std): {sig_std}")
-
-    # sensitivity
-    bkps = algo.predict(pen=pen)
-
-    print(f"breakpoints: {bkps}")
-    # Convert breakpoints to 0-based indices for the last element of each segment (exclude final len)
-    cp_indices = [b - 1 for b in bkps if b - 1 < len(signal) and b - 1 >= 0]
-    # Remove possible duplicate of final index
-    cp_indices = [i for i in cp_indices if i < len(signal) - 1]
 
-    # map to dates and formatted values
-    cp_dates = [str(df.iloc[i]["date"]) for i in cp_indices]
-    cp_values = [_format_seconds_h_min(df.iloc[i]["value"]) for i in cp_indices]
-
-    description = (
-        f"Detected {len(cp_indices)} change points using PELT (l2) over last {len(df)} days."
-    )
-
-    return ChangePointRead(
-        resident_id=resident_id,
-        metric=metric,
-        n_change_points=len(cp_indices),
-        change_point_indices=cp_indices,
-        change_point_dates=cp_dates,
-        change_point_values=cp_values,
-        description=description,
-    )
+    with stage(SERVICE, "analysis"):
+        # PELT is CPU-bound: run it in the bounded worker pool, off the request thread
+        bkps = analysis_pool.run(detect_breakpoints, sig_std, pen)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "change points resident=%s metric=%s n=%d mean=%.1f std=%.1f pen=%s breakpoints=%s",
+            resident_id,
+            metric,
+            len(signal),
+            mean,
+            std,
+            pen,
+            bkps,
+        )
+
+    with stage(SERVICE, "serialize"):
+        # Convert breakpoints to 0-based indices for the last element of each segment (exclude final len)
+        cp_indices = [b - 1 for b in bkps if b - 1 < len(signal) and b - 1 >= 0]
+        # Remove possible duplicate of final index
+        cp_indices = [i for i in cp_indices if i < len(signal) - 1]
+
+        # map to dates and formatted values
+        cp_dates = [str(series.date_at(i)) for i in cp_indices]
+        cp_values = [format_seconds_h_min(series.values[i]) for i in cp_indices]
+
+        if resolution is None:
+            span = f"over last {len(series)} days"
+        else:
+            span = (
+                f"over {len(series)} {resolution}s "
+                f"from {series.date_at(0)} to {series.date_at(len(series) - 1)}"
+            )
+        description = f"Detected {len(cp_indices)} change points using PELT (l2) {span}."
+
+        return ChangePointRead(
+            resident_id=resident_id,
+            metric=metric,
+            n_change_points=len(cp_indices),
+            change_point_indices=cp_indices,
+            change_point_dates=cp_dates,
+            change_point_values=cp_values,
+            description=description,
+        )
@@ -0,0 +1,111 @@
+"""Streaming export of stored daily rows as CSV or a binary columnar format.
+
+The export endpoint hands the batches of `inbed_daily_repository.iter_daily_rows`
+to one of the encoders below and streams what they yield, so one batch of rows
+is in memory at a time however many years or residents are exported.
+
+CSV has a header line and one row per day; NULL is an empty cell.
+
+The columnar format ("momo-columnar", version 1) is a compact little-endian
+layout that NumPy reads without parsing text:
+
+    b"MOMOCOL1"
+    uint32 header length, then a JSON header {"columns": [[name, dtype], ...]}
+    blocks: uint32 row count n, then each column as n values of its dtype
+    a block with n = 0 ends the stream
+
+`date` is int32 days since 1970-01-01; metric values are floats with NaN for
+NULL. `read_columnar` decodes a complete stream into one array per column.
+"""
+
+import csv
+import io
+import json
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+from app.repository.inbed_daily_repository import EXPORT_COLUMNS
+from app.repository.metric_series import date_column
+
+COLUMN_NAMES = [c.key for c in EXPORT_COLUMNS]
+
+COLUMNAR_MAGIC = b"MOMOCOL1"
+# dtype per exported column; counts fit float32 exactly and NaN keeps NULL
+COLUMNAR_DTYPES: Dict[str, str] = {
+    "resident_id": "<i4",
+    "date": "<i4",
+    "time_in_bed": "<f8",
+    "at_rest": "<f8",
+    "low_activity": "<f8",
+    "high_activity": "<f8",
+    "times_out_bed_night": "<f4",
+    "times_out_bed_day": "<f4",
+}
+_UINT32 = struct.Struct("<I")
+
+
+def iter_csv(batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode batches of export rows as CSV, one chunk per batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(COLUMN_NAMES)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # header only when there are no rows
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _columns(rows: Sequence[Any]) -> List[np.ndarray]:
+    """Export rows as one array per column, in `COLUMN_NAMES` order."""
+    days = date_column(rows, 1).astype(np.int64).astype("<i4")
+    arrays = [np.array([r[0] for r in rows], dtype="<i4"), days]
+    for i, name in enumerate(COLUMN_NAMES[2:], start=2):
+        arrays.append(
+            np.array([r[i] for r in rows], dtype=np.float64).astype(COLUMNAR_DTYPES[name])
+        )
+    return arrays
+
+
+def iter_columnar(batches: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode batches of export rows in the columnar format, one block per batch."""
+    header = json.dumps({"columns": [[n, COLUMNAR_DTYPES[n]] for n in COLUMN_NAMES]}).encode()
+    yield COLUMNAR_MAGIC + _UINT32.pack(len(header)) + header
+    for rows in batches:
+        if rows:
+            yield _UINT32.pack(len(rows)) + b"".join(a.tobytes() for a in _columns(rows))
+    yield _UINT32.pack(0)
+
+
+def read_columnar(data: bytes) -> Dict[str, np.ndarray]:
+    """Decode a complete columnar export into one array per column (dates as datetime64[D])."""
+    if not data.startswith(COLUMNAR_MAGIC):
+        raise ValueError("Not a momo-columnar stream")
+    pos = len(COLUMNAR_MAGIC)
+    (header_len,) = _UINT32.unpack_from(data, pos)
+    pos += _UINT32.size
+    columns: List[Tuple[str, np.dtype]] = [
+        (name, np.dtype(dtype))
+        for name, dtype in json.loads(data[pos : pos + header_len])["columns"]
+    ]
+    pos += header_len
+    parts: Dict[str, List[np.ndarray]] = {name: [] for name, _ in columns}
+    while True:
+        (n,) = _UINT32.unpack_from(data, pos)
+        pos += _UINT32.size
+        if n == 0:
+            break
+        for name, dtype in columns:
+            parts[name].append(np.frombuffer(data, dtype=dtype, count=n, offset=pos))
+            pos += n * dtype.itemsize
+    out = {
+        name: np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype)
+        for name, dtype in columns
+    }
+    out["date"] = out["date"].astype("datetime64[D]")
+    return out
@@ -0,0 +1,29 @@
+"""Human-readable formatting shared by the insight services."""
+
+import math
+from typing import Any
+
+
+def is_missing(value: Any) -> bool:
+    """True for None and NaN (the two ways a missing value reaches us)."""
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def format_seconds_h_min(val_sec: Any) -> str:
+    """Format seconds into a concise 'Xh Ymin' string.
+
+    - Returns 'N/A' for missing (None/NaN) inputs.
+    - Always formats from the absolute value (we don't show a negative unit part).
+    - Examples: 9000 -> '2h 30min', 3600 -> '1h', 120 -> '2min'
+    """
+    if is_missing(val_sec):
+        return "N/A"
+    # Use absolute value so unit parts (hours/minutes) are never negative
+    sec_abs = abs(float(val_sec))
+    hours = int(sec_abs // 3600)
+    minutes = int((sec_abs % 3600) // 60)
+    if hours and minutes:
+        return f"{hours}h {minutes}min"
+    if hours:
+        return f"{hours}h"
+    return f"{minutes}min"
@@ -0,0 +1,97 @@
+"""Long-horizon metric history for charts.
+
+The range is aggregated per day, week or month in SQL (`get_metric_buckets`),
+so only the buckets cross the wire. When the client asks for at most
+`max_points` points, the buckets are further reduced with
+largest-triangle-three-buckets (LTTB): unlike averaging it keeps the first and
+last point and the peaks and dips that shape a line chart, so a decade of
+daily rows can be drawn from a few hundred points.
+"""
+
+from datetime import date
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.repository import insights_repository
+from app.repository.metric_series import date_column, value_column
+from app.schemas.history import HistoryPoint, HistoryRead
+from app.services.instrumentation import stage
+
+# service label of the stage timings
+SERVICE = "history"
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the `n_out` points LTTB keeps from (x, y) (x ascending, no NaN).
+
+    The first and last points are always kept; the points in between are split
+    into `n_out - 2` equal buckets and from each the point forming the largest
+    triangle with the previously kept point and the mean of the next bucket is
+    chosen. Returns every index when there are no more than `n_out` points.
+    """
+    n = len(x)
+    if n <= n_out:
+        return np.arange(n)
+    if n_out < 3:
+        raise ValueError("LTTB needs at least 3 output points")
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def compute_history(
+    resident_id: int,
+    metric: str,
+    db: Session,
+    start: date | None = None,
+    end: date | None = None,
+    resolution: str = "day",
+    max_points: int | None = None,
+) -> HistoryRead | None:
+    """Metric history of a resident between `start` and `end` (inclusive, open when None).
+
+    Buckets without any value are left out. Returns None when the range holds
+    no value at all.
+    """
+    with stage(SERVICE, "fetch"):
+        rows = insights_repository.get_metric_buckets(
+            resident_id, metric, db, start, end, resolution
+        )
+        rows = [r for r in rows if r[4]]
+    if not rows:
+        return None
+
+    n_buckets = len(rows)
+    downsampled = max_points is not None and len(rows) > max_points
+    if downsampled:
+        with stage(SERVICE, "analysis"):
+            days = date_column(rows).astype(np.float64)
+            rows = [rows[i] for i in lttb_indices(days, value_column(rows, 1), max_points)]
+
+    with stage(SERVICE, "serialize"):
+        points = [
+            HistoryPoint(
+                date=r[0], value_seconds=r[1], min_seconds=r[2], max_seconds=r[3], n_days=r[4]
+            )
+            for r in rows
+        ]
+    return HistoryRead(
+        resident_id=resident_id,
+        metric=metric,
+        resolution=resolution,
+        start=start,
+        end=end,
+        n_buckets=n_buckets,
+        downsampled=downsampled,
+        points=points,
+    )
@@ -0,0 +1,92 @@
+"""Write path for daily Bedsense rows.
+
+Every importer (the CSV command, the upload endpoint) stores rows through
+`store_daily_rows`, so anything derived from `inbed_daily` can be kept in sync
+from a single place.
+"""
+
+from collections import Counter
+from itertools import groupby
+from typing import Any, Mapping, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.repository import insights_repository
+from app.repository.inbed_daily_repository import (
+    bump_revisions,
+    get_existing_keys,
+    get_rows_around,
+    oldest_day_per_resident,
+    upsert_daily_rows,
+)
+from app.repository.metric_series import RowBatch
+from app.services import (
+    online_change_point_service,
+    rolling_aggregate_service,
+    running_stats_service,
+)
+
+# rows read before the oldest written day of a resident to recompute derived data
+CONTEXT_ROWS = max(running_stats_service.WINDOW, rolling_aggregate_service.CONTEXT_ROWS)
+
+
+def _columns(row: Mapping[str, Any]) -> Tuple[str, ...]:
+    return tuple(row.keys())
+
+
+def store_daily_rows(db: Session, rows: Sequence[Mapping[str, Any]]) -> set[int]:
+    """Upsert one batch of daily rows in a single transaction.
+
+    Rows may carry different metric columns; each run of rows with the same
+    columns is upserted as one executemany, in input order. Returns the ids
+    of the residents touched by the batch. The transaction is rolled back if
+    anything fails, so a batch is either fully stored or not at all.
+    """
+    return _store_daily_rows(db, rows)[0]
+
+
+def _store_daily_rows(db: Session, rows: Sequence[Mapping[str, Any]]) -> Tuple[set[int], int]:
+    """`store_daily_rows`; returns the residents touched and the number of days added."""
+    if not rows:
+        return set(), 0
+    resident_ids = {int(r["resident_id"]) for r in rows}
+    store = insights_repository.SERIES_STORE
+    pending = None
+    try:
+        # days added per resident, for the row count kept with the revision
+        new_keys = {(int(r["resident_id"]), r["date"]) for r in rows} - {
+            (int(rid), day) for rid, day in get_existing_keys(db, rows)
+        }
+        inserted = Counter(rid for rid, _ in new_keys)
+        # consecutive runs only: a later record for the same day must win
+        for _, group in groupby(rows, key=_columns):
+            upsert_daily_rows(db, list(group))
+        # derived data is updated in the same transaction as the rows, from
+        # one read of the rows around the written days
+        starts = oldest_day_per_resident(rows)
+        db.flush()
+        batch = RowBatch(get_rows_around(db, starts, CONTEXT_ROWS))
+        running_stats_service.update_after_write(db, batch)
+        rolling_aggregate_service.update_after_write(db, starts, batch)
+        online_change_point_service.update_after_write(db, batch, CONTEXT_ROWS)
+        bump_revisions(db, resident_ids, inserted)
+        if store is not None:
+            # readable from the memory-mapped store once committed
+            pending = store.stage(batch, CONTEXT_ROWS)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    if store is not None:
+        store.publish(pending)
+    return resident_ids, len(new_keys)
+
+
+def store_daily_upload(db: Session, rows: Sequence[Mapping[str, Any]]) -> Tuple[int, int]:
+    """`store_daily_rows` for an upload batch; returns (inserted, updated) row counts.
+
+    A record for a day that is already stored, or that appears earlier in the
+    same batch, counts as an update.
+    """
+    _, inserted = _store_daily_rows(db, rows)
+    return inserted, len(rows) - inserted
@@ -0,0 +1,224 @@
+"""In-process cache for computed insights.
+
+Insights only change when a resident's `inbed_daily` data changes (at most a
+few times per night), so results are cached per
+(analysis, resident_id, metric, window) together with the resident's
+`DataVersion`; `window` is the row count, or a string naming the date range
+and resolution of a ranged request. Every lookup first reads the current version (a cheap indexed
+query); an entry computed for an older version is treated as a miss and
+recomputed. Memory is bounded by LRU eviction; an optional TTL additionally
+bounds how long any entry may be served.
+
+On a miss, insights the precompute job stored for the same key and version
+(`precomputed_insights`, see `precompute_service`) are served before
+anything is computed live.
+
+The same (key, version) pair also names the response for HTTP caching:
+`insight_etag` derives the ETag the insight endpoints send, so a client that
+already holds the current answer gets a 304 after the version lookup alone.
+
+Configuration (environment):
+- INSIGHT_CACHE_SIZE: max number of entries (default 4096, 0 disables caching)
+- INSIGHT_CACHE_TTL: max entry age in seconds (default: no TTL)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.repository import precomputed_insight_repository
+from app.repository.inbed_daily_repository import (
+    DataVersion,
+    get_data_version,
+    get_data_version_async,
+)
+
+T = TypeVar("T")
+
+DEFAULT_MAXSIZE = 4096
+
+# Bump when the analyses change their output for the same data, so that
+# clients holding responses of the previous release revalidate.
+ETAG_SCHEME = "insight-v1"
+
+
+@dataclass
+class _Entry:
+    version: Hashable
+    value: Any
+    stored_at: float
+
+
+class InsightCache:
+    """Thread-safe LRU cache whose entries are tied to a data version."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # misses answered from the precomputed table instead of computing
+        self.stored_hits = 0
+
+    def get(self, key: Hashable, version: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for an entry computed at `version`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version and not self._expired(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry.value
+            if entry is not None:
+                # stale version or expired: drop it right away
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key: Hashable, version: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(version, value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, version: Hashable, compute: Callable[[], T]) -> T:
+        """Return the cached value for (key, version) or compute and store it.
+
+        `None` results (e.g. not enough data) are cached as well; they are
+        invalidated like any other entry once the data version changes.
+        """
+        found, value = self.get(key, version)
+        if found:
+            return value
+        value = compute()
+        self.put(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.stored_hits = 0
+
+    def count_stored_hit(self) -> None:
+        with self._lock:
+            self.stored_hits += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stored_hits": self.stored_hits,
+            }
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl is not None and time.monotonic() - entry.stored_at > self.ttl
+
+
+def _ttl_from_env() -> float | None:
+    raw = os.getenv("INSIGHT_CACHE_TTL")
+    return float(raw) if raw else None
+
+
+insight_cache = InsightCache(
+    maxsize=int(os.getenv("INSIGHT_CACHE_SIZE", str(DEFAULT_MAXSIZE))), ttl=_ttl_from_env()
+)
+
+
+def insight_etag(
+    analysis: str, resident_id: int, metric: str, window: int | str, version: DataVersion
+) -> str:
+    """Weak ETag of an insight response: the cache key plus the data version it was computed at."""
+    raw = f"{ETAG_SCHEME}|{analysis}|{resident_id}|{metric}|{window}|{tuple(version)}"
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def _from_payload(payload: str, model: Type[BaseModel]) -> Any:
+    """Rebuild a stored response (`null` = not enough data)."""
+    return None if payload == "null" else model.model_validate_json(payload)
+
+
+def cached_insight(
+    db: Session,
+    analysis: str,
+    resident_id: int,
+    metric: str,
+    window: int | str,
+    compute: Callable[[], T],
+    version: DataVersion | None = None,
+    model: Type[BaseModel] | None = None,
+) -> T:
+    """Serve an insight from the shared cache, recomputing when the resident's data changed.
+
+    Pass `version` when the caller already looked it up (e.g. for the ETag).
+    With `model` (the response type), a precomputed result of the current
+    version is used before falling back to `compute`.
+    """
+    if version is None:
+        version = get_data_version(db, resident_id)
+    key = (analysis, resident_id, metric, window)
+    found, value = insight_cache.get(key, version)
+    if found:
+        return value
+    payload = None
+    if model is not None and isinstance(window, int):
+        payload = precomputed_insight_repository.get_payload(
+            db, analysis, resident_id, metric, window, version
+        )
+    if payload is not None:
+        insight_cache.count_stored_hit()
+        value = _from_payload(payload, model)
+    else:
+        value = compute()
+    insight_cache.put(key, version, value)
+    return value
+
+
+async def cached_insight_async(
+    db: AsyncSession,
+    analysis: str,
+    resident_id: int,
+    metric: str,
+    window: int | str,
+    compute: Callable[[], Awaitable[T]],
+    version: DataVersion | None = None,
+    model: Type[BaseModel] | None = None,
+) -> T:
+    """Async counterpart of `cached_insight`; shares the same cache entries."""
+    if version is None:
+        version = await get_data_version_async(db, resident_id)
+    key = (analysis, resident_id, metric, window)
+    found, value = insight_cache.get(key, version)
+    if found:
+        return value
+    payload = None
+    if model is not None and isinstance(window, int):
+        payload = await precomputed_insight_repository.get_payload_async(
+            db, analysis, resident_id, metric, window, version
+        )
+    if payload is not None:
+        insight_cache.count_stored_hit()
+        value = _from_payload(payload, model)
+    else:
+        value = await compute()
+    insight_cache.put(key, version, value)
+    return value
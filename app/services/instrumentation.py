@@ -0,0 +1,192 @@
+"""In-process latency metrics in the Prometheus text format.
+
+Two histogram families are recorded:
+
+- `momo_http_request_duration_seconds{method, route, status}`: every request,
+  labelled with the route template (e.g. `/api/insights/trend/{metric}/{resident_id}`)
+  so resident ids do not blow up the label set. The request count per label
+  set is the histogram's `_count` (throughput = its rate).
+- `momo_insight_stage_duration_seconds{service, stage}`: time spent inside the
+  insight services per stage: `fetch` (DB query, arrays filled from the
+  cursor), `prepare` (gap filling, standardisation), `analysis` and
+  `serialize` (formatting values and building the response model).
+
+Use `stage()` around a block to time it. Observing costs a `perf_counter`
+call and a short lock; there is no background thread and nothing to configure.
+`render()` produces the `/metrics` payload, including the values of
+registered collectors (cache and pool statistics).
+"""
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+# upper bounds in seconds; the implicit last bucket is +Inf
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values (thread-safe)."""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, seconds: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += seconds
+
+    def snapshot(self) -> Dict[Labels, Tuple[List[int], float]]:
+        with self._lock:
+            return {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts, strict=True):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {total!r}")
+            lines.append(f"{self.name}_count{_labels(labels)} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels, **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+REQUEST_DURATION = Histogram(
+    "momo_http_request_duration_seconds", "HTTP request latency by route template and status."
+)
+STAGE_DURATION = Histogram(
+    "momo_insight_stage_duration_seconds", "Time spent per stage inside the insight services."
+)
+
+# name -> callable returning {metric_name: (type, help, {labels: value})}
+Collector = Callable[[], Dict[str, Tuple[str, str, Dict[Labels, float]]]]
+_collectors: Dict[str, Collector] = {}
+
+
+def register_collector(name: str, collector: Collector) -> None:
+    """Add values computed at scrape time (e.g. cache counters) to `render()`."""
+    _collectors[name] = collector
+
+
+class stage:
+    """Context manager timing the enclosed block as stage `name` of `service`.
+
+    A plain class rather than `@contextmanager`, so entering a stage does not
+    create a generator (~2 us per stage in total).
+    """
+
+    __slots__ = ("service", "name", "t0")
+
+    def __init__(self, service: str, name: str):
+        self.service = service
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        STAGE_DURATION.observe(time.perf_counter() - self.t0, service=self.service, stage=self.name)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    REQUEST_DURATION.observe(seconds, method=method, route=route, status=str(status))
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording `momo_http_request_duration_seconds`.
+
+    Plain ASGI rather than `BaseHTTPMiddleware`: no extra task per request and
+    streaming responses pass through untouched. The route template is only
+    known after routing, so it is read from the scope once the app returns.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        t0 = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - t0,
+            )
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = REQUEST_DURATION.render() + STAGE_DURATION.render()
+    for collector in _collectors.values():
+        for metric, (kind, help_text, values) in collector().items():
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in values.items():
+                lines.append(f"{metric}{_labels(labels)} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Drop all recorded observations (tests)."""
+    REQUEST_DURATION.clear()
+    STAGE_DURATION.clear()
@@ -0,0 +1,278 @@
+"""Online change-point detection over each resident's whole history.
+
+`change_point_service` re-runs PELT over the newest 30 rows on every request,
+so its result moves as the window slides. Here one `OnlinePelt` per resident
+and metric is fed every day as it is stored: the write path calls
+`update_after_write` in the same transaction as the upsert, which loads the
+detector state, folds in the new days (O(1) amortized per day, bounded by
+`MAX_CANDIDATES`) and stores the state together with the current change
+points. Reading them (`current_change_points`) is a single row lookup plus a
+freshness check against the newest stored date; no analysis runs.
+
+Values are centred and scaled once, from the first `WARMUP` values of the
+metric: the median, and the day-to-day noise estimated from the MAD of the
+first differences (insensitive to level shifts and outliers). The penalty is
+in units of that noise variance, so it means the same for every resident
+and metric; there are no change points before the warm-up is complete.
+
+Days appended after the newest folded day are folded in directly. A write
+before it (a correction or backfill) replays the resident's history, as
+does a resident whose state is missing or stale on the read path (in
+memory, without persisting). Residents loaded before the table existed, or
+by other means, get their state from:
+    python -m app.services.online_change_point_service
+"""
+
+import json
+import math
+from datetime import date
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.online_change_point import OnlineChangePointState
+from app.repository import metric_stats_repository, online_change_point_repository
+from app.repository.insights_repository import METRIC_COLUMNS
+from app.repository.metric_series import RowBatch
+from app.schemas.change_point import ChangePointRead
+from app.services.anomaly_service import MAD_SCALE
+from app.services.formatting import format_seconds_h_min
+from app.services.pelt import OnlinePelt
+
+# Values that fix a metric's level and noise scale before detection starts
+WARMUP: int = 30
+# Penalty per change point, in units of the noise variance: twice a BIC
+# penalty for a year of days, so single-day outliers of the synthetic
+# benchmark data (up to 8 sigma) are not reported as change points
+PENALTY: float = 4 * math.log(365)
+# Bound on the candidate set, i.e. on the work and state per new day
+MAX_CANDIDATES: int = 80
+# Newest change points kept and reported per resident/metric
+MAX_CHANGE_POINTS: int = 20
+
+
+def noise_scale(values: np.ndarray) -> Tuple[float, float]:
+    """(offset, scale) of the warm-up values: median and day-to-day noise (std)."""
+    offset = float(np.median(values))
+    diffs = np.diff(values)
+    scale = MAD_SCALE * float(np.median(np.abs(diffs - np.median(diffs)))) / math.sqrt(2)
+    if not scale > 0:
+        scale = float(np.std(values))
+    return offset, scale if scale > 0 else 1.0
+
+
+class OnlineDetector:
+    """Online change-point detector of one resident and metric."""
+
+    def __init__(self) -> None:
+        self.n_rows = 0
+        self.first_date: date | None = None
+        self.last_date: date | None = None
+        self.offset: float | None = None
+        self.scale: float | None = None
+        # (day ordinal, value) of the warm-up, until the detector starts
+        self.warmup: List[Tuple[int, float]] = []
+        self.pelt: OnlinePelt | None = None
+        # (head, change_points JSON) as loaded: unchanged while the head is
+        self._stored: Tuple[int, str] | None = None
+
+    @property
+    def n_values(self) -> int:
+        return self.pelt.n if self.pelt is not None else len(self.warmup)
+
+    def add(self, day: date, value: float | None) -> None:
+        """Fold in the next day (`value` None or NaN when the metric is missing)."""
+        self.n_rows += 1
+        self.first_date = self.first_date or day
+        self.last_date = day
+        if value is None or math.isnan(value):
+            return
+        if self.pelt is None:
+            self.warmup.append((day.toordinal(), float(value)))
+            if len(self.warmup) == WARMUP:
+                self._start()
+            return
+        self._update(day.toordinal(), float(value))
+
+    def _start(self) -> None:
+        self.offset, self.scale = noise_scale(np.array([v for _, v in self.warmup]))
+        self.pelt = OnlinePelt(
+            PENALTY, max_candidates=MAX_CANDIDATES, max_history=MAX_CHANGE_POINTS, label_size=2
+        )
+        for day, value in self.warmup:
+            self._update(day, value)
+        self.warmup = []
+
+    def _update(self, day: int, value: float) -> None:
+        assert self.pelt is not None and self.offset is not None and self.scale is not None
+        self.pelt.update((value - self.offset) / self.scale, (day, value))
+
+    def change_points(self) -> List[list]:
+        """[index, date, value] of the last day before each change, oldest first.
+
+        Indices count the values folded in (days with a value), from 0.
+        """
+        if self.pelt is None:
+            return []
+        return [
+            [bkp - 1, date.fromordinal(int(day)).isoformat(), value]
+            for bkp, (day, value) in self.pelt.change_points()
+        ]
+
+    def to_row(self, resident_id: int, metric: str) -> Dict[str, Any]:
+        if self.pelt is None:
+            state = np.array(self.warmup, dtype="<f8").tobytes()
+        else:
+            state = self.pelt.to_bytes()
+        if self._stored is not None and self.pelt is not None and self._stored[0] == self.pelt.head:
+            # the change points of a partition never change once made
+            change_points = self._stored[1]
+        else:
+            change_points = json.dumps(self.change_points(), separators=(",", ":"))
+        return {
+            "resident_id": resident_id,
+            "metric": metric,
+            "n_rows": self.n_rows,
+            "n_values": self.n_values,
+            "first_date": self.first_date,
+            "last_date": self.last_date,
+            "offset": self.offset,
+            "scale": self.scale,
+            "state": state,
+            "change_points": change_points,
+        }
+
+    @classmethod
+    def from_row(cls, row: OnlineChangePointState) -> "OnlineDetector":
+        detector = cls()
+        detector.n_rows = row.n_rows
+        detector.first_date = row.first_date
+        detector.last_date = row.last_date
+        detector.offset = row.offset
+        detector.scale = row.scale
+        if row.offset is not None:
+            detector.pelt = OnlinePelt.from_bytes(row.state)
+            detector._stored = (detector.pelt.head, row.change_points)
+        else:
+            warmup = np.frombuffer(row.state, dtype="<f8").reshape(-1, 2).tolist()
+            detector.warmup = [(int(day), value) for day, value in warmup]
+        return detector
+
+
+def _fold(detectors: Dict[str, OnlineDetector], rows: Sequence[Any]) -> None:
+    """Fold (date, *metric values) rows, oldest first, into every metric's detector."""
+    for row in rows:
+        for i, metric in enumerate(METRIC_COLUMNS, start=1):
+            detectors[metric].add(row[0], row[i])
+
+
+def detect_history(db: Session, resident_id: int) -> Dict[str, OnlineDetector]:
+    """Detectors of every metric fed with the resident's whole history."""
+    detectors = {metric: OnlineDetector() for metric in METRIC_COLUMNS}
+    _fold(detectors, online_change_point_repository.get_history_rows(db, resident_id))
+    return detectors
+
+
+def update_after_write(db: Session, batch: RowBatch, n_context: int) -> None:
+    """Bring the detectors of every resident in the batch up to date.
+
+    Must run in the same transaction as the write, after the upsert. The
+    batch must hold `n_context` (at least 1) rows before each resident's
+    oldest written day, or start at the resident's first row. Residents
+    without a state whose history is not all in the batch are left to the
+    bulk rebuild.
+    """
+    states = online_change_point_repository.get_states(db, batch.resident_ids)
+    rows: List[Dict[str, Any]] = []
+    for k, resident_id in enumerate(batch.resident_ids):
+        lo, first_changed, hi = (
+            int(batch.starts[k]),
+            int(batch.changed_starts[k]),
+            int(batch.ends[k]),
+        )
+        if lo == hi:
+            continue
+        dates = batch.dates[lo:hi]
+        values = batch.values[lo:hi].tolist()
+        stored = {metric: states.get((resident_id, metric)) for metric in METRIC_COLUMNS}
+        # the metrics of a resident are always folded together
+        last_date = None if None in stored.values() else stored["time_in_bed"].last_date
+        if last_date is not None and dates[0] <= last_date < dates[first_changed - lo]:
+            # appended days: fold in everything after the newest folded day
+            detectors = {m: OnlineDetector.from_row(s) for m, s in stored.items()}
+            new = [(d, *v) for d, v in zip(dates, values, strict=True) if d > last_date]
+            _fold(detectors, new)
+        elif first_changed - lo < n_context and not any(stored.values()):
+            # the batch holds the resident's whole history
+            detectors = {metric: OnlineDetector() for metric in METRIC_COLUMNS}
+            _fold(detectors, [(d, *v) for d, v in zip(dates, values, strict=True)])
+        elif any(stored.values()):
+            # a correction or backfill before the newest folded day
+            detectors = detect_history(db, resident_id)
+        else:
+            continue
+        rows.extend(d.to_row(resident_id, metric) for metric, d in detectors.items())
+    online_change_point_repository.upsert_states(db, rows)
+
+
+def current_change_points(db: Session, resident_id: int, metric: str) -> ChangePointRead | None:
+    """Current change points of a resident/metric from the online detector, or None if no data."""
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    last_date = metric_stats_repository.get_last_date(db, resident_id)
+    if last_date is None:
+        return None
+    state = online_change_point_repository.get_state(db, resident_id, metric)
+    if state is not None and state.last_date == last_date:
+        change_points, n_values = json.loads(state.change_points), state.n_values
+    else:
+        # missing or stale: replay the history without persisting (read path)
+        detector = detect_history(db, resident_id)[metric]
+        change_points, n_values = detector.change_points(), detector.n_values
+
+    if n_values < WARMUP:
+        description = f"No online change points yet: {n_values} of {WARMUP} baseline values."
+    else:
+        description = (
+            f"Detected {len(change_points)} change points using online PELT (l2) "
+            f"over {n_values} values up to {last_date}."
+        )
+    return ChangePointRead(
+        resident_id=resident_id,
+        metric=metric,
+        n_change_points=len(change_points),
+        change_point_indices=[i for i, _, _ in change_points],
+        change_point_dates=[d for _, d, _ in change_points],
+        change_point_values=[format_seconds_h_min(v) for _, _, v in change_points],
+        description=description,
+    )
+
+
+def rebuild_all(db: Session, commit_every: int = 100) -> int:
+    """Recompute the detectors of every resident with data. Returns residents processed."""
+    resident_ids = [
+        r[0] for r in db.query(InBedDaily.resident_id).distinct().all() if r[0] is not None
+    ]
+    for n, resident_id in enumerate(resident_ids, start=1):
+        detectors = detect_history(db, resident_id)
+        online_change_point_repository.upsert_states(
+            db, [d.to_row(resident_id, metric) for metric, d in detectors.items()]
+        )
+        if n % commit_every == 0:
+            db.commit()
+    db.commit()
+    return len(resident_ids)
+
+
+if __name__ == "__main__":
+    from app.database_config import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt online change points for {rebuild_all(session)} residents.")
+    finally:
+        session.close()
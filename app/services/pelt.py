@@ -0,0 +1,296 @@
+"""Univariate/multivariate L2 change-point detection with PELT, in NumPy.
+
+Drop-in replacement for `ruptures.Pelt(model="l2")` for the short series this
+API analyses. Same API shape (`Pelt(...).fit(signal).predict(pen)`), same
+candidate grid (`min_size`, `jump`) and the same tie-breaking, so it returns
+the same breakpoints as ruptures on the same input. (On heavily quantized data
+two segmentations can have exactly equal cost; such exact ties may resolve to
+the other, equally optimal, segmentation.) It is much faster because:
+
+- segment costs are O(1) from prefix sums of the signal and its squares
+  (cost(t, b) = sum(x^2) - sum(x)^2 / (b - t)) instead of slicing + var();
+- at every breakpoint the cost of all admissible start points is evaluated in
+  one vectorized expression, and pruning is a boolean mask;
+- there are no cost objects or per-candidate partition dicts, and importing
+  this module does not pull in ruptures.
+"""
+
+from math import floor
+
+import numpy as np
+
+# Relative tolerance under which two candidate partitions count as a tie
+TIE_RTOL = 1e-9
+
+
+class Pelt:
+    """Penalized change-point detection (PELT) with an L2 (mean-shift) cost."""
+
+    def __init__(self, model: str = "l2", min_size: int = 2, jump: int = 5):
+        if model != "l2":
+            raise ValueError(f"Unsupported model: {model} (only 'l2' is implemented)")
+        self.min_size = max(int(min_size), 1)
+        self.jump = max(int(jump), 1)
+        self.n_samples: int | None = None
+        self._csum: np.ndarray | None = None
+        self._csum_sq: np.ndarray | None = None
+
+    def fit(self, signal: np.ndarray) -> "Pelt":
+        """Precompute the prefix sums of `signal` (shape (n,) or (n, n_features))."""
+        sig = np.asarray(signal, dtype=np.float64)
+        # univariate signals keep 1-D prefix sums (the hot path: less indexing work)
+        shape = (sig.shape[0] + 1,) + sig.shape[1:]
+        self.n_samples = sig.shape[0]
+        self._csum = np.zeros(shape)
+        self._csum_sq = np.zeros(shape)
+        np.cumsum(sig, axis=0, out=self._csum[1:])
+        np.cumsum(sig * sig, axis=0, out=self._csum_sq[1:])
+        return self
+
+    def cost(self, starts: np.ndarray, end: int) -> np.ndarray:
+        """L2 cost of the segments [start, end) for every start in `starts`."""
+        assert self._csum is not None and self._csum_sq is not None
+        length = (end - starts).astype(np.float64)
+        seg_sum = self._csum[end] - self._csum[starts]
+        seg_sum_sq = self._csum_sq[end] - self._csum_sq[starts]
+        if seg_sum.ndim == 1:
+            # clamp the tiny negative values float cancellation can produce
+            return np.maximum(seg_sum_sq - seg_sum * seg_sum / length, 0.0)
+        cost = seg_sum_sq - seg_sum * seg_sum / length[:, None]
+        return np.maximum(cost, 0.0).sum(axis=1)
+
+    def predict(self, pen: float) -> list[int]:
+        """Return the sorted breakpoints (segment ends, the last one is n_samples)."""
+        if self.n_samples is None:
+            raise RuntimeError("Call fit() before predict().")
+        n = self.n_samples
+        if self.min_size > n:
+            raise ValueError("Signal is too short for the minimum segment size.")
+
+        # best[t]: optimal penalized cost of signal[0:t]; prev[t]: start of its last segment
+        best = np.full(n + 1, np.nan)
+        prev = np.full(n + 1, -1, dtype=np.int64)
+        best[0] = 0.0
+
+        admissible = np.empty(0, dtype=np.int64)
+        ends = [k for k in range(0, n, self.jump) if k >= self.min_size] + [n]
+        for end in ends:
+            new_point = floor((end - self.min_size) / self.jump) * self.jump
+            # only start points that have an optimal partition of signal[0:t]
+            if not np.isnan(best[new_point]):
+                admissible = np.append(admissible, new_point)
+
+            totals = best[admissible] + (self.cost(admissible, end) + pen)
+            # Prefix-sum costs carry ~1e-16 relative rounding noise where the
+            # direct var() cost is exact (e.g. 0 for a constant segment). Treat
+            # totals within TIE_RTOL of the minimum as ties and take the first,
+            # like min() over a list does, so ties resolve as in ruptures.
+            lowest = float(totals.min())
+            tol = TIE_RTOL * max(1.0, abs(lowest))
+            i = int(np.argmax(totals <= lowest + tol))
+            best[end] = totals[i]
+            prev[end] = admissible[i]
+            # pruning: drop start points that can never be optimal again
+            admissible = admissible[totals <= best[end] + pen + tol]
+
+        bkps = []
+        t = n
+        while t > 0:
+            bkps.append(t)
+            t = int(prev[t])
+        return sorted(bkps)
+
+    def fit_predict(self, signal: np.ndarray, pen: float) -> list[int]:
+        return self.fit(signal).predict(pen)
+
+
+class OnlinePelt:
+    """PELT (l2) fed one observation at a time, keeping its pruned candidate set.
+
+    Each `update` costs O(candidates): the optimal penalized cost F(t) of the
+    signal so far is the minimum over the surviving candidate start points, and
+    candidates that can never be optimal again are pruned, exactly as in
+    `Pelt.predict` with `jump=1`. Long stable stretches prune poorly, so when
+    more than `max_candidates` survive only the half with the lowest totals is
+    kept; below that bound the breakpoints equal `Pelt(min_size=min_size,
+    jump=1)` on the whole signal.
+
+    Instead of the full `prev` array, every candidate start point keeps a node
+    (parent, label) naming the last change point of its optimal partition;
+    nodes further than `max_history` change points from a live candidate are
+    dropped, so the state stays bounded however long the signal gets. Labels
+    are `label_size` floats identifying an observation (e.g. its day and
+    value). The whole state is float64 arrays, stored with `to_bytes`.
+    """
+
+    # scalar fields in front of the arrays in `to_bytes`
+    _HEADER = 12
+
+    def __init__(
+        self,
+        pen: float,
+        min_size: int = 2,
+        max_candidates: int = 100,
+        max_history: int = 20,
+        label_size: int = 0,
+    ):
+        self.pen = float(pen)
+        self.min_size = max(int(min_size), 1)
+        self.max_candidates = max(int(max_candidates), 2)
+        self.max_history = max(int(max_history), 1)
+        self.label_size = int(label_size)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        # admissible start points, one column each: (tau, F(tau), prefix sum
+        # and prefix sum of squares at tau); the first `_k` columns are in use
+        self._candidates = np.empty((4, self.max_candidates + 1))
+        self._k = 0
+        # F(t) of the last `min_size` observations, not admissible yet:
+        # [t, F(t), prefix sum, prefix sum of squares, head, *label of observation t - 1]
+        self.pending: list[list[float]] = []
+        # change points, one row per start point tau, by increasing tau:
+        # [tau, parent tau (0: none), *label]; the first `_n_nodes` rows are in use
+        self._nodes = np.empty((2 * (self.max_candidates + self.max_history), 2 + self.label_size))
+        self._n_nodes = 0
+        # last change point of the optimal partition of the whole signal (0: none)
+        self.head = 0
+
+    @property
+    def candidates(self) -> np.ndarray:
+        """(4, candidates) view: start points, F, prefix sums, prefix sums of squares."""
+        return self._candidates[:, : self._k]
+
+    @property
+    def nodes(self) -> np.ndarray:
+        """(nodes, 2 + label_size) view: tau, parent tau, label."""
+        return self._nodes[: self._n_nodes]
+
+    def update(self, value: float, label: tuple = ()) -> None:
+        """Append one observation (`label` identifies it in `change_points`)."""
+        self.n += 1
+        self.total += value
+        self.total_sq += value * value
+        t = self.n
+
+        tau = t - self.min_size
+        if tau == 0:
+            self._admit([0.0, 0.0, 0.0, 0.0])
+        elif tau >= self.min_size and self.pending and self.pending[0][0] == tau:
+            row = self.pending.pop(0)
+            self._admit(row[:4])
+            self._add_node([tau, *row[4:]])
+        if not self._k:
+            return
+
+        starts, f, csum, csum_sq = self.candidates
+        seg_sum = self.total - csum
+        cost = np.maximum((self.total_sq - csum_sq) - seg_sum * seg_sum / (t - starts), 0.0)
+        totals = f + cost + self.pen
+        lowest = float(totals.min())
+        tol = TIE_RTOL * max(1.0, abs(lowest))
+        i = int(np.argmax(totals <= lowest + tol))
+        self.head = int(starts[i])
+        self.pending.append([t, float(totals[i]), self.total, self.total_sq, self.head, *label])
+
+        keep = totals <= lowest + self.pen + tol
+        n_keep = int(np.count_nonzero(keep))
+        if n_keep > self.max_candidates:
+            # rarely: cut to half, so the sort is amortized over many updates
+            keep = np.zeros(len(totals), dtype=bool)
+            keep[np.argsort(totals, kind="stable")[: self.max_candidates // 2]] = True
+            keep[i] = True
+            n_keep = int(np.count_nonzero(keep))
+        if n_keep < self._k:
+            self._candidates[:, :n_keep] = self.candidates[:, keep]
+            self._k = n_keep
+
+    def _admit(self, column: list) -> None:
+        self._candidates[:, self._k] = column
+        self._k += 1
+
+    def _add_node(self, row: list) -> None:
+        if self._n_nodes == len(self._nodes):
+            self._drop_old_nodes()
+            if self._n_nodes > len(self._nodes) // 2:
+                self._nodes = np.concatenate((self._nodes, np.empty_like(self._nodes)))
+        self._nodes[self._n_nodes] = row
+        self._n_nodes += 1
+
+    def _drop_old_nodes(self) -> None:
+        """Keep the nodes within `max_history` change points of a live start point."""
+        nodes = self.nodes
+        parents = dict(
+            zip(nodes[:, 0].astype(int).tolist(), nodes[:, 1].astype(int).tolist(), strict=True)
+        )
+        remaining: dict[int, int] = {}
+        heads = self.candidates[0].astype(int).tolist()
+        heads += [int(p[4]) for p in self.pending] + [self.head]
+        for tau in heads:
+            steps = self.max_history
+            while tau and steps > 0 and remaining.get(tau, 0) < steps:
+                remaining[tau] = steps
+                tau = parents.get(tau, 0)
+                steps -= 1
+        kept = nodes[np.isin(nodes[:, 0], list(remaining))]
+        self._nodes[: len(kept)] = kept
+        self._n_nodes = len(kept)
+
+    def change_points(self) -> list[tuple[int, tuple]]:
+        """(breakpoint, label) of the newest `max_history` change points, oldest first.
+
+        A breakpoint is the number of observations before the change, as in
+        `Pelt.predict` (the final breakpoint n is not included).
+        """
+        nodes = self.nodes.tolist()
+        rows = {int(node[0]): node for node in nodes}
+        out = []
+        tau = self.head
+        while tau in rows and len(out) < self.max_history:
+            row = rows[tau]
+            out.append((tau, tuple(row[2:])))
+            tau = int(row[1])
+        return out[::-1]
+
+    def to_bytes(self) -> bytes:
+        """The state as float64 bytes, restored by `from_bytes`."""
+        header = [
+            self.pen,
+            self.min_size,
+            self.max_candidates,
+            self.max_history,
+            self.label_size,
+            self.n,
+            self.total,
+            self.total_sq,
+            self.head,
+            self._k,
+            len(self.pending),
+            self._n_nodes,
+        ]
+        pending = [v for row in self.pending for v in row]
+        parts = (header, self.candidates.ravel(), pending, self.nodes.ravel())
+        return np.concatenate(parts).astype("<f8", copy=False).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OnlinePelt":
+        state = np.frombuffer(data, dtype="<f8")
+        header = state[: cls._HEADER].tolist()
+        pen, min_size, max_candidates, max_history, label_size = header[:5]
+        pelt = cls(pen, int(min_size), int(max_candidates), int(max_history), int(label_size))
+        pelt.n, pelt.total, pelt.total_sq = int(header[5]), header[6], header[7]
+        pelt.head, pelt._k = int(header[8]), int(header[9])
+        n_pending, n_nodes = int(header[10]), int(header[11])
+
+        pos = cls._HEADER
+        pelt._candidates[:, : pelt._k] = state[pos : pos + 4 * pelt._k].reshape(4, pelt._k)
+        pos += 4 * pelt._k
+        width = 5 + pelt.label_size
+        pelt.pending = state[pos : pos + n_pending * width].reshape(n_pending, width).tolist()
+        pos += n_pending * width
+        nodes = state[pos : pos + n_nodes * (width - 3)].reshape(n_nodes, width - 3)
+        if n_nodes > len(pelt._nodes):
+            pelt._nodes = np.empty((2 * n_nodes, width - 3))
+        pelt._nodes[:n_nodes] = nodes
+        pelt._n_nodes = n_nodes
+        return pelt
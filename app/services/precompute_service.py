@@ -0,0 +1,210 @@
+"""Precompute the default insights of every resident ahead of the morning rush.
+
+Dashboards open at roughly the same time every morning, and each card asks
+for the trend, change points and anomalies of a resident. Rather than running
+those analyses on demand, the precompute job runs them once after the nightly
+import and stores the responses in `precomputed_insights`:
+
+- per resident: the summary plus trend, change points and anomalies of every
+  metric, at the endpoints' default windows (one query per resident, via
+  `summary_service.compute_summary`);
+- residents are split into chunks of `--chunk` and analysed in parallel
+  worker processes; the parent writes each chunk's rows in one transaction,
+  so there is still a single writer;
+- by default only residents whose data version changed since their last
+  precompute are analysed, so the job can run after every import.
+
+The insight endpoints read a stored row when its data version is the current
+one (see `insight_cache.cached_insight`); rows made stale by later writes are
+ignored and the insight is computed live instead.
+
+Run after the import (e.g. from cron):
+    python -m app.services.precompute_service [--workers N] [--chunk 200] [--all]
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Sequence
+
+import pydantic_core
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.repository import precomputed_insight_repository
+from app.repository.inbed_daily_repository import get_data_version, get_data_versions
+from app.services import summary_service, trend_service
+
+logger = logging.getLogger(__name__)
+
+PRECOMPUTE_WORKERS = int(os.getenv("PRECOMPUTE_WORKERS", str(os.cpu_count() or 1)))
+# residents per worker task (and per write transaction)
+CHUNK_RESIDENTS = 200
+
+WINDOW = summary_service.DEFAULT_WINDOW
+
+
+@dataclass
+class PrecomputeStats:
+    residents: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+
+def _row(
+    resident_id: int, analysis: str, metric: str, window: int, version: Any, value: Any, now
+) -> Dict[str, Any]:
+    return {
+        "resident_id": resident_id,
+        "analysis": analysis,
+        "metric": metric,
+        "window_size": window,
+        "data_rows": version.n_rows,
+        "data_last_date": version.last_date,
+        "data_revision": version.revision,
+        "payload": pydantic_core.to_json(value).decode(),
+        "computed_at": now,
+    }
+
+
+def compute_resident_rows(db: Session, resident_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Analyse residents and return their `precomputed_insights` rows.
+
+    The data version is read before the analyses in the same session, so a
+    row never claims a newer version than the data it was computed from.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    rows: List[Dict[str, Any]] = []
+    for resident_id in resident_ids:
+        version = get_data_version(db, resident_id)
+        summary = summary_service.compute_summary(resident_id, db, window=WINDOW)
+        rows.append(_row(resident_id, "summary", "all", WINDOW, version, summary, now))
+        if summary is None:
+            continue
+        for metric, insights in summary.metrics.items():
+            rows.extend(
+                [
+                    _row(
+                        resident_id,
+                        "trend",
+                        metric,
+                        trend_service.BASELINE,
+                        version,
+                        insights.trend,
+                        now,
+                    ),
+                    _row(
+                        resident_id,
+                        "changepoints",
+                        metric,
+                        WINDOW,
+                        version,
+                        insights.change_points,
+                        now,
+                    ),
+                    _row(
+                        resident_id, "anomalies", metric, WINDOW, version, insights.anomalies, now
+                    ),
+                ]
+            )
+    return rows
+
+
+# -- worker processes --------------------------------------------------------
+
+_worker_sessions: sessionmaker | None = None
+
+
+def _init_worker(url: str) -> None:
+    global _worker_sessions
+    from app.database_config import create_engines
+
+    # reads only; the parent process does all writes
+    _, read = create_engines(url)
+    _worker_sessions = sessionmaker(bind=read)
+
+
+def _compute_chunk(resident_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    with _worker_sessions() as db:
+        return compute_resident_rows(db, resident_ids)
+
+
+def residents_to_refresh(db: Session, only_stale: bool = True) -> List[int]:
+    """Residents with data whose stored insights are missing or out of date."""
+    versions = get_data_versions(db)
+    if not only_stale:
+        return sorted(versions)
+    stored = precomputed_insight_repository.get_summary_versions(db, WINDOW)
+    return sorted(rid for rid, version in versions.items() if stored.get(rid) != version)
+
+
+def precompute(
+    db: Session,
+    resident_ids: Sequence[int] | None = None,
+    workers: int = PRECOMPUTE_WORKERS,
+    chunk_size: int = CHUNK_RESIDENTS,
+    url: str | None = None,
+) -> PrecomputeStats:
+    """Compute and store the insights of `resident_ids` (default: all stale residents).
+
+    - workers: analysis processes (0 or 1: analyse in this process, using `db`).
+    - url: database the workers read from (default: the bind of `db`).
+    Each chunk's rows are written and committed by `db` as soon as they arrive.
+    """
+    t0 = time.perf_counter()
+    if resident_ids is None:
+        resident_ids = residents_to_refresh(db)
+    chunks = [resident_ids[i : i + chunk_size] for i in range(0, len(resident_ids), chunk_size)]
+    stats = PrecomputeStats(residents=len(resident_ids))
+
+    def store(rows: List[Dict[str, Any]]) -> None:
+        precomputed_insight_repository.upsert(db, rows)
+        db.commit()
+        stats.rows += len(rows)
+
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            store(compute_resident_rows(db, chunk))
+    else:
+        url = url or db.get_bind().url.render_as_string(hide_password=False)
+        # spawn: workers never inherit the parent's open connections
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(url,),
+        ) as executor:
+            for future in as_completed([executor.submit(_compute_chunk, c) for c in chunks]):
+                store(future.result())
+
+    stats.seconds = time.perf_counter() - t0
+    logger.info(
+        "precomputed %d residents (%d rows) in %.1fs", stats.residents, stats.rows, stats.seconds
+    )
+    return stats
+
+
+if __name__ == "__main__":
+    from app.database_config import DATABASE_URL, Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Precompute the default insights.")
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS)
+    parser.add_argument("--chunk", type=int, default=CHUNK_RESIDENTS)
+    parser.add_argument("--all", action="store_true", help="recompute fresh residents too")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        ids = residents_to_refresh(session, only_stale=not args.all)
+        result = precompute(session, ids, args.workers, args.chunk, DATABASE_URL)
+        print(
+            f"Precomputed {result.residents} residents ({result.rows} rows) "
+            f"in {result.seconds:.1f}s."
+        )
+    finally:
+        session.close()
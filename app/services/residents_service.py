@@ -1,5 +1,6 @@
-from typing import List
+from typing import Any, Dict, List
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.repository import resident_repository
@@ -12,17 +13,21 @@ DEFAULT_LIMIT = 50
 
 
 def get_residents(
-    db: Session, offset: int = DEFAULT_OFFSET, limit: int = DEFAULT_LIMIT
-) -> List[ResidentRead]:
+    db: Session,
+    offset: int = DEFAULT_OFFSET,
+    limit: int = DEFAULT_LIMIT,
+    after_id: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Return one page of residents as `ResidentRead`-shaped dicts.
 
+    The rows come straight from the selected columns; building ORM objects and
+    validating a DTO per row would only reproduce the same three fields.
+    """
     # Sanitize pagination parameters (defensive). Router also validates via Query.
     offset = max(DEFAULT_OFFSET, int(offset))
     limit = max(MIN_LIMIT, min(int(limit), MAX_LIMIT))
 
-    orm_residents = resident_repository.get_residents(db, offset=offset, limit=limit)
-
-    # Convert ORM -> Pydantic DTOs (Pydantic v2)
-    return [ResidentRead.model_validate(r) for r in orm_residents]
+    return resident_repository.get_residents(db, offset=offset, limit=limit, after_id=after_id)
 
 
 def get_resident(db: Session, resident_id: int) -> ResidentRead | None:
@@ -35,3 +40,26 @@ def get_resident(db: Session, resident_id: int) -> ResidentRead | None:
     if orm_res is None:
         return None
     return ResidentRead.model_validate(orm_res)
+
+
+async def get_residents_async(
+    db: AsyncSession,
+    offset: int = DEFAULT_OFFSET,
+    limit: int = DEFAULT_LIMIT,
+    after_id: int | None = None,
+) -> List[Dict[str, Any]]:
+    """Async mirror of `get_residents`."""
+    offset = max(DEFAULT_OFFSET, int(offset))
+    limit = max(MIN_LIMIT, min(int(limit), MAX_LIMIT))
+
+    return await resident_repository.get_residents_async(
+        db, offset=offset, limit=limit, after_id=after_id
+    )
+
+
+async def get_resident_async(db: AsyncSession, resident_id: int) -> ResidentRead | None:
+    """Async mirror of `get_resident`."""
+    orm_res = await resident_repository.get_resident_async(db, resident_id)
+    if orm_res is None:
+        return None
+    return ResidentRead.model_validate(orm_res)
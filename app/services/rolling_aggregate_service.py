@@ -0,0 +1,111 @@
+"""Materialized rolling aggregates behind the trend insight.
+
+For every resident day and metric, `metric_rolling_daily` stores the sum and
+count of the non-null values over the last 7 and the last 28 rows ending on
+that day (see `MetricRollingDaily`). The trend of a resident is then the
+newest row of that table: baseline = sum_28 / count_28, last 7 days =
+sum_7 / count_7, instead of reading and averaging 28 rows per request.
+
+The write path calls `update_after_write` in the same transaction as the
+upsert. A write can change the aggregates of every later day within the next
+27 rows, so the aggregates are recomputed from the oldest written day onwards,
+using the 27 rows before it as context. Appending a day therefore needs 28
+rows and writes one row per metric; a backfill far in the past recomputes the
+history after it. The residents of a batch are handled together (see
+`RowBatch`), with a handful of statements per batch rather than per resident.
+
+The trend service reads the aggregates of the resident's newest stored day;
+when that day has none (rows appended outside the ingest path, or a database
+created before the table existed) it computes from the rows instead. As with
+the window stats, backfills and corrections written outside the ingest path
+are not detected: rebuild the table after such loads.
+
+The bulk rebuild computes the same sums with SQL window functions in the
+database instead (one INSERT ... SELECT per metric). Run it after a
+historical load with:
+    python -m app.services.rolling_aggregate_service
+"""
+
+from datetime import date
+from typing import Any, Dict, List, Mapping
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.repository import rolling_aggregate_repository
+from app.repository.insights_repository import METRIC_COLUMNS
+from app.repository.metric_series import RowBatch, window_sums
+from app.services.trend_service import BASELINE, LAST7
+
+WINDOWS = (LAST7, BASELINE)
+# context rows needed before the oldest changed row of a resident
+CONTEXT_ROWS = BASELINE - 1
+
+
+def rolling_rows(batch: RowBatch) -> List[Dict[str, Any]]:
+    """Aggregate rows for every changed row of the batch.
+
+    The batch must hold at least `CONTEXT_ROWS` context rows per resident, or
+    start at the resident's first row.
+    """
+    positions = batch.changed_positions()
+    values, in_segment = batch.windows(positions, BASELINE)
+    count_7, sum_7 = window_sums(values[..., -LAST7:])
+    count_28, sum_28 = window_sums(values)
+    resident_ids = np.array(batch.resident_ids)[batch.segment[positions]].tolist()
+    dates = [batch.dates[p] for p in positions.tolist()]
+    n_rows = in_segment.sum(axis=1).tolist()
+    out: List[Dict[str, Any]] = []
+    for i, metric in enumerate(METRIC_COLUMNS):
+        out.extend(
+            {
+                "resident_id": rid,
+                "metric": metric,
+                "date": d,
+                "n_rows": n,
+                "sum_7": s7,
+                "count_7": c7,
+                "sum_28": s28,
+                "count_28": c28,
+            }
+            for rid, d, n, s7, c7, s28, c28 in zip(
+                resident_ids,
+                dates,
+                n_rows,
+                sum_7[:, i].tolist(),
+                count_7[:, i].tolist(),
+                sum_28[:, i].tolist(),
+                count_28[:, i].tolist(),
+                strict=True,
+            )
+        )
+    return out
+
+
+def update_after_write(db: Session, starts: Mapping[int, date], batch: RowBatch) -> None:
+    """Bring the aggregates of every resident in the batch up to date.
+
+    Must run in the same transaction as the write, after the upsert.
+    - starts: resident id -> oldest day written (the changed rows of `batch`).
+    The windows of all residents are summed together and the new aggregates
+    are written with one delete per start date and one insert.
+    """
+    rolling_aggregate_repository.replace_from(db, starts, rolling_rows(batch))
+
+
+def rebuild_all(db: Session) -> None:
+    """Recompute the whole table from `inbed_daily` in bulk (window functions in SQL)."""
+    rolling_aggregate_repository.rebuild(db, WINDOWS)
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.database_config import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        rebuild_all(session)
+        print("Rebuilt the rolling aggregates.")
+    finally:
+        session.close()
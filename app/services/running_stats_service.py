@@ -0,0 +1,175 @@
+"""Incrementally maintained window statistics per resident and metric.
+
+For every resident and metric we keep count, sum and sum of squares of the
+values in the most recent `WINDOW` rows (see `MetricWindowStats`). The write
+path calls `update_after_write` in the same transaction as the upsert, which
+recomputes the window of every resident in the batch from rows read for all
+of them at once (independent of history length), vectorized across residents.
+
+Reading the z-score of the newest day (`score_latest`) is then a single row
+lookup plus a freshness check against the newest stored date. If the stats are
+missing or stale (rows written outside the ingest path) the window is
+recomputed in memory instead.
+
+Rebuild all stats (e.g. after a bulk load or for verification) with:
+    python -m app.services.running_stats_service
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.metric_window_stats import MetricWindowStats
+from app.repository import metric_stats_repository
+from app.repository.insights_repository import METRIC_COLUMNS
+from app.repository.metric_series import RowBatch, window_sums
+
+# Same window the anomaly endpoint analyses
+WINDOW: int = 30
+
+
+@dataclass
+class LatestScore:
+    """z-score of a resident's newest day against its window."""
+
+    date: date
+    value: float | None
+    mean: float
+    std: float
+    z_score: float | None
+
+
+def _value(row: Any, metric: str) -> float | None:
+    val = getattr(row, metric)
+    if val is None or math.isnan(val):
+        return None
+    return float(val)
+
+
+def _set_from_rows(stats: MetricWindowStats, rows_newest_first: Sequence[Any]) -> None:
+    """Recompute one metric's aggregates from the rows of its window."""
+    values = [v for v in (_value(r, stats.metric) for r in rows_newest_first) if v is not None]
+    stats.window_size = WINDOW
+    stats.n_rows = len(rows_newest_first)
+    stats.n_values = len(values)
+    stats.total = sum(values)
+    stats.total_sq = sum(v * v for v in values)
+    stats.first_date = rows_newest_first[-1].date if rows_newest_first else None
+    stats.last_date = rows_newest_first[0].date if rows_newest_first else None
+    stats.last_value = _value(rows_newest_first[0], stats.metric) if rows_newest_first else None
+
+
+def rebuild_resident(db: Session, resident_id: int) -> Dict[str, MetricWindowStats]:
+    """Recompute all metric stats of a resident from its newest `WINDOW` rows."""
+    rows = metric_stats_repository.get_latest_rows(db, resident_id, WINDOW)
+    existing = metric_stats_repository.get_stats(db, resident_id)
+    for metric in METRIC_COLUMNS:
+        stats = existing.get(metric)
+        if stats is None:
+            stats = MetricWindowStats(resident_id=resident_id, metric=metric)
+            db.add(stats)
+            existing[metric] = stats
+        _set_from_rows(stats, rows)
+    return existing
+
+
+def update_after_write(db: Session, batch: RowBatch) -> None:
+    """Bring the stats of every resident in the batch up to date.
+
+    Must run in the same transaction as the write, after the upsert. The
+    batch holds the newest rows of every resident written; all windows are
+    summed together and stored with one upsert, so a nightly push of many
+    residents costs a few statements in total.
+    """
+    positions = batch.ends[batch.ends > batch.starts] - 1
+    values, in_segment = batch.windows(positions, WINDOW)
+    n_values, total = window_sums(values)
+    _, total_sq = window_sums(values * values)
+    n_rows = in_segment.sum(axis=1)
+    first_dates = [batch.dates[p] for p in (positions - n_rows + 1).tolist()]
+    last_dates = [batch.dates[p] for p in positions.tolist()]
+    last_values = batch.values[positions]
+    resident_ids = np.array(batch.resident_ids)[batch.segment[positions]].tolist()
+    rows: List[Dict[str, Any]] = []
+    for i, metric in enumerate(METRIC_COLUMNS):
+        rows.extend(
+            {
+                "resident_id": rid,
+                "metric": metric,
+                "window_size": WINDOW,
+                "n_rows": n,
+                "n_values": count,
+                "total": tot,
+                "total_sq": tot_sq,
+                "first_date": first,
+                "last_date": last,
+                "last_value": None if math.isnan(value) else value,
+            }
+            for rid, n, count, tot, tot_sq, first, last, value in zip(
+                resident_ids,
+                n_rows.tolist(),
+                n_values[:, i].tolist(),
+                total[:, i].tolist(),
+                total_sq[:, i].tolist(),
+                first_dates,
+                last_dates,
+                last_values[:, i].tolist(),
+                strict=True,
+            )
+        )
+    metric_stats_repository.upsert_stats(db, rows)
+
+
+def _score(stats: MetricWindowStats) -> LatestScore:
+    n = stats.n_values
+    mean = stats.total / n if n else float("nan")
+    # population variance; clamp tiny negative values from float cancellation
+    var = max(stats.total_sq / n - mean * mean, 0.0) if n else float("nan")
+    std = math.sqrt(var)
+    value = stats.last_value
+    z = (value - mean) / std if value is not None and n >= 2 and std > 0 else None
+    return LatestScore(date=stats.last_date, value=value, mean=mean, std=std, z_score=z)
+
+
+def score_latest(db: Session, resident_id: int, metric: str) -> LatestScore | None:
+    """Return the z-score of the newest day for a resident/metric, or None if no data."""
+    if metric not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    stats = metric_stats_repository.get_metric_stats(db, resident_id, metric)
+    last_date = metric_stats_repository.get_last_date(db, resident_id)
+    if last_date is None:
+        return None
+
+    if stats is None or stats.window_size != WINDOW or stats.last_date != last_date:
+        # stale or missing: compute from the window without persisting (read path)
+        rows = metric_stats_repository.get_latest_rows(db, resident_id, WINDOW)
+        stats = MetricWindowStats(resident_id=resident_id, metric=metric)
+        _set_from_rows(stats, rows)
+    return _score(stats)
+
+
+def rebuild_all(db: Session) -> int:
+    """Recompute the stats of every resident with data. Returns residents processed."""
+    resident_ids = [r[0] for r in db.query(InBedDaily.resident_id).distinct().all()]
+    for resident_id in resident_ids:
+        if resident_id is not None:
+            rebuild_resident(db, resident_id)
+    db.commit()
+    return len(resident_ids)
+
+
+if __name__ == "__main__":
+    from app.database_config import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        print(f"Rebuilt window stats for {rebuild_all(session)} residents.")
+    finally:
+        session.close()
@@ -0,0 +1,48 @@
+"""All-metrics insight summary for one resident.
+
+Fetches the analysis window for every metric with a single query and runs the
+trend, change-point and anomaly analyses over those shared rows, instead of
+one query per metric and analysis.
+"""
+
+from sqlalchemy.orm import Session
+
+from app.repository import insights_repository
+from app.schemas.summary import InsightSummaryRead, MetricInsights
+from app.services import anomaly_service, change_point_service, trend_service
+from app.services.instrumentation import stage
+
+# Rows analysed by the summary and the per-metric change-point / anomaly endpoints
+DEFAULT_WINDOW = 30
+
+
+def compute_summary(
+    resident_id: int, db: Session, window: int = DEFAULT_WINDOW
+) -> InsightSummaryRead | None:
+    """Compute trend, change points and anomalies for every metric.
+
+    The trend uses the newest `trend_service.BASELINE` rows of the window, the
+    other analyses use the whole window, so each result matches its per-metric
+    endpoint. Returns None when the resident has no data at all. Raises
+    `AnalysisUnavailableError` like the change-point endpoint does.
+    """
+    with stage("summary", "fetch"):
+        series_by_metric = insights_repository.get_last_n_series_all_metrics(
+            resident_id, max(window, trend_service.BASELINE), db
+        )
+    if not any(len(s) for s in series_by_metric.values()):
+        return None
+
+    metrics = {}
+    for metric, series in series_by_metric.items():
+        window_series = series.tail(window)
+        metrics[metric] = MetricInsights(
+            trend=trend_service.trend_from_series(
+                resident_id, metric, series.tail(trend_service.BASELINE)
+            ),
+            change_points=change_point_service.change_points_from_series(
+                resident_id, metric, window_series
+            ),
+            anomalies=anomaly_service.anomalies_from_series(resident_id, metric, window_series),
+        )
+    return InsightSummaryRead(resident_id=resident_id, window_days=window, metrics=metrics)
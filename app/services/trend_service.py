@@ -1,10 +1,21 @@
-from typing import Any, List, Tuple
+import logging
+import math
+from datetime import date
+from typing import Any, List, Sequence, Tuple
 
-import pandas as pd
+import numpy as np
 from sqlalchemy.orm import Session
 
-from app.repository import insights_repository
+from app.repository import insights_repository, rolling_aggregate_repository
+from app.repository.metric_series import MetricSeries
 from app.schemas.trend import TrendRead
+from app.services.formatting import format_seconds_h_min
+from app.services.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+# service label of the stage timings
+SERVICE = "trend"
 
 BASELINE: int = 28
 LAST7: int = 7
@@ -12,31 +23,17 @@ LAST7: int = 7
 # -- helpers ---------------------------------------------------------------
 
 
-def records_to_df(rows: List[Tuple[Any, Any]]) -> pd.DataFrame:
-    """Convert DB rows into a DataFrame.
-
-    The repository returns a list of tuples (date, value) ordered oldest->newest.
-    This helper ensures we always have a DataFrame with columns ["date","value"].
-    """
-    # If no rows, return an empty DataFrame with the expected columns.
-    return (
-        pd.DataFrame(rows, columns=["date", "value"])
-        if rows
-        else pd.DataFrame(columns=["date", "value"])
-    )
-
-
-def compute_baseline_last7(values: pd.Series) -> Tuple[float, float]:
+def compute_baseline_last7(series: MetricSeries) -> Tuple[float, float]:
     """Compute the baseline (mean of last 28) and last-7 mean from a series.
 
-    - values: pandas Series of numeric metric values (seconds) ordered oldest->newest
+    - series: metric values (seconds) ordered oldest->newest; missing values are skipped
     - Returns a tuple (baseline_seconds, last7_seconds). Returns NaN pair if insufficient data.
     """
-    if values is None or values.empty or len(values) < LAST7:
+    if series is None or len(series) < LAST7:
         return (float("nan"), float("nan"))
     # baseline uses up to the last 28 records, last7 uses the last 7 records
-    baseline_val = values.tail(BASELINE).mean()
-    last7_val = values.tail(LAST7).mean()
+    baseline_val = series.tail(BASELINE).mean()
+    last7_val = series.tail(LAST7).mean()
     return (baseline_val, last7_val)
 
 
@@ -53,7 +50,7 @@ def format_description(metric_name: str, diff_sec: float) -> str:
     - The description uses absolute hours/minutes for readability and states direction
       via words (increased/decreased).
     """
-    if pd.isna(diff_sec):
+    if math.isnan(diff_sec):
         return "insufficient data"
     # avoid noisy micro-changes
     if abs(diff_sec) < 60.0:
@@ -72,32 +69,38 @@ def format_description(metric_name: str, diff_sec: float) -> str:
     return f"{human_metric} {verb} by {time_str}"
 
 
-def format_seconds_h_min(val_sec: float) -> str:
-    """Format seconds into a concise 'Xh Ymin' string.
+def build_trend(resident_id: int, metric: str, baseline_sec: float, last7_sec: float) -> TrendRead:
+    """Build the API response from the baseline and last-7 means (seconds)."""
+    difference_sec = last7_sec - baseline_sec
 
-    - Returns 'N/A' for NaN inputs.
-    - Always formats from the absolute value (we don't show a negative unit part).
-    - Examples: 9000 -> '2h 30min', 3600 -> '1h', 120 -> '2min'
-    """
-    if pd.isna(val_sec):
-        return "N/A"
-    sec = float(val_sec)
-    # Use absolute value so unit parts (hours/minutes) are never negative
-    sec_abs = abs(sec)
-    hours = int(sec_abs // 3600)
-    minutes = int((sec_abs % 3600) // 60)
-    if hours and minutes:
-        return f"{hours}h {minutes}min"
-    if hours:
-        return f"{hours}h"
-    return f"{minutes}min"
+    # human-friendly description (uses absolute units but states direction)
+    description = format_description(metric, difference_sec)
+
+    # format numeric fields as strings like '2h 30min'
+    baseline_hours = format_seconds_h_min(baseline_sec)
+    last7_hours = format_seconds_h_min(last7_sec)
+    difference_hours = format_seconds_h_min(difference_sec)
+
+    return TrendRead(
+        resident_id=resident_id,
+        baseline_hours=baseline_hours,
+        last_7_days_hours=last7_hours,
+        difference_hours=difference_hours,
+        description=description,
+    )
 
 
 # -- main API --------------------------------------------------------------
-def compute_trend(resident_id: int, metric: str, db: Session) -> TrendRead | None:
+def compute_trend(
+    resident_id: int, metric: str, db: Session, end: date | None = None
+) -> TrendRead | None:
     """Compute a trend insight for a resident's metric.
 
-    Steps:
+    With `end`, the trend as it was on that day: rows after it are ignored
+    (the aggregates of the newest day up to `end` are read).
+
+    Reads the precomputed sums of the newest day from `metric_rolling_daily`
+    when that day has them (see `rolling_aggregate_service`); otherwise:
     1. Fetch up to BASELINE rows from the repository (oldest->newest).
     2. Require at least 7 rows to compute a last-7 average; otherwise return None.
     3. Compute baseline (mean of last 28) and last-7 mean — both in seconds.
@@ -107,38 +110,101 @@ def compute_trend(resident_id: int, metric: str, db: Session) -> TrendRead | Non
     Returns a `TimeInBedInsight` (schema fields are human-readable strings).
     """
 
-    # Fetch rows as (date, value)
-    records: List[Tuple[Any, Any]] = insights_repository.get_last_n_metric_rows(
-        resident_id, metric, BASELINE, db
-    )
-
+    with stage(SERVICE, "fetch"):
+        if end is None:
+            rolling = rolling_aggregate_repository.get_current(db, resident_id, metric)
+        else:
+            rolling = rolling_aggregate_repository.get_as_of(db, resident_id, metric, end)
+        if rolling is None:
+            # Fetch the series (oldest->newest)
+            series = insights_repository.get_last_n_metric_series(
+                resident_id, metric, BASELINE, db, end=end
+            )
+    if rolling is not None:
+        return trend_from_rolling(resident_id, metric, rolling)
+    return trend_from_series(resident_id, metric, series)
+
+
+def trend_from_series(resident_id: int, metric: str, series: MetricSeries) -> TrendRead | None:
+    """Compute the trend insight from an already fetched series (oldest->newest).
+
+    Pure computation (no database access), shared by the sync and async routes.
+    """
     # quick guard: need at least 7 records to compute a 7-day average
-    if not records or len(records) < LAST7:
-        return None
-
-    # convert to DataFrame for easy slicing/aggregation
-    df = records_to_df(records)
-    print(f"data frame: {df}")
-    if df.empty or len(df) < 7:
+    if len(series) < LAST7:
         return None
 
     # compute baseline and last7 in seconds
-    baseline_sec, last7_sec = compute_baseline_last7(df["value"])  # seconds
-    difference_sec = last7_sec - baseline_sec
-    print(f"difference: {difference_sec}")
+    with stage(SERVICE, "analysis"):
+        baseline_sec, last7_sec = compute_baseline_last7(series)  # seconds
+    logger.debug(
+        "trend resident=%s metric=%s baseline=%.1f last7=%.1f",
+        resident_id,
+        metric,
+        baseline_sec,
+        last7_sec,
+    )
 
-    # human-friendly description (uses absolute units but states direction)
-    description = format_description(metric, difference_sec)
+    with stage(SERVICE, "serialize"):
+        return build_trend(resident_id, metric, baseline_sec, last7_sec)
 
-    # format numeric fields as strings like '2h 30min'
-    baseline_hours = format_seconds_h_min(baseline_sec)
-    last7_hours = format_seconds_h_min(last7_sec)
-    difference_hours = format_seconds_h_min(difference_sec)
 
-    return TrendRead(
-        resident_id=resident_id,
-        baseline_hours=baseline_hours,
-        last_7_days_hours=last7_hours,
-        difference_hours=difference_hours,
-        description=description,
-    )
+def trend_from_rolling(resident_id: int, metric: str, rolling: Any) -> TrendRead | None:
+    """Compute the trend insight from the materialized aggregates of the newest day.
+
+    `rolling` carries the `MetricRollingDaily` columns (ORM object or result row).
+    """
+    if rolling.n_rows < LAST7:
+        return None
+    baseline_sec = rolling.sum_28 / rolling.count_28 if rolling.count_28 else float("nan")
+    last7_sec = rolling.sum_7 / rolling.count_7 if rolling.count_7 else float("nan")
+    with stage(SERVICE, "serialize"):
+        return build_trend(resident_id, metric, baseline_sec, last7_sec)
+
+
+def compute_cohort_trend(
+    metric: str, db: Session, resident_ids: Sequence[int] | None = None
+) -> List[TrendRead]:
+    """Compute the trend insight for many residents at once.
+
+    Same result per resident as `compute_trend`, but the rows of every resident
+    are fetched in one query and the baseline / last-7 means are computed for
+    all residents in one vectorized pass (grouped sums via np.bincount).
+    Residents with fewer than 7 rows are left out. `resident_ids=None` means
+    all residents.
+    """
+    with stage("cohort_trend", "fetch"):
+        rows = insights_repository.get_last_n_metric_rows_for_residents(
+            metric, BASELINE, db, resident_ids
+        )
+    if not rows:
+        return []
+
+    with stage("cohort_trend", "analysis"):
+        resident_col = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        rank_col = np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows))
+        value_col = np.array([np.nan if r[2] is None else r[2] for r in rows], dtype=np.float64)
+
+        # group index per row; pandas-style means skip missing values
+        ids, group = np.unique(resident_col, return_inverse=True)
+        n_groups = len(ids)
+        present = ~np.isnan(value_col)
+        filled = np.where(present, value_col, 0.0)
+        in_last7 = rank_col <= LAST7
+
+        n_rows = np.bincount(group, minlength=n_groups)
+        base_sum = np.bincount(group, weights=filled, minlength=n_groups)
+        base_cnt = np.bincount(group, weights=present, minlength=n_groups)
+        last7_sum = np.bincount(group, weights=filled * in_last7, minlength=n_groups)
+        last7_cnt = np.bincount(group, weights=present & in_last7, minlength=n_groups)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            baseline = np.where(base_cnt > 0, base_sum / base_cnt, np.nan)
+            last7 = np.where(last7_cnt > 0, last7_sum / last7_cnt, np.nan)
+
+    with stage("cohort_trend", "serialize"):
+        return [
+            build_trend(int(ids[i]), metric, float(baseline[i]), float(last7[i]))
+            for i in range(n_groups)
+            if n_rows[i] >= LAST7
+        ]
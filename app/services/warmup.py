@@ -0,0 +1,163 @@
+"""Startup warm-up and readiness.
+
+Importing the app only loads what routing needs; pandas is used by the CSV
+import command alone and change-point detection has no third-party analysis
+dependency any more. What is still expensive on a fresh worker happens the
+first time it is used: starting the analysis processes, the first query on a
+new connection, first calls into NumPy and pydantic validators. `warm_up` pays
+those costs once, in the background after startup, and then flips the
+readiness flag that `GET /ready` reports. Requests arriving earlier are still
+served (analyses run inline until the pool is up), only slower. A worker that
+cannot reach its database stays unready; each `GET /ready` after the warm-up
+retries the failed step (`recheck`) until it succeeds.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from app.database_config import engine, read_engine
+from app.repository.metric_series import MetricSeries
+from app.services import anomaly_service, change_point_service, trend_service
+from app.services.analysis_pool import analysis_pool
+
+logger = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Thread-safe readiness flag plus the duration of each warm-up step."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ready = False
+        self._steps: Dict[str, float] = {}
+        self._error: str | None = None
+        # required steps that failed in the warm-up, retried by `recheck`
+        self._failed: Tuple[str, ...] = ()
+        self._started = time.monotonic()
+        self._ready_after: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def record(self, step: str, seconds: float) -> None:
+        with self._lock:
+            self._steps[step] = seconds
+
+    @property
+    def failed(self) -> Tuple[str, ...]:
+        return self._failed
+
+    def fail(self, error: str) -> None:
+        with self._lock:
+            self._error = error
+
+    def hold(self, steps: Tuple[str, ...]) -> None:
+        with self._lock:
+            self._failed = steps
+
+    def mark_ready(self) -> None:
+        with self._lock:
+            self._ready = True
+            self._failed = ()
+            self._ready_after = time.monotonic() - self._started
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ready = False
+            self._steps = {}
+            self._error = None
+            self._failed = ()
+            self._started = time.monotonic()
+            self._ready_after = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ready": self._ready,
+                "ready_after_seconds": self._ready_after,
+                "steps_seconds": dict(self._steps),
+                "error": self._error,
+            }
+
+
+readiness = Readiness()
+
+
+def _warm_database() -> None:
+    # open the first pooled connection of each engine (runs the connection
+    # pragmas) and compile a statement
+    for e in (engine, read_engine):
+        with e.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+
+def _warm_analysis() -> None:
+    # one pass of every analysis over a synthetic window: first-call costs of
+    # NumPy, the PELT engine and the response models are paid here
+    start = date(2000, 1, 1)
+    values = 28800.0 + 600.0 * np.sin(np.arange(30))
+    rows = [(start + timedelta(days=i), float(v)) for i, v in enumerate(values)]
+    series = MetricSeries.from_rows(rows)
+    trend_service.trend_from_series(0, "time_in_bed", series)
+    anomaly_service.anomalies_from_series(0, "time_in_bed", series)
+    change_point_service.change_points_from_series(0, "time_in_bed", series)
+
+
+STEPS: Dict[str, Callable[[], None]] = {
+    "database": _warm_database,
+    "analysis_pool": analysis_pool.start,
+    "analysis": _warm_analysis,
+}
+# Steps whose failure keeps the app unready: nothing can be served without them
+REQUIRED_STEPS = ("database",)
+
+
+def warm_up() -> None:
+    """Run every warm-up step, record its duration and mark the app ready.
+
+    A failing step is logged and recorded as the readiness error. Only a
+    failed `REQUIRED_STEPS` step keeps the app unready, until `recheck`
+    succeeds; the others warm what also works (more slowly) when it is cold.
+    """
+    failed = []
+    for name, step in STEPS.items():
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception as exc:  # warm-up must never take the app down
+            logger.exception("warm-up step %s failed", name)
+            readiness.fail(f"{name}: {exc}")
+            if name in REQUIRED_STEPS:
+                failed.append(name)
+        readiness.record(name, time.perf_counter() - t0)
+    if failed:
+        readiness.hold(tuple(failed))
+    else:
+        readiness.mark_ready()
+
+
+def recheck() -> None:
+    """Retry the required steps that failed in the warm-up; ready once they pass.
+
+    Called by `GET /ready`, so the probe interval spaces the retries out. A
+    no-op while the warm-up is still running or once the app is ready.
+    """
+    failed = readiness.failed
+    if readiness.ready or not failed:
+        return
+    for name in failed:
+        try:
+            STEPS[name]()
+        except Exception as exc:
+            logger.warning("warm-up step %s still failing: %s", name, exc)
+            readiness.fail(f"{name}: {exc}")
+            return
+    logger.info("warm-up steps %s recovered", ", ".join(failed))
+    readiness.mark_ready()
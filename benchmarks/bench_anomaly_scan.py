@@ -0,0 +1,92 @@
+"""Sliding-window anomaly scan: one vectorized pass vs a loop over the windows.
+
+For synthetic series of increasing length, scores every day against the
+`WINDOW` rows ending on it with
+- loop: one window per day, mean/std (or median/MAD) recomputed from the slice,
+  i.e. what calling the windowed detector once per day costs
+- vectorized: `anomaly_service.rolling_zscores` and `rolling_robust_zscores`
+  (all windows at once from a strided view)
+and checks both give the same scores. The vectorized cost grows linearly with
+the series length.
+
+Usage:  python -m benchmarks.bench_anomaly_scan [--lengths 365 3650 36500]
+"""
+
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+from app.services.anomaly_service import MAD_SCALE, rolling_robust_zscores, rolling_zscores
+from app.services.running_stats_service import WINDOW
+from benchmarks.synthetic import generate_resident
+
+
+def loop_zscores(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    for i in range(len(values)):
+        win = values[max(0, i - window + 1) : i + 1]
+        win = win[~np.isnan(win)]
+        if np.isnan(values[i]) or len(win) < 2 or win.std() == 0:
+            continue
+        out[i] = (values[i] - win.mean()) / win.std()
+    return out
+
+
+def loop_robust(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    for i in range(len(values)):
+        win = values[max(0, i - window + 1) : i + 1]
+        win = win[~np.isnan(win)]
+        if np.isnan(values[i]) or len(win) < 2:
+            continue
+        median = np.median(win)
+        mad = np.median(np.abs(win - median))
+        if mad > 0:
+            out[i] = (values[i] - median) / (MAD_SCALE * mad)
+    return out
+
+
+def best_ms(fn, *args, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[365, 3650, 36500])
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", RuntimeWarning)
+    print(f"window {WINDOW} rows")
+    print(
+        f"{'days':>7} {'loop z':>9} {'vector z':>9} {'speedup':>8}"
+        f" {'loop mad':>9} {'vector mad':>10} {'speedup':>8}  (ms)"
+    )
+    for n in args.lengths:
+        rows = generate_resident(resident_id=1, n_days=n, seed=0)
+        values = np.array([np.nan if r["time_in_bed"] is None else r["time_in_bed"] for r in rows])
+        for loop, vector in (
+            (loop_zscores, rolling_zscores),
+            (loop_robust, rolling_robust_zscores),
+        ):
+            np.testing.assert_allclose(vector(values, WINDOW), loop(values, WINDOW), rtol=1e-6)
+        timings = [
+            best_ms(loop_zscores, values, WINDOW),
+            best_ms(rolling_zscores, values, WINDOW),
+            best_ms(loop_robust, values, WINDOW),
+            best_ms(rolling_robust_zscores, values, WINDOW),
+        ]
+        print(
+            f"{len(values):>7} {timings[0]:>9.2f} {timings[1]:>9.2f} {timings[0] / timings[1]:>7.0f}x"
+            f" {timings[2]:>9.2f} {timings[3]:>10.2f} {timings[2] / timings[3]:>7.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
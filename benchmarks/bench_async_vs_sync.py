@@ -0,0 +1,101 @@
+"""Compare concurrent-request throughput of the sync and async API stacks.
+
+Seeds a temporary SQLite database, then fires `--requests` requests with
+`--concurrency` in flight at once through an in-process ASGI transport, for
+the same endpoints on both stacks (/api/insights/... and /api/async/insights/...).
+The insight cache is disabled so every request does the full DB + analysis work.
+
+Usage:  python -m benchmarks.bench_async_vs_sync [--residents 200] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def seed(n_residents: int, n_days: int) -> None:
+    import app.main  # noqa: F401  (registers every model before create_all)
+    from app.database_config import Base, engine
+    from app.orm_models.inbed_daily import InBedDaily
+    from app.orm_models.resident import Resident
+
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    start = date.today() - timedelta(days=n_days)
+    with engine.begin() as conn:
+        conn.execute(
+            Resident.__table__.insert(),
+            [{"id": r, "name": f"Resident {r}"} for r in range(1, n_residents + 1)],
+        )
+        conn.execute(
+            InBedDaily.__table__.insert(),
+            [
+                {
+                    "resident_id": r,
+                    "date": start + timedelta(days=d),
+                    "time_in_bed": rng.gauss(28800, 3600),
+                    "at_rest": rng.gauss(20000, 2000),
+                }
+                for r in range(1, n_residents + 1)
+                for d in range(n_days)
+            ],
+        )
+
+
+async def run(paths, concurrency: int) -> float:
+    """Send all requests with bounded concurrency; returns requests per second."""
+    import httpx
+
+    from app.database_config import async_engine
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(path: str) -> None:
+            async with semaphore:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in paths))
+        elapsed = time.perf_counter() - started
+    # aiosqlite connections run in their own threads; close them on this loop
+    await async_engine.dispose()
+    return len(paths) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # must be configured before the app modules are imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ["INSIGHT_CACHE_SIZE"] = "0"
+        seed(args.residents, args.days)
+
+        rng = random.Random(1)
+        endpoints = ["trend/time_in_bed", "anomalies/time_in_bed", "changepoints/at_rest"]
+        requests = [
+            f"{rng.choice(endpoints)}/{rng.randint(1, args.residents)}"
+            for _ in range(args.requests)
+        ]
+
+        print(f"{args.requests} requests, concurrency {args.concurrency}")
+        for name, prefix in (("sync", "/api/insights/"), ("async", "/api/async/insights/")):
+            rps = asyncio.run(run([prefix + r for r in requests], args.concurrency))
+            print(f"{name:>6}: {rps:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Measure the cold-start budget of a fresh API worker.
+
+Reports, each as the median over `--runs` fresh processes:
+- import_ms: `import app.main` in a new interpreter
+- first_response_ms: process start until `GET /` answers (uvicorn worker)
+- ready_ms: process start until `GET /ready` answers 200 (warm-up finished)
+- first_insight_ms / second_insight_ms: latency of the first and second
+  change-point request once ready (first-call costs left after warm-up)
+
+The server runs against a temporary seeded SQLite database with the default
+analysis pool, so the numbers include spawning the worker processes. Use
+`--json` to write a machine-readable result to track between releases.
+
+Usage:  python -m benchmarks.bench_cold_start [--runs 5] [--json cold_start.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import httpx
+
+
+def seed(db_path: str, n_days: int = 60) -> None:
+    from sqlalchemy import create_engine
+
+    import app.main  # noqa: F401  (registers every model before create_all)
+    from app.database_config import Base
+    from app.orm_models.inbed_daily import InBedDaily
+    from app.orm_models.resident import Resident
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    start = date.today() - timedelta(days=n_days)
+    with engine.begin() as conn:
+        conn.execute(Resident.__table__.insert(), [{"id": 1, "name": "Resident 1"}])
+        conn.execute(
+            InBedDaily.__table__.insert(),
+            [
+                {
+                    "resident_id": 1,
+                    "date": start + timedelta(days=d),
+                    "time_in_bed": rng.gauss(28800, 3600),
+                }
+                for d in range(n_days)
+            ],
+        )
+    engine.dispose()
+
+
+def import_ms() -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip()) * 1000
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(client: httpx.Client, path: str, started: float, timeout: float = 60.0) -> float:
+    """Poll `path` until it answers 200; returns ms since `started`."""
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(path).status_code == 200:
+                return (time.perf_counter() - started) * 1000
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{path} did not answer within {timeout}s")
+
+
+def server_run(db_path: str) -> dict:
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", INSIGHT_CACHE_SIZE="0")
+    cmd = [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--port",
+        str(port),
+        "--log-level",
+        "warning",
+    ]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            first_response = wait_for(client, "/", started)
+            ready = wait_for(client, "/ready", started)
+            insight = []
+            for _ in range(2):
+                t0 = time.perf_counter()
+                client.get("/api/insights/changepoints/time_in_bed/1").raise_for_status()
+                insight.append((time.perf_counter() - t0) * 1000)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    return {
+        "first_response_ms": first_response,
+        "ready_ms": ready,
+        "first_insight_ms": insight[0],
+        "second_insight_ms": insight[1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", dest="json_path", help="also write the result to this file")
+    args = parser.parse_args()
+
+    samples: dict = {"import_ms": [import_ms() for _ in range(args.runs)]}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "cold_start.db")
+        seed(db_path)
+        for _ in range(args.runs):
+            for key, value in server_run(db_path).items():
+                samples.setdefault(key, []).append(value)
+
+    result = {key: round(statistics.median(values), 1) for key, values in samples.items()}
+    for key, value in result.items():
+        print(f"{key:>18} {value:>9.1f}")
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"runs": args.runs, **result}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Time multi-year insight queries: whole daily history vs SQL-side downsampling.
+
+Seeds one resident with `--years` of synthetic days and times:
+- daily series: every row of the range through `get_metric_range_series`
+- week / month buckets: the same range aggregated in SQL
+- history max_points: daily rows reduced to `--points` points with LTTB
+- change points / anomalies over the range at each resolution
+plus the size of the history response body at each setting.
+
+Usage:  python -m benchmarks.bench_history [--years 10] [--points 500]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from functools import partial
+
+os.environ.setdefault("ANALYSIS_POOL_WORKERS", "0")
+
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database_config import create_engines  # noqa: E402
+from app.repository import insights_repository  # noqa: E402
+from app.responses import FastJSONResponse  # noqa: E402
+from app.services import anomaly_service, change_point_service, history_service  # noqa: E402
+from benchmarks.synthetic import START, seed_database  # noqa: E402
+
+REPEATS = 20
+METRIC = "time_in_bed"
+
+
+def per_call_ms(fn) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - t0) / REPEATS * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--points", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, read = create_engines(f"sqlite:///{tmp}/history.db")
+        seed_database(write, 1, 365 * args.years)
+        try:
+            with sessionmaker(bind=read)() as db:
+                print(f"1 resident, {args.years} years from {START}")
+                print(f"{'query':<28} {'ms':>8} {'points':>7} {'body bytes':>11}")
+                for resolution in ("day", "week", "month"):
+                    series = partial(
+                        insights_repository.get_metric_range_series,
+                        1,
+                        METRIC,
+                        db,
+                        START,
+                        None,
+                        resolution,
+                    )
+                    history = partial(
+                        history_service.compute_history, 1, METRIC, db, START, None, resolution
+                    )
+                    body = FastJSONResponse(history()).body
+                    print(
+                        f"{'series ' + resolution:<28} {per_call_ms(series):>8.2f}"
+                        f" {len(series()):>7} {len(body):>11}"
+                    )
+                reduced = partial(
+                    history_service.compute_history,
+                    1,
+                    METRIC,
+                    db,
+                    START,
+                    None,
+                    "day",
+                    args.points,
+                )
+                result = reduced()
+                print(
+                    f"{f'history day max {args.points}':<28} {per_call_ms(reduced):>8.2f}"
+                    f" {len(result.points):>7} {len(FastJSONResponse(result).body):>11}"
+                )
+                for resolution in ("day", "week", "month"):
+                    for name, fn in (
+                        ("changepoints", change_point_service.compute_change_points),
+                        ("anomalies", anomaly_service.compute_anomalies),
+                    ):
+                        call = partial(fn, 1, METRIC, db, start=START, resolution=resolution)
+                        try:
+                            ms = f"{per_call_ms(call):>8.2f}"
+                        except change_point_service.RangeTooLargeError:
+                            ms = f"{'too long':>8}"
+                        print(f"{name + ' ' + resolution:<28} {ms}")
+        finally:
+            write.dispose()
+            read.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Throughput of the bulk upload endpoint (POST /api/ingest/daily).
+
+Seeds a temporary SQLite database with `--residents` x `--history` days, then
+uploads through the API (in-process TestClient, so no network):
+- nightly: one new day for every resident (NDJSON)
+- backfill: the last `--days` days of a tenth of the residents, rewritten (NDJSON)
+- csv: the nightly push again as CSV (updates only)
+
+Every upload includes the derived-data maintenance (window stats, rolling
+aggregates, online change points, revisions) of the write path. Reports rows/s
+per scenario.
+
+Usage:  python -m benchmarks.bench_ingest [--residents 10000] [--history 60] [--days 30]
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import create_engines
+from app.dependencies import get_db
+from app.main import app
+from benchmarks.synthetic import seed_database
+
+TODAY = date.today()
+
+
+def _record(resident_id: int, day: date) -> dict:
+    return {
+        "resident_id": resident_id,
+        "date": day.isoformat(),
+        "time_in_bed": 28800.0,
+        "at_rest": 20000.0,
+        "low_activity": 3000.0,
+        "high_activity": 1500.0,
+        "times_out_bed_night": 2,
+    }
+
+
+def ndjson(records) -> bytes:
+    return "".join(json.dumps(r) + "\n" for r in records).encode()
+
+
+def csv(records) -> bytes:
+    header = list(records[0])
+    lines = [",".join(header)] + [",".join(str(r[c]) for c in header) for r in records]
+    return ("\n".join(lines) + "\n").encode()
+
+
+def upload(client: TestClient, body: bytes, content_type: str) -> tuple[dict, float]:
+    t0 = time.perf_counter()
+    response = client.post(
+        "/api/ingest/daily", content=body, headers={"Content-Type": content_type}
+    )
+    elapsed = time.perf_counter() - t0
+    response.raise_for_status()
+    return response.json(), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=10_000)
+    parser.add_argument("--history", type=int, default=60, help="seeded days per resident")
+    parser.add_argument("--days", type=int, default=30, help="days per resident in the backfill")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, read = create_engines(f"sqlite:///{tmp}/ingest.db")
+        seed_database(
+            write, args.residents, args.history, start=TODAY - timedelta(days=args.history)
+        )
+        Session = sessionmaker(bind=write)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        nightly = [_record(i, TODAY) for i in range(1, args.residents + 1)]
+        backfill = [
+            _record(i, TODAY - timedelta(days=d))
+            for i in range(1, args.residents // 10 + 1)
+            for d in range(args.days, 0, -1)
+        ]
+        scenarios = [
+            ("nightly", ndjson(nightly), "application/x-ndjson", len(nightly)),
+            ("backfill", ndjson(backfill), "application/x-ndjson", len(backfill)),
+            ("csv", csv(nightly), "text/csv", len(nightly)),
+        ]
+        print(f"{'scenario':<10} {'rows':>8} {'inserted':>9} {'updated':>8} {'s':>7} {'rows/s':>8}")
+        try:
+            # no lifespan: the startup warm-up would touch the configured database
+            client = TestClient(app)
+            for name, body, content_type, n_rows in scenarios:
+                result, elapsed = upload(client, body, content_type)
+                print(
+                    f"{name:<10} {n_rows:>8} {result['inserted']:>9} {result['updated']:>8}"
+                    f" {elapsed:>7.2f} {n_rows / elapsed:>8.0f}"
+                )
+        finally:
+            app.dependency_overrides.clear()
+            write.dispose()
+            read.dispose()
+
+
+if __name__ == "__main__":
+    main()
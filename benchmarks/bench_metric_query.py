@@ -0,0 +1,89 @@
+"""Benchmark `get_last_n_metric_rows` as the inbed_daily table grows.
+
+Builds a temporary SQLite database with N residents x 365 days, then times the
+insight query (last 30 rows of one metric for one resident) with and without
+the (resident_id, date) index. With the index the query time should stay flat
+as the table grows; without it every call scans and sorts the table.
+
+Usage:  python -m benchmarks.bench_metric_query [--residents 10 100 1000] [--days 365]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import Base
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident  # noqa: F401  (registers the FK target)
+from app.repository.insights_repository import get_last_n_metric_rows
+
+QUERIES = 200
+
+
+def build_db(path: str, n_residents: int, n_days: int, with_index: bool):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    if not with_index:
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX ux_inbed_daily_resident_date"))
+
+    start = date(2020, 1, 1)
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        for day in range(n_days):
+            conn.execute(
+                InBedDaily.__table__.insert(),
+                [
+                    {
+                        "resident_id": r,
+                        "date": start + timedelta(days=day),
+                        "time_in_bed": rng.gauss(28800, 3600),
+                        "at_rest": rng.gauss(20000, 2000),
+                        "low_activity": rng.gauss(5000, 800),
+                        "high_activity": rng.gauss(3800, 500),
+                    }
+                    for r in range(1, n_residents + 1)
+                ],
+            )
+    return engine
+
+
+def time_queries(engine, n_residents: int) -> float:
+    """Return the mean query time in milliseconds."""
+    Session = sessionmaker(bind=engine)
+    rng = random.Random(1)
+    with Session() as db:
+        get_last_n_metric_rows(1, "time_in_bed", 30, db)  # warm the page cache
+        t0 = time.perf_counter()
+        for _ in range(QUERIES):
+            get_last_n_metric_rows(rng.randint(1, n_residents), "time_in_bed", 30, db)
+        elapsed = time.perf_counter() - t0
+    return elapsed / QUERIES * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+
+    print(f"{'residents':>10} {'rows':>10} {'no index (ms)':>14} {'index (ms)':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.residents:
+            timings = []
+            for with_index in (False, True):
+                path = os.path.join(tmp, f"bench_{n}_{int(with_index)}.db")
+                engine = build_db(path, n, args.days, with_index)
+                timings.append(time_queries(engine, n))
+                engine.dispose()
+            print(f"{n:>10} {n * args.days:>10} {timings[0]:>14.3f} {timings[1]:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
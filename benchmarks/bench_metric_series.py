@@ -0,0 +1,100 @@
+"""Compare the pandas window preparation with `MetricSeries`.
+
+Times what the insight services do per request before any analysis: turn the
+newest-first cursor rows of one metric into an oldest-first series, fill gaps
+and take the window statistics (trend means, anomaly mean/std). The pandas
+column reproduces the code the services used before (reverse + copy the rows
+into tuples, build a DataFrame, `ffill().bfill()`, `mean()` / `std()`).
+"End to end" adds the indexed query on a small SQLite database.
+
+Usage:  python -m benchmarks.bench_metric_series [--windows 7 30 365]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import Base
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident  # noqa: F401  (registers the FK target)
+from app.repository.insights_repository import _last_n_metric_rows_stmt
+from app.repository.metric_series import MetricSeries
+
+REPEATS = 2000
+
+
+def pandas_prepare(rows) -> tuple:
+    records = [(r[0], r[1]) for r in reversed(rows)]
+    df = pd.DataFrame(records, columns=["date", "value"])
+    values = df["value"].ffill().bfill()
+    return values.tail(28).mean(), values.tail(7).mean(), values.mean(), values.std(ddof=0)
+
+
+def series_prepare(rows) -> tuple:
+    series = MetricSeries.from_rows(rows, newest_first=True).filled()
+    return series.tail(28).mean(), series.tail(7).mean(), series.mean(), series.std()
+
+
+def per_call_us(fn, *args) -> float:
+    fn(*args)
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(*args)
+    return (time.perf_counter() - t0) / REPEATS * 1e6
+
+
+def build_session(n_days: int):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    rng = random.Random(0)
+    start = date(2020, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            InBedDaily.__table__.insert(),
+            [
+                {
+                    "resident_id": 1,
+                    "date": start + timedelta(days=d),
+                    "time_in_bed": None if d % 11 == 5 else rng.gauss(28800, 3600),
+                }
+                for d in range(n_days)
+            ],
+        )
+    return sessionmaker(bind=engine)()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, nargs="+", default=[7, 30, 365])
+    args = parser.parse_args()
+
+    db = build_session(max(args.windows))
+    print(
+        f"{'window':>7} {'pandas (us)':>12} {'series (us)':>12} {'end to end pandas/series (us)':>31}"
+    )
+    for window in args.windows:
+        stmt = _last_n_metric_rows_stmt(1, "time_in_bed", window)
+        rows = db.execute(stmt).all()
+        assert all(
+            (a == b) or (a != a and b != b)
+            for a, b in zip(pandas_prepare(rows), series_prepare(rows), strict=True)
+        )
+        prep = [per_call_us(pandas_prepare, rows), per_call_us(series_prepare, rows)]
+        e2e = [
+            per_call_us(lambda f=f, stmt=stmt: f(db.execute(stmt).all()))
+            for f in (pandas_prepare, series_prepare)
+        ]
+        print(
+            f"{window:>7} {prep[0]:>12.1f} {prep[1]:>12.1f} "
+            f"{e2e[0]:>14.1f} / {e2e[1]:<8.1f} ({e2e[0] / e2e[1]:.1f}x)"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Cost of keeping a resident's change points current as days arrive.
+
+For synthetic series of increasing length (one metric, days with a value):
+- rerun: PELT (`Pelt(jump=1)`) over the whole history, i.e. what re-detecting
+  from scratch on every new day costs
+- online: one new day with `online_change_point_service.OnlineDetector`,
+  including loading and storing its state (`from_row` / `to_row`), averaged
+  over the last `--days` days
+and the stored state size. Also counts how many of the online change points
+the rerun finds as well (all of them while the candidate bound is not hit;
+beyond it a change can land a day off). The online cost does not grow with
+the history.
+
+Usage:  python -m benchmarks.bench_online_changepoints [--lengths 365 3650 36500]
+"""
+
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.online_change_point_service import PENALTY, WARMUP, OnlineDetector, noise_scale
+from app.services.pelt import Pelt
+from benchmarks.synthetic import generate_resident
+
+
+def best_ms(fn, *args, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[365, 3650, 36500])
+    parser.add_argument("--days", type=int, default=100, help="days timed per online run")
+    args = parser.parse_args()
+
+    print(
+        f"{'days':>7} {'rerun ms':>9} {'online us/day':>14} {'state bytes':>12}"
+        f" {'change points':>14} {'as rerun':>9}"
+    )
+    for n in args.lengths:
+        rows = [r for r in generate_resident(1, n, seed=0) if r["time_in_bed"] is not None]
+        days = [r["date"] for r in rows]
+        values = np.array([r["time_in_bed"] for r in rows])
+
+        offset, scale = noise_scale(values[:WARMUP])
+        signal = (values - offset) / scale
+        rerun = best_ms(lambda signal=signal: Pelt(jump=1).fit(signal).predict(pen=PENALTY))
+        batch = Pelt(jump=1).fit(signal).predict(pen=PENALTY)[:-1]
+
+        detector = OnlineDetector()
+        for day, value in zip(days[: -args.days], values[: -args.days].tolist(), strict=True):
+            detector.add(day, value)
+        t0 = time.perf_counter()
+        for day, value in zip(days[-args.days :], values[-args.days :].tolist(), strict=True):
+            row = SimpleNamespace(**detector.to_row(1, "time_in_bed"))
+            detector = OnlineDetector.from_row(row)
+            detector.add(day, value)
+        online_us = (time.perf_counter() - t0) / args.days * 1e6
+        stored = detector.to_row(1, "time_in_bed")
+
+        online = [i + 1 for i, _, _ in detector.change_points()]
+        same = len(set(online) & set(batch))
+        print(
+            f"{n:>7} {rerun:>9.1f} {online_us:>14.0f} {len(stored['state']):>12}"
+            f" {len(online):>14} {f'{same}/{len(online)}':>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
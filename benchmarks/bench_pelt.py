@@ -0,0 +1,67 @@
+"""Compare the NumPy PELT engine with ruptures.Pelt(model="l2").
+
+Times `fit(...).predict(pen=1)` on standardized synthetic series (noise plus a
+few level shifts) of 30, 365 and 3650 days, checks that both return the same
+breakpoints, and reports the one-off import cost of each module.
+
+Usage:  python -m benchmarks.bench_pelt [--lengths 30 365 3650]
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+
+def import_seconds(module: str) -> float:
+    """Wall time to import `module` in a fresh interpreter (numpy already loaded)."""
+    code = f"import numpy, time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip())
+
+
+def series(n: int, rng: np.random.Generator) -> np.ndarray:
+    x = rng.normal(0, 1, n)
+    for _ in range(max(1, n // 100)):
+        x[rng.integers(0, n) :] += rng.normal(0, 2)
+    return (x - x.mean()) / x.std()
+
+
+def best_time(fn, repeats: int) -> float:
+    """Best-of-`repeats` wall time of `fn()` in milliseconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[30, 365, 3650])
+    args = parser.parse_args()
+
+    import ruptures as rpt
+
+    from app.services.pelt import Pelt
+
+    print(f"import ruptures: {import_seconds('ruptures') * 1000:8.1f} ms")
+    print(f"import pelt:     {import_seconds('app.services.pelt') * 1000:8.1f} ms")
+    print(f"{'days':>6} {'ruptures (ms)':>14} {'numpy (ms)':>11} {'speedup':>8} {'same':>5}")
+
+    rng = np.random.default_rng(0)
+    for n in args.lengths:
+        x = series(n, rng)
+        repeats = 20 if n <= 365 else 3
+        expected = rpt.Pelt(model="l2").fit(x).predict(pen=1)
+        same = Pelt(model="l2").fit(x).predict(pen=1) == expected
+        t_rpt = best_time(lambda x=x: rpt.Pelt(model="l2").fit(x).predict(pen=1), repeats)
+        t_np = best_time(lambda x=x: Pelt(model="l2").fit(x).predict(pen=1), repeats)
+        print(f"{n:>6} {t_rpt:>14.2f} {t_np:>11.2f} {t_rpt / t_np:>7.1f}x {str(same):>5}")
+
+
+if __name__ == "__main__":
+    main()
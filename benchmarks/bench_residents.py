@@ -0,0 +1,103 @@
+"""Compare offset pagination over ORM objects with keyset pagination over columns.
+
+Seeds `--residents` residents into a temporary SQLite database and times one
+page of `--limit` residents at increasing depths:
+- offset_orm: what `GET /api/residents/` did before (OFFSET/LIMIT over
+  `Resident` objects, then `ResidentRead.model_validate` per row)
+- keyset: `residents_service.get_residents` with `after_id` (primary-key
+  range scan, rows mapped to dicts)
+- http offset / http keyset: the same through the endpoint (in-process client)
+
+Usage:  python -m benchmarks.bench_residents [--residents 100000] [--limit 50]
+"""
+
+import argparse
+import tempfile
+import time
+from functools import partial
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import Base, create_engines
+from app.dependencies import get_read_db
+from app.main import app
+from app.orm_models.resident import Resident
+from app.schemas.resident import ResidentRead
+from app.services import residents_service
+
+REPEATS = 50
+
+
+def offset_orm(db, offset: int, limit: int) -> list:
+    residents = db.query(Resident).order_by(Resident.id).offset(offset).limit(limit).all()
+    return [ResidentRead.model_validate(r) for r in residents]
+
+
+def keyset(db, offset: int, limit: int) -> list:
+    # ids are dense here, so the page after id `offset` is the page at `offset`
+    return residents_service.get_residents(db, limit=limit, after_id=offset)
+
+
+def per_call_ms(fn) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - t0) / REPEATS * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, read = create_engines(f"sqlite:///{tmp}/residents.db")
+        Base.metadata.create_all(write)
+        with write.begin() as conn:
+            conn.execute(
+                Resident.__table__.insert(),
+                [
+                    {"id": i, "name": f"Resident {i}", "room_number": str(100 + i % 400)}
+                    for i in range(1, args.residents + 1)
+                ],
+            )
+        Session = sessionmaker(bind=read)
+
+        def override_get_db():
+            db = Session()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_read_db] = override_get_db
+        client = TestClient(app)
+        depths = [0, args.residents // 10, args.residents // 2, args.residents - args.limit]
+        print(
+            f"{'depth':>8} {'offset_orm':>11} {'keyset':>8} {'http offset':>12} {'http keyset':>12}  (ms)"
+        )
+        try:
+            with Session() as db:
+                for depth in depths:
+                    offset_params = {"offset": depth, "limit": args.limit}
+                    keyset_params = {"after_id": depth, "limit": args.limit}
+                    timings = [
+                        per_call_ms(partial(offset_orm, db, depth, args.limit)),
+                        per_call_ms(partial(keyset, db, depth, args.limit)),
+                        per_call_ms(partial(client.get, "/api/residents/", params=offset_params)),
+                        per_call_ms(partial(client.get, "/api/residents/", params=keyset_params)),
+                    ]
+                    widths = (11, 8, 12, 12)
+                    cells = " ".join(f"{t:>{w}.2f}" for t, w in zip(timings, widths, strict=True))
+                    print(f"{depth:>8} {cells}")
+        finally:
+            app.dependency_overrides.clear()
+            write.dispose()
+            read.dispose()
+
+
+if __name__ == "__main__":
+    main()
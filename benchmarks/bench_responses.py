@@ -0,0 +1,117 @@
+"""Bytes and CPU per response: FastAPI's default JSON path vs `app.responses`.
+
+Builds real payloads from a temporary database (`--residents` x 30 days):
+- trend: one `TrendRead`
+- summary: one `InsightSummaryRead` (4 metrics x 3 analyses)
+- cohort: `GET /api/insights/trend/{metric}` for every resident
+- residents: one page of 500 resident dicts
+
+For each it reports the encoding time of the default path (validate against
+the response model, convert to Python objects, `json.dumps`) and of
+`FastJSONResponse` (one pass through pydantic-core), the body size, and the
+gzip size and time at the configured level (only applied above GZIP_MIN_SIZE).
+
+Usage:  python -m benchmarks.bench_responses [--residents 1000]
+"""
+
+import argparse
+import gzip
+import os
+import tempfile
+import time
+from typing import Any, Callable, List
+
+os.environ.setdefault("ANALYSIS_POOL_WORKERS", "0")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database_config import create_engines  # noqa: E402
+from app.responses import GZIP_LEVEL, GZIP_MIN_SIZE, FastJSONResponse  # noqa: E402
+from app.schemas.resident import ResidentRead  # noqa: E402
+from app.schemas.summary import InsightSummaryRead  # noqa: E402
+from app.schemas.trend import TrendRead  # noqa: E402
+from app.services import residents_service, summary_service, trend_service  # noqa: E402
+from benchmarks.synthetic import seed_database  # noqa: E402
+
+REPEATS = 200
+
+
+def default_path(model_type: Any, content: Any) -> Callable[[], bytes]:
+    """What FastAPI does with an endpoint's return value and `response_model`."""
+    field = create_model_field(name="Response", type_=model_type, mode="serialization")
+
+    def encode() -> bytes:
+        value, errors = field.validate(content, {}, loc=("response",))
+        assert not errors
+        data = field.serialize(
+            value,
+            include=None,
+            exclude=None,
+            by_alias=True,
+            exclude_unset=False,
+            exclude_defaults=False,
+            exclude_none=False,
+        )
+        return JSONResponse(data).body
+
+    return encode
+
+
+def per_call_us(fn, repeats: int = REPEATS) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - t0) / repeats * 1e6
+
+
+def payloads(db) -> List[tuple]:
+    cohort = trend_service.compute_cohort_trend("time_in_bed", db, None)
+    return [
+        ("trend", TrendRead, trend_service.compute_trend(1, "time_in_bed", db)),
+        ("summary", InsightSummaryRead, summary_service.compute_summary(1, db)),
+        (f"cohort x{len(cohort)}", List[TrendRead], cohort),
+        ("residents x500", List[ResidentRead], residents_service.get_residents(db, limit=500)),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, read = create_engines(f"sqlite:///{tmp}/responses.db")
+        seed_database(write, args.residents, 30)
+        with sessionmaker(bind=read)() as db:
+            cases = payloads(db)
+        write.dispose()
+        read.dispose()
+
+    print(f"gzip level {GZIP_LEVEL}, applied from {GZIP_MIN_SIZE} bytes")
+    print(
+        f"{'payload':<16} {'default us':>10} {'fast us':>8} {'saved':>6}"
+        f" {'bytes':>8} {'gzip bytes':>10} {'gzip us':>8}"
+    )
+    for name, model_type, content in cases:
+        default = per_call_us(default_path(model_type, content))
+        fast = per_call_us(lambda content=content: FastJSONResponse(content).body)
+        body = FastJSONResponse(content).body
+        assert body == default_path(model_type, content)()
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        gzip_us = per_call_us(lambda body=body: gzip.compress(body, compresslevel=GZIP_LEVEL))
+        gzip_cells = (
+            f"{len(compressed):>10} {gzip_us:>8.0f}"
+            if len(body) >= GZIP_MIN_SIZE
+            else f"{'-':>10} {'-':>8}"
+        )
+        print(
+            f"{name:<16} {default:>10.0f} {fast:>8.0f} {1 - fast / default:>6.0%}"
+            f" {len(body):>8} {gzip_cells}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Window reads from SQLite vs the memory-mapped series store.
+
+Seeds a temporary database (`--residents` x `--days`, synthetic data with
+missing days), builds the store from it (`SeriesStore.rebuild`, what
+`python -m app.repository.series_store` does) and times, per window size,
+`get_last_n_metric_series` for random residents:
+- sql: the indexed query plus building the arrays from the rows
+- store: a copy of the slice of the mapped grid
+Also reports the rebuild time and the size of the store files (allocated on
+disk; the grids are sparse files until written).
+
+Usage:  python -m benchmarks.bench_series_store [--residents 1000] [--days 365]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import create_engines
+from app.repository import insights_repository
+from app.repository.inbed_daily_repository import iter_daily_rows
+from app.repository.series_store import SeriesStore
+from benchmarks.synthetic import seed_database
+
+REPEATS = 2000
+
+
+def per_call_us(fn, residents) -> float:
+    t0 = time.perf_counter()
+    for resident_id in residents:
+        fn(resident_id)
+    return (time.perf_counter() - t0) / len(residents) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--residents", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--windows", type=int, nargs="+", default=[7, 30, 365])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write, read = create_engines(f"sqlite:///{tmp}/store.db")
+        seed_database(write, args.residents, args.days)
+        store = SeriesStore(os.path.join(tmp, "series"), list(insights_repository.METRIC_COLUMNS))
+        with sessionmaker(bind=read)() as db:
+            t0 = time.perf_counter()
+            rows = (
+                (r.resident_id, r.date, *(getattr(r, m) for m in store.metrics))
+                for batch in iter_daily_rows(db, None, None, None, 10_000)
+                for r in batch
+            )
+            store.rebuild(rows)
+            rebuild_s = time.perf_counter() - t0
+            size = sum(
+                os.stat(os.path.join(store.path, f)).st_blocks * 512 for f in os.listdir(store.path)
+            )
+            print(
+                f"{args.residents} residents x {args.days} days: rebuilt in {rebuild_s:.1f} s,"
+                f" {size / 1e6:.1f} MB on disk"
+            )
+
+            rng = random.Random(0)
+            residents = [rng.randint(1, args.residents) for _ in range(REPEATS)]
+            print(f"{'window':>7} {'sql us':>8} {'store us':>9} {'speedup':>8}")
+            for window in args.windows:
+                for resident_id in residents[:20]:
+                    sql = insights_repository.get_last_n_metric_series(
+                        resident_id, "time_in_bed", window, db
+                    )
+                    mapped = store.get_last_n_series(resident_id, "time_in_bed", window)
+                    np.testing.assert_array_equal(sql.dates, mapped.dates)
+                    np.testing.assert_array_equal(sql.values, mapped.values)
+                sql_us = per_call_us(
+                    lambda rid, w=window: insights_repository.get_last_n_metric_series(
+                        rid, "time_in_bed", w, db
+                    ),
+                    residents,
+                )
+                store_us = per_call_us(
+                    lambda rid, w=window: store.get_last_n_series(rid, "time_in_bed", w),
+                    residents,
+                )
+                print(f"{window:>7} {sql_us:>8.1f} {store_us:>9.1f} {sql_us / store_us:>7.0f}x")
+        write.dispose()
+        read.dispose()
+
+
+if __name__ == "__main__":
+    main()
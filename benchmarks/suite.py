@@ -0,0 +1,215 @@
+"""Service-level benchmark suite on synthetic Bedsense data.
+
+For every scale (N residents x M days) a temporary SQLite database is seeded
+with `benchmarks.synthetic`, then each repository and service function is
+timed on randomly chosen residents. Results are printed as a table and can be
+written as JSON (`--json`) and compared against an earlier run
+(`--compare`), e.g. before and after a change:
+
+    python -m benchmarks.suite --json before.json
+    python -m benchmarks.suite --compare before.json
+
+Services are called directly: analyses run inline (the process pool is only
+started by the app's lifespan hook) and the insight cache is not involved, so
+the numbers measure the query and computation themselves.
+
+Usage:  python -m benchmarks.suite [--scales 1x30 1x3650 1000x365] [--only trend summary]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.repository import insights_repository, rolling_aggregate_repository
+from app.services import (
+    anomaly_service,
+    change_point_service,
+    rolling_aggregate_service,
+    summary_service,
+    trend_service,
+)
+from benchmarks.synthetic import seed_database
+
+DEFAULT_SCALES = ["1x30", "1x365", "1x3650", "100x365", "1000x365", "10000x30"]
+METRIC = "time_in_bed"
+
+# name -> fn(db, resident_id, n_days); "cohort" benchmarks ignore resident_id
+Benchmark = Callable[[Session, int, int], Any]
+BENCHMARKS: Dict[str, Benchmark] = {
+    "repo.last_n_metric_rows": lambda db, rid, days: insights_repository.get_last_n_metric_rows(
+        rid, METRIC, 30, db
+    ),
+    "repo.last_n_metric_series": lambda db, rid, days: insights_repository.get_last_n_metric_series(
+        rid, METRIC, 30, db
+    ),
+    "repo.last_n_series_all_metrics": lambda db, rid, days: (
+        insights_repository.get_last_n_series_all_metrics(rid, 30, db)
+    ),
+    "repo.cohort_last_n_rows": lambda db, rid, days: (
+        insights_repository.get_last_n_metric_rows_for_residents(METRIC, 28, db)
+    ),
+    "repo.rolling_current": lambda db, rid, days: rolling_aggregate_repository.get_current(
+        db, rid, METRIC
+    ),
+    "trend": lambda db, rid, days: trend_service.compute_trend(rid, METRIC, db),
+    "trend.from_rows": lambda db, rid, days: trend_service.trend_from_series(
+        rid, METRIC, insights_repository.get_last_n_metric_series(rid, METRIC, 28, db)
+    ),
+    "anomalies": lambda db, rid, days: anomaly_service.compute_anomalies(rid, METRIC, db),
+    "changepoints": lambda db, rid, days: change_point_service.compute_change_points(
+        rid, METRIC, db
+    ),
+    "summary": lambda db, rid, days: summary_service.compute_summary(rid, db),
+    "anomalies.full_history": lambda db, rid, days: anomaly_service.compute_anomalies(
+        rid, METRIC, db, limit=days
+    ),
+    "changepoints.full_history": lambda db, rid, days: (
+        change_point_service.compute_change_points(rid, METRIC, db, limit=days)
+    ),
+    "cohort_trend": lambda db, rid, days: trend_service.compute_cohort_trend(METRIC, db),
+}
+
+
+def parse_scale(text: str) -> Tuple[int, int]:
+    residents, days = text.lower().split("x")
+    return int(residents), int(days)
+
+
+def time_calls(fn: Callable[[], Any], budget: float, min_calls: int, max_calls: int) -> List[float]:
+    """Call `fn` until the time budget is used (within the call bounds); ms per call."""
+    fn()  # warm-up (statement cache, first-call costs)
+    samples: List[float] = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < max_calls and (len(samples) < min_calls or time.perf_counter() < deadline):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def run_scale(
+    n_residents: int, n_days: int, names: List[str], budget: float, seed: int
+) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'suite.db')}")
+        t0 = time.perf_counter()
+        n_rows = seed_database(engine, n_residents, n_days, seed=seed)
+        print(
+            f"# {n_residents} residents x {n_days} days: {n_rows} rows seeded in {time.perf_counter() - t0:.1f}s"
+        )
+        rng = random.Random(seed)
+        with sessionmaker(bind=engine)() as db:
+            # the seed bypasses the ingest path: materialize the trend aggregates
+            t0 = time.perf_counter()
+            rolling_aggregate_service.rebuild_all(db)
+            print(f"# rolling aggregates rebuilt in {time.perf_counter() - t0:.1f}s")
+            for name in names:
+                fn = BENCHMARKS[name]
+                samples = time_calls(
+                    lambda fn=fn: fn(db, rng.randint(1, n_residents), n_days),
+                    budget,
+                    min_calls=3,
+                    max_calls=1000,
+                )
+                results.append(
+                    {
+                        "benchmark": name,
+                        "residents": n_residents,
+                        "days": n_days,
+                        "rows": n_rows,
+                        "calls": len(samples),
+                        "mean_ms": statistics.fmean(samples),
+                        "p50_ms": statistics.median(samples),
+                        "p95_ms": float(np.percentile(samples, 95)),
+                        "min_ms": min(samples),
+                    }
+                )
+        engine.dispose()
+    return results
+
+
+def metadata(seed: int) -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "platform": platform.platform(),
+        "seed": seed,
+    }
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> int:
+    """Print p50 ratios against a previous run; returns the number of regressions."""
+    with open(baseline_path) as f:
+        baseline = {(r["benchmark"], r["residents"], r["days"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n{'benchmark':<30} {'scale':>11} {'before':>9} {'after':>9} {'ratio':>7}")
+    for r in results:
+        old = baseline.get((r["benchmark"], r["residents"], r["days"]))
+        if old is None:
+            continue
+        ratio = r["p50_ms"] / old["p50_ms"] if old["p50_ms"] else float("inf")
+        flag = "  REGRESSION" if ratio > tolerance else ""
+        regressions += bool(flag)
+        scale = f"{r['residents']}x{r['days']}"
+        print(
+            f"{r['benchmark']:<30} {scale:>11} {old['p50_ms']:>9.3f} {r['p50_ms']:>9.3f} {ratio:>6.2f}x{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="RESIDENTSxDAYS")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--budget", type=float, default=0.5, help="seconds per benchmark and scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_path", help="write the results to this file")
+    parser.add_argument("--compare", help="results JSON of an earlier run")
+    parser.add_argument(
+        "--tolerance", type=float, default=1.25, help="p50 ratio that counts as a regression"
+    )
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    print(f"{'benchmark':<30} {'scale':>11} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9}")
+    for scale in args.scales:
+        n_residents, n_days = parse_scale(scale)
+        for r in run_scale(n_residents, n_days, args.only, args.budget, args.seed):
+            results.append(r)
+            print(
+                f"{r['benchmark']:<30} {scale:>11} {r['calls']:>6} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f}"
+            )
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"meta": metadata(args.seed), "results": results}, f, indent=2)
+    if args.compare and compare(results, args.compare, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
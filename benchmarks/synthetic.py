@@ -0,0 +1,118 @@
+"""Synthetic Bedsense data for benchmarks.
+
+Generates per-resident daily series that look like the real exports rather
+than the flat 8h fixture data: each metric has its own level, day-to-day
+noise, a weekly rhythm, occasional level shifts (e.g. after a fall or a
+change in medication), outliers, days with a missing metric and days with no
+row at all. Everything is driven by one seed, so a scale is reproducible
+across runs and machines.
+
+    rows = generate_resident(resident_id=1, n_days=365, seed=0)
+    seed_database(engine, n_residents=100, n_days=365)
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from sqlalchemy.engine import Engine
+
+# typical level and day-to-day spread per metric, in seconds
+METRIC_PROFILES: Dict[str, tuple] = {
+    "time_in_bed": (8.5 * 3600, 45 * 60),
+    "at_rest": (5.5 * 3600, 35 * 60),
+    "low_activity": (1.4 * 3600, 15 * 60),
+    "high_activity": (1.0 * 3600, 12 * 60),
+}
+
+START = date(2015, 1, 1)
+SHIFTS_PER_YEAR = 2.0
+OUTLIER_RATE = 0.01
+MISSING_VALUE_RATE = 0.03
+MISSING_DAY_RATE = 0.02
+
+
+def _metric_series(
+    n_days: int, level: float, spread: float, rng: np.random.Generator
+) -> np.ndarray:
+    """One metric: personal level + weekly rhythm + noise + level shifts + outliers."""
+    level = level * rng.uniform(0.8, 1.2)
+    days = np.arange(n_days)
+    values = level + 0.15 * spread * np.sin(2 * np.pi * days / 7) + rng.normal(0, spread, n_days)
+
+    n_shifts = rng.poisson(SHIFTS_PER_YEAR * n_days / 365)
+    for at in rng.integers(0, n_days, n_shifts):
+        values[at:] += rng.normal(0, 2 * spread)
+
+    outliers = rng.random(n_days) < OUTLIER_RATE
+    values[outliers] += (
+        rng.choice([-1, 1], outliers.sum()) * rng.uniform(4, 8, outliers.sum()) * spread
+    )
+    return np.clip(values, 0, 24 * 3600)
+
+
+def generate_resident(
+    resident_id: int, n_days: int, seed: int = 0, start: date = START
+) -> List[Dict[str, Any]]:
+    """Daily rows (dicts with the inbed_daily columns) for one resident, oldest first."""
+    rng = np.random.default_rng([seed, resident_id])
+    metrics = {
+        name: _metric_series(n_days, level, spread, rng)
+        for name, (level, spread) in METRIC_PROFILES.items()
+    }
+    missing_value = {name: rng.random(n_days) < MISSING_VALUE_RATE for name in METRIC_PROFILES}
+    present_day = rng.random(n_days) >= MISSING_DAY_RATE
+
+    rows = []
+    for i in np.flatnonzero(present_day).tolist():
+        row: Dict[str, Any] = {"resident_id": resident_id, "date": start + timedelta(days=i)}
+        for name, values in metrics.items():
+            row[name] = None if missing_value[name][i] else round(float(values[i]), 1)
+        rows.append(row)
+    return rows
+
+
+def generate(
+    n_residents: int, n_days: int, seed: int = 0, start: date = START
+) -> Iterator[List[Dict[str, Any]]]:
+    """Rows for residents 1..n_residents, one list per resident."""
+    for resident_id in range(1, n_residents + 1):
+        yield generate_resident(resident_id, n_days, seed, start)
+
+
+def seed_database(
+    engine: Engine,
+    n_residents: int,
+    n_days: int,
+    seed: int = 0,
+    start: date = START,
+    batch_rows: int = 50_000,
+) -> int:
+    """Create the schema and insert residents plus their synthetic days.
+
+    Uses plain executemany inserts (no running stats / revisions bookkeeping),
+    which is what a bulk historical load looks like. Returns the row count.
+    """
+    import app.main  # noqa: F401  (registers every model before create_all)
+    from app.database_config import Base
+    from app.orm_models.inbed_daily import InBedDaily
+    from app.orm_models.resident import Resident
+
+    Base.metadata.create_all(engine)
+    total = 0
+    with engine.begin() as conn:
+        conn.execute(
+            Resident.__table__.insert(),
+            [{"id": r, "name": f"Resident {r}"} for r in range(1, n_residents + 1)],
+        )
+        batch: List[Dict[str, Any]] = []
+        for rows in generate(n_residents, n_days, seed, start):
+            batch.extend(rows)
+            if len(batch) >= batch_rows:
+                conn.execute(InBedDaily.__table__.insert(), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            conn.execute(InBedDaily.__table__.insert(), batch)
+            total += len(batch)
+    return total
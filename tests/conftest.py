@@ -8,9 +8,15 @@ This file provides reusable test setup including:
 - client: TestClient with overridden database dependency
 - sample_resident: Pre-created test resident (John Doe, room 101)
 - sample_30_days_data: 30 days of stable bed sensor data (8h/day)
+- clear_insight_cache: empties the process-wide insight cache around each test
 
 Fixtures are automatically available to all test files.
 """
+
+import atexit
+import os
+import shutil
+import tempfile
 from datetime import date, timedelta
 
 import pytest
@@ -19,11 +25,32 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.database_config import Base
-from app.dependencies import get_db
-from app.main import app
-from app.orm_models.inbed_daily import InBedDaily
-from app.orm_models.resident import Resident
+# Run change-point analyses inline; tests/test_analysis_pool.py covers the worker pool.
+os.environ.setdefault("ANALYSIS_POOL_WORKERS", "0")
+
+# The app's own engines (used by the lifespan: create_all, migrations) point at
+# a throwaway database, never at the tracked momo.db or a configured one.
+_TEST_DATA_DIR = tempfile.mkdtemp(prefix="momo-tests-")
+atexit.register(shutil.rmtree, _TEST_DATA_DIR, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TEST_DATA_DIR}/app.db"
+os.environ["DATABASE_READ_URL"] = os.environ["DATABASE_URL"]
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ.pop("SERIES_STORE_DIR", None)
+
+from app.database_config import Base  # noqa: E402
+from app.dependencies import get_db, get_read_db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.orm_models.inbed_daily import InBedDaily  # noqa: E402
+from app.orm_models.resident import Resident  # noqa: E402
+from app.services.insight_cache import insight_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_insight_cache():
+    """The insight cache is process-wide; every test gets its own database."""
+    insight_cache.clear()
+    yield
+    insight_cache.clear()
 
 
 @pytest.fixture(scope="function")
@@ -60,6 +87,7 @@ def client(test_db):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
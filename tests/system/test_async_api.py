@@ -0,0 +1,114 @@
+# tests/system/test_async_api.py
+"""
+System tests for the async API variants (/api/async/...).
+
+Both stacks are pointed at the same file-backed SQLite database, so every
+async endpoint can be compared against its sync counterpart.
+"""
+
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database_config import Base
+from app.dependencies import get_async_db, get_db, get_read_db
+from app.main import app
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+
+
+@pytest.fixture
+def dual_client(tmp_path):
+    """TestClient whose sync and async sessions share one SQLite file with sample data."""
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    SyncSession = sessionmaker(bind=engine)
+    with SyncSession() as db:
+        db.add(Resident(id=1, name="John Doe", room_number="101"))
+        for i in range(30):
+            db.add(
+                InBedDaily(
+                    date=date.today() - timedelta(days=29 - i),
+                    time_in_bed=28800 if i < 23 else 14400,
+                    at_rest=20000 + (7000 if i == 15 else 0),
+                    resident_id=1,
+                )
+            )
+        db.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    def override_get_db():
+        with SyncSession() as db:
+            yield db
+
+    async def override_get_async_db():
+        async with AsyncSession() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+    engine.dispose()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "insights/trend/time_in_bed/1",
+        "insights/changepoints/time_in_bed/1",
+        "insights/anomalies/at_rest/1",
+        "residents/",
+        "residents/?after_id=0&limit=1",
+        "residents/1",
+    ],
+)
+def test_async_endpoint_matches_sync(dual_client, path):
+    """Async endpoints should return exactly what the sync endpoints return"""
+    sync_response = dual_client.get(f"/api/{path}")
+    async_response = dual_client.get(f"/api/async/{path}")
+
+    assert async_response.status_code == 200
+    assert async_response.json() == sync_response.json()
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "insights/trend/time_in_bed/1",
+        "insights/changepoints/time_in_bed/1",
+        "insights/anomalies/at_rest/1",
+    ],
+)
+def test_async_endpoint_shares_etags(dual_client, path):
+    """Async endpoints should send the same ETag and honour If-None-Match"""
+    etag = dual_client.get(f"/api/{path}").headers["ETag"]
+
+    response = dual_client.get(f"/api/async/{path}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "insights/trend/time_in_bed/99999",
+        "insights/changepoints/time_in_bed/99999",
+        "insights/anomalies/time_in_bed/99999",
+        "residents/99999",
+    ],
+)
+def test_async_endpoint_not_found(dual_client, path):
+    """Should return 404 for non-existent residents"""
+    assert dual_client.get(f"/api/async/{path}").status_code == 404
@@ -0,0 +1,102 @@
+"""
+System tests for conditional requests on the insight endpoints:
+- responses carry an ETag and Cache-Control: no-cache
+- If-None-Match with the current ETag is answered 304 without running the analysis
+- a new day for the resident changes the ETag; other residents keep theirs
+- ETags differ per analysis and metric
+"""
+
+from datetime import date
+
+import pytest
+
+from app.routers.insights_router import etag_matches
+from app.services import anomaly_service, change_point_service, summary_service, trend_service
+from app.services.ingest_service import store_daily_rows
+from app.services.insight_cache import insight_cache
+
+PATHS = [
+    "trend/time_in_bed/{rid}",
+    "changepoints/time_in_bed/{rid}",
+    "anomalies/time_in_bed/{rid}",
+    "anomalies/time_in_bed/{rid}/latest",
+    "summary/{rid}",
+]
+
+
+def _url(path: str, rid: int) -> str:
+    return "/api/insights/" + path.format(rid=rid)
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_revalidation_returns_304(client, sample_resident, sample_30_days_data, path):
+    url = _url(path, sample_resident.id)
+    first = client.get(url)
+
+    again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert first.headers["ETag"].startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == first.headers["ETag"]
+
+
+def test_304_skips_the_analysis(client, sample_resident, sample_30_days_data, monkeypatch):
+    urls = [_url(p, sample_resident.id) for p in PATHS]
+    etags = {url: client.get(url).headers["ETag"] for url in urls}
+    # nothing cached either: a 304 must not need the result at all
+    insight_cache.clear()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("analysis ran for a 304")
+
+    for module, name in [
+        (trend_service, "compute_trend"),
+        (change_point_service, "compute_change_points"),
+        (anomaly_service, "compute_anomalies"),
+        (anomaly_service, "score_latest_day"),
+        (summary_service, "compute_summary"),
+    ]:
+        monkeypatch.setattr(module, name, fail)
+
+    for url, etag in etags.items():
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_new_data_changes_the_etag(client, test_db, sample_resident, sample_30_days_data):
+    url = _url("trend/time_in_bed/{rid}", sample_resident.id)
+    etag = client.get(url).headers["ETag"]
+
+    store_daily_rows(
+        test_db, [{"resident_id": sample_resident.id, "date": date.today(), "time_in_bed": 1.0}]
+    )
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_etags_differ_per_analysis_and_metric(client, sample_resident, sample_30_days_data):
+    urls = [
+        _url("trend/time_in_bed/{rid}", sample_resident.id),
+        _url("trend/at_rest/{rid}", sample_resident.id),
+        _url("anomalies/time_in_bed/{rid}", sample_resident.id),
+    ]
+    assert len({client.get(url).headers["ETag"] for url in urls}) == 3
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, False),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"x", W/"abc"', True),
+        ("*", True),
+        ('W/"abd"', False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, 'W/"abc"') is expected
@@ -0,0 +1,120 @@
+"""
+System tests for the streaming export (GET /api/export/daily):
+- CSV carries the raw stored values, NULL as an empty cell
+- date bounds and the resident filter apply; all residents when omitted
+- the columnar format decodes to the same rows as the CSV
+- rows are fetched in fixed-size batches
+- unknown residents and inverted date ranges fail
+"""
+
+import csv
+import io
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+from app.repository.inbed_daily_repository import iter_daily_rows
+from app.routers import export_router
+from app.services.export_service import COLUMN_NAMES, read_columnar
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def two_residents(test_db, sample_30_days_data, sample_resident):
+    other = Resident(name="Jane Doe", room_number="102")
+    test_db.add(other)
+    test_db.commit()
+    for i in range(5):
+        test_db.add(
+            InBedDaily(
+                resident_id=other.id,
+                date=TODAY - timedelta(days=4 - i),
+                time_in_bed=25000.5 + i,
+                times_out_bed_night=None,
+            )
+        )
+    test_db.commit()
+    return sample_resident.id, other.id
+
+
+def _csv_rows(response) -> list:
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+def test_csv_export_of_one_resident(client, two_residents):
+    first, _ = two_residents
+
+    response = client.get("/api/export/daily", params={"resident_id": first})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert f"inbed_daily_{first}.csv" in response.headers["content-disposition"]
+    rows = _csv_rows(response)
+    assert rows[0] == COLUMN_NAMES
+    assert len(rows) == 31
+    assert rows[1] == [str(first), (TODAY - timedelta(days=29)).isoformat()] + [
+        "28800.0",
+        "20000.0",
+        "5000.0",
+        "3800.0",
+        "2",
+        "1",
+    ]
+
+
+def test_date_range_over_all_residents(client, two_residents):
+    first, second = two_residents
+    start, end = TODAY - timedelta(days=3), TODAY - timedelta(days=1)
+
+    rows = _csv_rows(client.get("/api/export/daily", params={"start": start, "end": end}))
+
+    assert [(int(r[0]), r[1]) for r in rows[1:]] == [
+        (rid, (start + timedelta(days=d)).isoformat()) for rid in (first, second) for d in range(3)
+    ]
+    # NULL metrics are empty cells
+    assert rows[-1][3:] == ["", "", "", "", ""]
+
+
+def test_columnar_matches_csv(client, two_residents):
+    csv_rows = _csv_rows(client.get("/api/export/daily"))[1:]
+
+    response = client.get("/api/export/daily", params={"format": "columnar"})
+
+    assert response.headers["content-type"] == "application/x-momo-columnar"
+    columns = read_columnar(response.content)
+    assert len(columns["resident_id"]) == len(csv_rows) == 35
+    assert columns["resident_id"].tolist() == [int(r[0]) for r in csv_rows]
+    assert columns["date"].astype(str).tolist() == [r[1] for r in csv_rows]
+    for i, name in enumerate(COLUMN_NAMES[2:], start=2):
+        expected = [float(r[i]) if r[i] else np.nan for r in csv_rows]
+        np.testing.assert_array_equal(columns[name], np.array(expected, dtype=columns[name].dtype))
+
+
+def test_empty_export(client, sample_resident):
+    csv_response = client.get("/api/export/daily")
+    columnar = client.get("/api/export/daily", params={"format": "columnar"})
+
+    assert _csv_rows(csv_response) == [COLUMN_NAMES]
+    assert len(read_columnar(columnar.content)["date"]) == 0
+
+
+def test_rows_are_fetched_in_batches(client, test_db, two_residents, monkeypatch):
+    first, _ = two_residents
+    batches = list(iter_daily_rows(test_db, first, None, None, batch_size=8))
+    assert [len(b) for b in batches] == [8, 8, 8, 6]
+
+    monkeypatch.setattr(export_router, "FETCH_ROWS", 4)
+    columnar = client.get("/api/export/daily", params={"format": "columnar"})
+    assert len(read_columnar(columnar.content)["date"]) == 35
+
+
+def test_unknown_resident_and_inverted_range(client, sample_resident):
+    assert client.get("/api/export/daily", params={"resident_id": 999}).status_code == 404
+    response = client.get(
+        "/api/export/daily", params={"start": TODAY, "end": TODAY - timedelta(days=1)}
+    )
+    assert response.status_code == 422
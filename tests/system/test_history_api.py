@@ -0,0 +1,151 @@
+"""
+System tests for long-horizon queries:
+- GET /api/insights/history/{metric}/{resident_id} at day / week / month resolution
+- max_points reduction and its bounds
+- start / end / resolution on the change-point and anomaly endpoints, end on the trend
+- GET /api/insights/anomalies/{metric}/{resident_id}/history (rolling-baseline scan)
+- ranged responses are cached and tagged separately from the default window
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+
+START = date(2023, 1, 2)  # a Monday
+N_DAYS = 730
+
+
+@pytest.fixture
+def two_years(test_db):
+    test_db.add(Resident(id=1, name="Resident 1", room_number="101"))
+    for i in range(N_DAYS):
+        # level shift after one year
+        level = 28800 if i < 365 else 25200
+        test_db.add(
+            InBedDaily(
+                resident_id=1,
+                date=START + timedelta(days=i),
+                time_in_bed=level + (i * 37 % 11) * 60,
+            )
+        )
+    test_db.commit()
+
+
+@pytest.mark.parametrize(
+    "resolution, expected", [("day", N_DAYS), ("week", N_DAYS // 7 + 1), ("month", 24)]
+)
+def test_history_resolutions(client, two_years, resolution, expected):
+    response = client.get(f"/api/insights/history/time_in_bed/1?resolution={resolution}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resolution"] == resolution
+    assert data["n_buckets"] == len(data["points"]) == expected
+    # points are dated by the first day of their bucket
+    assert data["points"][0]["date"] == (str(START) if resolution != "month" else "2023-01-01")
+    assert sum(p["n_days"] for p in data["points"]) == N_DAYS
+
+
+def test_history_range_and_max_points(client, two_years):
+    response = client.get(
+        "/api/insights/history/time_in_bed/1",
+        params={"start": "2023-03-01", "end": "2023-12-31", "max_points": 50},
+    )
+
+    data = response.json()
+    assert data["downsampled"] is True
+    assert data["n_buckets"] == 306
+    assert len(data["points"]) == 50
+    assert data["points"][0]["date"] == "2023-03-01"
+    assert data["points"][-1]["date"] == "2023-12-31"
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"max_points": 2},
+        {"max_points": 100_000},
+        {"resolution": "hour"},
+        {"start": "2024-02-01", "end": "2024-01-01"},
+    ],
+)
+def test_history_rejects_bad_parameters(client, two_years, params):
+    response = client.get("/api/insights/history/time_in_bed/1", params=params)
+    assert response.status_code == 422
+
+
+def test_history_empty_range_is_404(client, two_years):
+    response = client.get("/api/insights/history/time_in_bed/1", params={"start": "2030-01-01"})
+    assert response.status_code == 404
+
+
+def test_changepoints_over_range(client, two_years):
+    response = client.get(
+        "/api/insights/changepoints/time_in_bed/1",
+        params={"start": str(START), "resolution": "week"},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["n_change_points"] >= 1
+    assert "weeks from 2023-01-02" in data["description"]
+    # the level shift is found within a week of where it happened
+    shift = START + timedelta(days=365)
+    assert any(abs((date.fromisoformat(d) - shift).days) <= 14 for d in data["change_point_dates"])
+
+
+def test_anomalies_over_range(client, two_years):
+    response = client.get(
+        "/api/insights/anomalies/time_in_bed/1",
+        params={"start": "2023-06-01", "end": "2023-06-30"},
+    )
+
+    assert response.status_code == 200
+    assert all("2023-06-01" <= d <= "2023-06-30" for d in response.json()["anomaly_dates"])
+
+
+def test_trend_as_of_end(client, two_years):
+    latest = client.get("/api/insights/trend/time_in_bed/1").json()
+    before_shift = client.get(
+        "/api/insights/trend/time_in_bed/1", params={"end": "2023-12-01"}
+    ).json()
+
+    assert before_shift != latest
+    assert before_shift["baseline_hours"].startswith("8h")
+
+
+def test_ranged_requests_have_their_own_etag(client, two_years):
+    default = client.get("/api/insights/anomalies/time_in_bed/1")
+    ranged = client.get("/api/insights/anomalies/time_in_bed/1", params={"start": "2023-06-01"})
+
+    assert default.headers["ETag"] != ranged.headers["ETag"]
+    again = client.get(
+        "/api/insights/anomalies/time_in_bed/1",
+        params={"start": "2023-06-01"},
+        headers={"If-None-Match": ranged.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+@pytest.mark.parametrize("method", ["zscore", "robust"])
+def test_anomaly_history_scan(client, two_years, method):
+    response = client.get(
+        "/api/insights/anomalies/time_in_bed/1/history",
+        params={"start": "2023-06-01", "method": method},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["method"] == method
+    assert data["window_days"] == 30
+    assert data["n_anomalies"] == len(data["anomaly_dates"]) == len(data["anomaly_z_scores"])
+    assert min(data["anomaly_dates"]) >= "2023-06-01"
+    assert all(abs(z) >= 1.0 for z in data["anomaly_z_scores"])
+
+
+def test_anomaly_history_rejects_unknown_method(client, two_years):
+    response = client.get("/api/insights/anomalies/time_in_bed/1/history", params={"method": "iqr"})
+    assert response.status_code == 422
@@ -0,0 +1,195 @@
+"""
+System tests for the bulk upload endpoint (POST /api/ingest/daily):
+- NDJSON and CSV bodies are stored and counted as inserted / updated
+- absent metrics keep their stored value
+- invalid records are rejected with their line number, valid ones still stored
+  (including non-scalar values and partial dates)
+- a later record for the same day wins, whatever columns it carries
+- unsupported content types and CSV headers without the key columns fail
+- a line longer than MAX_LINE_BYTES (e.g. a JSON array body) is refused with 413
+"""
+
+import asyncio
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.services.bulk_ingest_service import MAX_LINE_BYTES, LineTooLongError, iter_line_batches
+
+START = date.today() - timedelta(days=30)
+NDJSON = {"Content-Type": "application/x-ndjson"}
+CSV = {"Content-Type": "text/csv"}
+
+
+def _ndjson(records) -> str:
+    return "\n".join(json.dumps(r) for r in records) + "\n"
+
+
+def _records(resident_id: int, n_days: int, time_in_bed: float = 28800.0) -> list:
+    return [
+        {
+            "resident_id": resident_id,
+            "date": (START + timedelta(days=i)).isoformat(),
+            "time_in_bed": time_in_bed,
+            "at_rest": 20000.0,
+            "times_out_bed_night": 2,
+        }
+        for i in range(n_days)
+    ]
+
+
+def test_ndjson_insert_then_update(client, test_db, sample_resident):
+    body = _ndjson(_records(sample_resident.id, 30))
+
+    first = client.post("/api/ingest/daily", content=body, headers=NDJSON)
+    again = client.post("/api/ingest/daily", content=body, headers=NDJSON)
+
+    assert first.status_code == 200
+    assert first.json() == {"inserted": 30, "updated": 0, "rejected": 0, "errors": []}
+    assert again.json()["inserted"] == 0
+    assert again.json()["updated"] == 30
+    assert test_db.query(InBedDaily).count() == 30
+
+
+def test_uploaded_rows_feed_the_insights(client, sample_resident):
+    records = _records(sample_resident.id, 30)
+    for r in records[-7:]:
+        r["time_in_bed"] = 25200.0
+    client.post("/api/ingest/daily", content=_ndjson(records), headers=NDJSON)
+
+    trend = client.get(f"/api/insights/trend/time_in_bed/{sample_resident.id}")
+
+    assert trend.status_code == 200
+    assert trend.json()["last_7_days_hours"] == "7h"
+
+
+def test_csv_keeps_absent_columns(client, test_db, sample_resident):
+    client.post(
+        "/api/ingest/daily", content=_ndjson(_records(sample_resident.id, 3)), headers=NDJSON
+    )
+    day = START.isoformat()
+    body = f"date,resident_id,time_in_bed\r\n{day},{sample_resident.id},30000\r\n"
+
+    response = client.post("/api/ingest/daily", content=body, headers=CSV)
+
+    assert response.json()["updated"] == 1
+    row = test_db.query(InBedDaily).filter(InBedDaily.date == START).one()
+    test_db.refresh(row)
+    assert row.time_in_bed == 30000.0
+    assert row.at_rest == 20000.0
+    assert row.times_out_bed_night == 2
+
+
+def test_invalid_records_are_rejected_with_line_numbers(client, test_db, sample_resident):
+    rid = sample_resident.id
+    day = START.isoformat()
+    lines = [
+        json.dumps({"resident_id": rid, "date": day, "time_in_bed": 28800}),
+        "{not json",
+        json.dumps({"resident_id": 999, "date": day}),
+        json.dumps({"resident_id": rid, "date": "2025-02-30"}),
+        json.dumps({"resident_id": rid, "date": (date.today() + timedelta(days=5)).isoformat()}),
+        json.dumps({"resident_id": rid, "date": day, "time_in_bed": 90000}),
+        json.dumps({"resident_id": rid, "date": day, "at_rest": "a lot"}),
+        json.dumps({"date": day}),
+        json.dumps({"resident_id": rid, "date": day, "times_out_bed_day": 1.5}),
+    ]
+
+    response = client.post("/api/ingest/daily", content="\n".join(lines), headers=NDJSON)
+
+    data = response.json()
+    assert (data["inserted"], data["updated"], data["rejected"]) == (1, 0, 8)
+    assert [(e["line"], e["reason"]) for e in data["errors"]] == [
+        (2, "invalid JSON"),
+        (3, "unknown resident_id"),
+        (4, "invalid date (expected YYYY-MM-DD)"),
+        (5, "date is in the future"),
+        (6, "time_in_bed out of range"),
+        (7, "at_rest is not a number"),
+        (8, "missing resident_id"),
+        (9, "times_out_bed_day out of range"),
+    ]
+    assert test_db.query(InBedDaily).count() == 1
+
+
+def test_duplicate_day_with_other_columns_keeps_input_order(client, test_db, sample_resident):
+    rid, day = sample_resident.id, START.isoformat()
+    records = [
+        {"resident_id": rid, "date": day, "time_in_bed": 100, "at_rest": 50},
+        {"resident_id": rid, "date": day, "time_in_bed": 200},
+    ]
+
+    response = client.post("/api/ingest/daily", content=_ndjson(records), headers=NDJSON)
+
+    assert response.status_code == 200
+    row = test_db.query(InBedDaily).one()
+    assert (row.time_in_bed, row.at_rest) == (200, 50)
+
+
+def test_non_scalar_values_and_partial_dates_are_rejected(client, test_db, sample_resident):
+    rid = sample_resident.id
+    # every record sends a list of the same length: one 2-D array for NumPy
+    lists = [
+        {"resident_id": rid, "date": (START + timedelta(days=i)).isoformat(), "at_rest": [1, 2]}
+        for i in range(2)
+    ]
+    dates = [{"resident_id": rid, "date": d, "time_in_bed": 100} for d in ("2024-07", "2025")]
+
+    response = client.post("/api/ingest/daily", content=_ndjson(lists + dates), headers=NDJSON)
+
+    data = response.json()
+    assert (data["inserted"], data["rejected"]) == (0, 4)
+    assert [e["reason"] for e in data["errors"]] == [
+        "at_rest is not a number",
+        "at_rest is not a number",
+        "invalid date (expected YYYY-MM-DD)",
+        "invalid date (expected YYYY-MM-DD)",
+    ]
+    assert test_db.query(InBedDaily).count() == 0
+
+
+def test_unsupported_content_type(client):
+    response = client.post("/api/ingest/daily", json=[{"resident_id": 1}])
+    assert response.status_code == 415
+
+
+def test_csv_without_key_columns(client):
+    response = client.post("/api/ingest/daily", content="day,time_in_bed\n", headers=CSV)
+    assert response.status_code == 422
+    assert "resident_id" in response.json()["detail"]
+
+
+def test_line_batches_split_across_chunks():
+    async def chunks():
+        for part in (b"a\nb", b"b\r\nc", b"c\nd", b"d"):
+            yield part
+
+    async def collect():
+        return [batch async for batch in iter_line_batches(chunks(), batch_lines=2)]
+
+    assert asyncio.run(collect()) == [([b"a", b"bb"], 1), ([b"cc", b"dd"], 3)]
+
+
+def test_line_too_long_is_refused(client, test_db, sample_resident):
+    body = json.dumps(_records(1, 30) * 100)
+    assert len(body) > MAX_LINE_BYTES
+    response = client.post("/api/ingest/daily", content=body, headers=NDJSON)
+    assert response.status_code == 413
+    assert "Line 1 " in response.json()["detail"]
+    assert test_db.query(InBedDaily).count() == 0
+
+
+def test_line_batches_reject_a_line_growing_over_chunks():
+    async def chunks():
+        yield b"a\nb\n"
+        for _ in range(MAX_LINE_BYTES // 1024 + 1):
+            yield b"x" * 1024
+
+    async def collect():
+        return [batch async for batch in iter_line_batches(chunks(), batch_lines=1)]
+
+    with pytest.raises(LineTooLongError) as exc_info:
+        asyncio.run(collect())
+    assert exc_info.value.line == 3
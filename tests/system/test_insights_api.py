@@ -5,9 +5,17 @@ System tests for the Insights API endpoints.
 Tests the complete HTTP request/response cycle for:
 - GET /api/insights/trend/{metric}/{resident_id}
 - GET /api/insights/changepoints/{metric}/{resident_id}
+- GET /api/insights/changepoints/{metric}/{resident_id}/online
 - GET /api/insights/anomalies/{metric}/{resident_id}
+- GET /api/insights/trend/{metric} (cohort)
+- GET /api/insights/summary/{resident_id}
 """
 
+from datetime import date, timedelta
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+
 
 def test_get_trend_success(client, sample_resident, sample_30_days_data):
     """Should return trend data for resident with sufficient data"""
@@ -72,6 +80,24 @@ def test_get_changepoints_resident_not_found(client):
     assert response.status_code == 404
 
 
+def test_get_online_changepoints(client, sample_resident, sample_30_days_data):
+    """Should read the online detector (replayed: the fixture bypasses ingest)"""
+    response = client.get(f"/api/insights/changepoints/time_in_bed/{sample_resident.id}/online")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["n_change_points"] == 0
+    assert "online PELT" in data["description"]
+
+    etag = response.headers["ETag"]
+    revalidated = client.get(
+        f"/api/insights/changepoints/time_in_bed/{sample_resident.id}/online",
+        headers={"If-None-Match": etag},
+    )
+    assert revalidated.status_code == 304
+    assert client.get("/api/insights/changepoints/time_in_bed/99999/online").status_code == 404
+
+
 def test_get_changepoints_invalid_metric(client, sample_resident):
     """Should return 422 for invalid metric"""
     response = client.get(f"/api/insights/changepoints/invalid_metric/{sample_resident.id}")
@@ -113,3 +139,85 @@ def test_get_anomalies_invalid_metric(client, sample_resident):
     response = client.get(f"/api/insights/anomalies/invalid_metric/{sample_resident.id}")
 
     assert response.status_code == 422
+
+
+def test_get_cohort_trend_matches_single_trend(
+    client, test_db, sample_resident, sample_30_days_data
+):
+    """Cohort trend should return the same insight as the per-resident endpoint"""
+    other = Resident(name="Jane Roe", room_number="102")
+    test_db.add(other)
+    test_db.commit()
+    for i in range(3):  # not enough data for a trend -> omitted
+        test_db.add(
+            InBedDaily(
+                date=date.today() - timedelta(days=i), time_in_bed=1000, resident_id=other.id
+            )
+        )
+    test_db.commit()
+
+    response = client.get("/api/insights/trend/time_in_bed")
+
+    assert response.status_code == 200
+    data = response.json()
+    single = client.get(f"/api/insights/trend/time_in_bed/{sample_resident.id}").json()
+    assert data == [single]
+
+
+def test_get_cohort_trend_filters_residents(client, sample_resident, sample_30_days_data):
+    """Should only include the requested residents"""
+    response = client.get("/api/insights/trend/at_rest", params={"resident_ids": [99999]})
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+def test_get_summary_matches_per_metric_endpoints(client, sample_resident, sample_30_days_data):
+    """Summary should contain exactly what the 12 per-metric endpoints return"""
+    response = client.get(f"/api/insights/summary/{sample_resident.id}")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["resident_id"] == sample_resident.id
+    assert data["window_days"] == 30
+
+    metrics = ["time_in_bed", "low_activity", "high_activity", "at_rest"]
+    assert sorted(data["metrics"]) == sorted(metrics)
+    for metric in metrics:
+        summary = data["metrics"][metric]
+        for key, path in [
+            ("trend", "trend"),
+            ("change_points", "changepoints"),
+            ("anomalies", "anomalies"),
+        ]:
+            single = client.get(f"/api/insights/{path}/{metric}/{sample_resident.id}")
+            expected = single.json() if single.status_code == 200 else None
+            assert summary[key] == expected
+
+
+def test_get_summary_resident_not_found(client):
+    """Should return 404 when the resident has no data"""
+    response = client.get("/api/insights/summary/99999")
+
+    assert response.status_code == 404
+
+
+def test_get_summary_short_history_has_null_trend(client, test_db, sample_resident):
+    """With fewer than 7 days the trend is null but the other analyses still run"""
+    start = date(2024, 1, 1)
+    for i in range(5):
+        test_db.add(
+            InBedDaily(
+                resident_id=sample_resident.id,
+                date=start + timedelta(days=i),
+                time_in_bed=8 * 3600 + i * 600,
+            )
+        )
+    test_db.commit()
+
+    response = client.get(f"/api/insights/summary/{sample_resident.id}")
+
+    assert response.status_code == 200
+    tib = response.json()["metrics"]["time_in_bed"]
+    assert tib["trend"] is None
+    assert tib["anomalies"]["resident_id"] == sample_resident.id
@@ -118,3 +118,36 @@ def test_trend_insufficient_data(client, resident_with_insufficient_data):
     response = client.get(f"/api/insights/trend/time_in_bed/{resident_with_insufficient_data.id}")
 
     assert response.status_code == 404
+
+
+def test_latest_anomaly_flags_outlier_day(client, test_db, sample_resident, sample_30_days_data):
+    """Should flag the newest day when it deviates from the window"""
+    latest = date.today() + timedelta(days=1)
+    test_db.add(
+        InBedDaily(
+            date=latest,
+            time_in_bed=7200,
+            at_rest=20000,
+            low_activity=5000,
+            high_activity=3800,
+            times_out_bed_night=2,
+            times_out_bed_day=1,
+            resident_id=sample_resident.id,
+        )
+    )
+    test_db.commit()
+
+    response = client.get(f"/api/insights/anomalies/time_in_bed/{sample_resident.id}/latest")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == latest.isoformat()
+    assert data["is_anomaly"] is True
+    assert data["value"] == "2h"
+
+
+def test_latest_anomaly_resident_not_found(client):
+    """Should return 404 for non-existent resident"""
+    response = client.get("/api/insights/anomalies/time_in_bed/99999/latest")
+
+    assert response.status_code == 404
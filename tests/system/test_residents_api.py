@@ -1,12 +1,13 @@
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.orm_models.resident import Resident
 
 """
 System tests for the Residents API endpoints.
 
 Tests the complete HTTP request/response cycle for:
-- GET /api/residents/ (list all residents)
+- GET /api/residents/ (list all residents, offset and keyset pagination)
 - GET /api/residents/{id} (get single resident)
 """
 
@@ -33,6 +34,35 @@ def test_get_residents_with_data(client, sample_resident):
     assert data[0]["id"] == sample_resident.id
 
 
+def test_keyset_pagination_walks_all_residents(client, test_db):
+    """Should page through residents with after_id and the next-page header"""
+    test_db.add_all(Resident(name=f"Resident {i}", room_number=str(100 + i)) for i in range(7))
+    test_db.commit()
+
+    pages, params = [], {"limit": 3}
+    while True:
+        response = client.get("/api/residents/", params=params)
+        pages.append([r["id"] for r in response.json()])
+        next_id = response.headers.get("X-Next-After-Id")
+        if next_id is None:
+            break
+        params["after_id"] = next_id
+
+    assert pages == [[1, 2, 3], [4, 5, 6], [7]]
+    assert client.get("/api/residents/", params={"after_id": 7}).json() == []
+
+
+def test_after_id_takes_precedence_over_offset(client, test_db):
+    """Should start after the given id whatever the offset"""
+    test_db.add_all(Resident(name=f"Resident {i}") for i in range(5))
+    test_db.commit()
+
+    response = client.get("/api/residents/", params={"after_id": 2, "offset": 10})
+
+    assert [r["id"] for r in response.json()] == [3, 4, 5]
+    assert response.json()[0] == {"id": 3, "name": "Resident 2", "room_number": None}
+
+
 def test_get_resident_by_id_success(client, sample_resident):
     """Should return resident when ID exists"""
     response = client.get(f"/api/residents/{sample_resident.id}")
@@ -0,0 +1,68 @@
+"""
+System tests for response encoding and compression:
+- large bodies are gzip-compressed when the client accepts it
+- small bodies and clients without Accept-Encoding get plain JSON
+- the fast encoder produces the same JSON as the response models
+"""
+
+from datetime import date, timedelta
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+from app.responses import GZIP_MIN_SIZE
+from app.schemas.trend import TrendRead
+
+
+def _seed_residents(test_db, n_residents: int, n_days: int = 10) -> None:
+    start = date(2025, 1, 1)
+    for rid in range(1, n_residents + 1):
+        test_db.add(Resident(id=rid, name=f"Resident {rid}", room_number=str(100 + rid)))
+        for d in range(n_days):
+            test_db.add(
+                InBedDaily(
+                    resident_id=rid,
+                    date=start + timedelta(days=d),
+                    time_in_bed=28800 + 60 * ((rid * 7 + d * 13) % 90),
+                )
+            )
+    test_db.commit()
+
+
+def test_large_response_is_gzipped(client, test_db):
+    _seed_residents(test_db, 40)
+
+    response = client.get("/api/insights/trend/time_in_bed", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert len(response.json()) == 40
+
+
+def test_small_response_is_not_compressed(client, sample_resident, sample_30_days_data):
+    response = client.get(
+        f"/api/insights/trend/time_in_bed/{sample_resident.id}",
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert len(response.content) < GZIP_MIN_SIZE
+    assert "content-encoding" not in response.headers
+
+
+def test_no_compression_without_accept_encoding(client, test_db):
+    _seed_residents(test_db, 40)
+
+    response = client.get("/api/insights/trend/time_in_bed", headers={"Accept-Encoding": ""})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert len(response.content) >= GZIP_MIN_SIZE
+
+
+def test_body_matches_response_model(client, sample_resident, sample_30_days_data):
+    response = client.get(f"/api/insights/trend/time_in_bed/{sample_resident.id}")
+
+    body = response.json()
+    assert response.headers["content-type"] == "application/json"
+    assert body == TrendRead.model_validate(body).model_dump(mode="json")
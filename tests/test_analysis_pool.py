@@ -0,0 +1,111 @@
+"""
+Tests for the bounded analysis process pool (app/services/analysis_pool.py):
+- analyses run in worker processes and match the inline result
+- a full pool rejects new work immediately
+- missed deadlines raise and are counted
+- a dead worker fails its call with AnalysisUnavailableError, releases its
+  slot and the pool is replaced; an idle dead worker is replaced transparently
+- inline mode has a slot per request thread, so concurrent calls do not 503
+- the changepoints endpoint maps a saturated pool to 503
+"""
+
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.services import change_point_service
+from app.services.analysis_pool import (
+    AnalysisPool,
+    AnalysisTimeoutError,
+    AnalysisUnavailableError,
+    PoolSaturatedError,
+    analysis_pool,
+)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = AnalysisPool(workers=1, queue_size=1, timeout=10)
+    p.start()
+    yield p
+    p.shutdown()
+
+
+def test_runs_in_worker_process(pool):
+    signal = np.r_[np.zeros(15), np.ones(15) * 3]
+
+    assert pool.run(os.getpid) != os.getpid()
+    assert pool.run(change_point_service.detect_breakpoints, signal, 1) == (
+        change_point_service.detect_breakpoints(signal, 1)
+    )
+    assert pool.stats()["completed"] >= 2
+
+
+def test_saturated_pool_rejects_and_timeouts_are_reported(pool):
+    with pytest.raises(AnalysisTimeoutError):
+        pool.run(time.sleep, 0.5, timeout=0.01)
+    # the sleeping task still holds the only slot
+    with pytest.raises(PoolSaturatedError):
+        pool.run(os.getpid)
+
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["rejected"] == 1
+
+    time.sleep(0.6)
+    assert pool.run(os.getpid) > 0
+
+
+def test_dead_worker_is_replaced():
+    pool = AnalysisPool(workers=1, queue_size=1, timeout=10)
+    pool.start()
+    try:
+        # the worker dies while running the call
+        with pytest.raises(AnalysisUnavailableError):
+            pool.run(os._exit, 1)
+        assert pool.run(os.getpid) > 0
+
+        # the worker dies between calls
+        os.kill(pool.run(os.getpid), signal.SIGKILL)
+        time.sleep(0.5)
+        assert pool.run(os.getpid) > 0
+
+        stats = pool.stats()
+        assert (stats["in_flight"], stats["restarts"], stats["failed"]) == (0, 2, 1)
+    finally:
+        pool.shutdown()
+
+
+def test_inline_calls_run_concurrently():
+    pool = AnalysisPool(workers=0)
+    both_running = threading.Barrier(2, timeout=5)
+    results = []
+
+    def call():
+        results.append(pool.run(both_running.wait))
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(results) == [0, 1]
+    assert pool.stats()["rejected"] == 0
+
+
+def test_changepoints_returns_503_when_pool_saturated(
+    client, sample_resident, sample_30_days_data, monkeypatch
+):
+    def saturated(*args, **kwargs):
+        raise PoolSaturatedError("analysis pool is saturated")
+
+    monkeypatch.setattr(analysis_pool, "run", saturated)
+    response = client.get(f"/api/insights/changepoints/time_in_bed/{sample_resident.id}")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,96 @@
+"""
+Tests for the sliding-window anomaly scan over a resident's history:
+- vectorized rolling scores equal a loop over the windows (mean/std and median/MAD)
+- the newest day's score equals the latest-day endpoint's
+- days before `start` serve as baseline context but are not reported
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+from app.services import anomaly_service
+
+START = date(2024, 1, 1)
+WINDOW = 30
+
+
+def _values(n: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    values = 28800 + rng.normal(0, 1800, n)
+    values[rng.random(n) < 0.05] = np.nan
+    values[100:140] = 30000.0  # constant stretch: no variance
+    return values
+
+
+def _loop(values: np.ndarray, robust: bool) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    for i in range(len(values)):
+        win = values[max(0, i - WINDOW + 1) : i + 1]
+        win = win[~np.isnan(win)]
+        if np.isnan(values[i]) or len(win) < 2:
+            continue
+        if robust:
+            center = np.median(win)
+            spread = anomaly_service.MAD_SCALE * np.median(np.abs(win - center))
+        else:
+            center, spread = win.mean(), win.std()
+        if spread > 0:
+            out[i] = (values[i] - center) / spread
+    return out
+
+
+@pytest.mark.parametrize("robust", [False, True])
+def test_rolling_scores_match_loop(robust):
+    values = _values(500)
+    fn = anomaly_service.rolling_robust_zscores if robust else anomaly_service.rolling_zscores
+
+    np.testing.assert_allclose(fn(values, WINDOW), _loop(values, robust), rtol=1e-9)
+
+
+@pytest.fixture
+def history(test_db):
+    test_db.add(Resident(id=1, name="Resident 1", room_number="101"))
+    for i, v in enumerate(_values(200).tolist()):
+        test_db.add(
+            InBedDaily(
+                resident_id=1,
+                date=START + timedelta(days=i),
+                time_in_bed=None if np.isnan(v) else v,
+            )
+        )
+    test_db.commit()
+
+
+def test_newest_day_matches_latest_score(test_db, history):
+    scan = anomaly_service.scan_history(1, "time_in_bed", test_db)
+    values = _values(200)
+    z = anomaly_service.rolling_zscores(values, WINDOW)
+
+    latest = anomaly_service.score_latest_day(1, "time_in_bed", test_db)
+
+    assert latest.z_score == pytest.approx(z[-1])
+    assert scan.n_scored == int((~np.isnan(z)).sum())
+    flagged = START + timedelta(days=int(np.flatnonzero(np.abs(np.nan_to_num(z)) >= 1.0)[-1]))
+    assert scan.anomaly_dates[-1] == flagged
+
+
+def test_range_uses_earlier_days_as_context(test_db, history):
+    start = START + timedelta(days=150)
+    full = anomaly_service.scan_history(1, "time_in_bed", test_db)
+
+    ranged = anomaly_service.scan_history(1, "time_in_bed", test_db, start=start)
+
+    in_range = [
+        (d, z) for d, z in zip(full.anomaly_dates, full.anomaly_z_scores, strict=True) if d >= start
+    ]
+    assert list(zip(ranged.anomaly_dates, ranged.anomaly_z_scores, strict=True)) == in_range
+
+
+def test_empty_range_and_unknown_method(test_db, history):
+    assert anomaly_service.scan_history(1, "time_in_bed", test_db, start=date(2030, 1, 1)) is None
+    with pytest.raises(ValueError):
+        anomaly_service.scan_history(1, "time_in_bed", test_db, method="iqr")
@@ -0,0 +1,128 @@
+"""
+Tests for the SQLite connection setup (app/database_config.py):
+- every connection gets the WAL / synchronous / busy_timeout pragmas
+- the read engine is query-only
+- insights keep being served while an ingest holds the write lock
+- control: without WAL the same reads fail with "database is locked"
+"""
+
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database_config import Base, create_engines
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+from app.services import trend_service
+
+HOLD_SECONDS = 0.5
+
+
+@pytest.fixture
+def engines(tmp_path):
+    write, read = create_engines(f"sqlite:///{tmp_path / 'wal.db'}")
+    Base.metadata.create_all(write)
+    with sessionmaker(bind=write)() as db:
+        db.add(Resident(id=1, name="John Doe", room_number="101"))
+        for i in range(60):
+            db.add(
+                InBedDaily(
+                    resident_id=1,
+                    date=date.today() - timedelta(days=59 - i),
+                    time_in_bed=28800 + 60 * (i % 7),
+                )
+            )
+        db.commit()
+    yield write, read
+    write.dispose()
+    read.dispose()
+
+
+def _hold_write_lock(db_path: str, locked: threading.Event, journal_mode: str | None = None):
+    """Bulk-insert rows inside one exclusive transaction held for HOLD_SECONDS."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    if journal_mode:
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    conn.execute("BEGIN EXCLUSIVE")
+    conn.executemany(
+        "INSERT INTO inbed_daily (resident_id, date, time_in_bed) VALUES (2, ?, 28800)",
+        [((date(2000, 1, 1) + timedelta(days=d)).isoformat(),) for d in range(5000)],
+    )
+    locked.set()
+    time.sleep(HOLD_SECONDS)
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def test_connections_use_the_production_pragmas(engines):
+    write, read = engines
+    for engine in engines:
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+    with write.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 0
+    with read.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA query_only").scalar() == 1
+
+
+def test_read_engine_rejects_writes(engines):
+    _, read = engines
+    with read.connect() as conn, pytest.raises(OperationalError, match="readonly"):
+        conn.execute(text("DELETE FROM inbed_daily"))
+
+
+def test_insights_are_served_during_a_bulk_ingest(engines):
+    write, read = engines
+    locked = threading.Event()
+    writer = threading.Thread(
+        target=_hold_write_lock, args=(write.url.database, locked), daemon=True
+    )
+    writer.start()
+    assert locked.wait(5)
+
+    ReadSession = sessionmaker(bind=read)
+    latencies = []
+    while writer.is_alive():
+        t0 = time.perf_counter()
+        with ReadSession() as db:
+            trend = trend_service.compute_trend(1, "time_in_bed", db)
+            n_rows = db.query(InBedDaily).count()
+        latencies.append(time.perf_counter() - t0)
+        assert trend is not None
+        if writer.is_alive():
+            assert n_rows == 60  # snapshot of the last commit, never a partial batch
+    writer.join()
+
+    assert len(latencies) > 1
+    # a blocked reader would wait out the write transaction (or busy_timeout)
+    assert max(latencies) < HOLD_SECONDS / 2
+
+
+def test_rollback_journal_blocks_readers(tmp_path):
+    """Control: the same ingest without WAL locks readers out."""
+    db_path = str(tmp_path / "rollback.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.execute("CREATE TABLE inbed_daily (resident_id, date, time_in_bed)")
+    conn.commit()
+    conn.close()
+
+    locked = threading.Event()
+    writer = threading.Thread(target=_hold_write_lock, args=(db_path, locked, "DELETE"))
+    writer.start()
+    assert locked.wait(5)
+    reader = sqlite3.connect(db_path, timeout=0)
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            reader.execute("SELECT count(*) FROM inbed_daily").fetchone()
+    finally:
+        reader.close()
+        writer.join()
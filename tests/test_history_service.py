@@ -0,0 +1,135 @@
+"""
+Tests for long-horizon history and SQL-side downsampling:
+- week / month buckets aggregated in SQL match the same aggregation in NumPy
+- LTTB keeps the end points and the extremes of the curve
+- ranged change-point / anomaly / trend analyses only read the requested range
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.resident import Resident
+from app.repository import insights_repository
+from app.services import anomaly_service, change_point_service, history_service, trend_service
+
+START = date(2024, 12, 30)  # a Monday
+
+
+def _value(i: int) -> float | None:
+    return None if i % 9 == 4 else 28800.0 + (i * 37 % 17) * 120
+
+
+@pytest.fixture
+def year_of_data(test_db):
+    test_db.add(Resident(id=1, name="Resident 1", room_number="101"))
+    for i in range(400):
+        test_db.add(
+            InBedDaily(resident_id=1, date=START + timedelta(days=i), time_in_bed=_value(i))
+        )
+    test_db.commit()
+
+
+@pytest.mark.parametrize("resolution", ["week", "month"])
+def test_buckets_match_numpy(test_db, year_of_data, resolution):
+    rows = insights_repository.get_metric_buckets(1, "time_in_bed", test_db, resolution=resolution)
+
+    days = [START + timedelta(days=i) for i in range(400)]
+    if resolution == "week":
+        keys = [d - timedelta(days=d.weekday()) for d in days]
+    else:
+        keys = [d.replace(day=1) for d in days]
+    expected = {}
+    for key, i in zip(keys, range(400), strict=True):
+        expected.setdefault(key, []).append(_value(i))
+
+    assert [r[0] for r in rows] == sorted(expected)
+    for bucket, mean, low, high, n in rows:
+        present = [v for v in expected[bucket] if v is not None]
+        assert n == len(present)
+        assert mean == pytest.approx(np.mean(present))
+        assert (low, high) == (min(present), max(present))
+
+
+def test_day_buckets_respect_range(test_db, year_of_data):
+    rows = insights_repository.get_metric_buckets(
+        1, "time_in_bed", test_db, start=START + timedelta(days=3), end=START + timedelta(days=5)
+    )
+
+    assert [r[0] for r in rows] == [START + timedelta(days=i) for i in (3, 4, 5)]
+    assert [r[4] for r in rows] == [1, 0, 1]
+
+
+def test_unknown_resolution_raises(test_db):
+    with pytest.raises(ValueError):
+        insights_repository.get_metric_buckets(1, "time_in_bed", test_db, resolution="hour")
+
+
+def test_lttb_keeps_end_points_and_extremes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50)
+    y[437] = 10.0
+    y[812] = -10.0
+
+    idx = history_service.lttb_indices(x, y, 50)
+
+    assert len(idx) == 50
+    assert idx[0] == 0 and idx[-1] == 999
+    assert np.all(np.diff(idx) > 0)
+    assert 437 in idx and 812 in idx
+
+
+def test_lttb_returns_everything_when_short():
+    x = np.arange(10, dtype=np.float64)
+    assert history_service.lttb_indices(x, x, 10).tolist() == list(range(10))
+
+
+def test_history_downsamples_to_max_points(test_db, year_of_data):
+    full = history_service.compute_history(1, "time_in_bed", test_db)
+    reduced = history_service.compute_history(1, "time_in_bed", test_db, max_points=40)
+
+    assert not full.downsampled and len(full.points) == full.n_buckets
+    assert reduced.downsampled and reduced.n_buckets == full.n_buckets
+    assert len(reduced.points) == 40
+    assert reduced.points[0] == full.points[0] and reduced.points[-1] == full.points[-1]
+
+
+def test_ranged_analyses_read_only_the_range(test_db, year_of_data):
+    end = START + timedelta(days=59)
+    series = insights_repository.get_metric_range_series(
+        1, "time_in_bed", test_db, START, end, "week"
+    )
+    expected = change_point_service.change_points_from_series(
+        1, "time_in_bed", series, resolution="week"
+    )
+
+    result = change_point_service.compute_change_points(
+        1, "time_in_bed", test_db, start=START, end=end, resolution="week"
+    )
+    anomalies = anomaly_service.compute_anomalies(1, "time_in_bed", test_db, start=START, end=end)
+
+    assert result == expected
+    assert "over 9 weeks from 2024-12-30 to 2025-02-24" in result.description
+    assert all(START <= d <= end for d in anomalies.anomaly_dates)
+
+
+def test_change_points_reject_too_long_ranges(test_db, year_of_data, monkeypatch):
+    monkeypatch.setattr(change_point_service, "MAX_RANGE_POINTS", 100)
+
+    with pytest.raises(change_point_service.RangeTooLargeError):
+        change_point_service.compute_change_points(1, "time_in_bed", test_db, start=START)
+
+
+def test_trend_as_of_matches_rows_up_to_end(test_db, year_of_data):
+    end = START + timedelta(days=100)
+    series = insights_repository.get_last_n_metric_series(
+        1, "time_in_bed", trend_service.BASELINE, test_db, end=end
+    )
+
+    trend = trend_service.compute_trend(1, "time_in_bed", test_db, end=end)
+
+    assert series.date_at(len(series) - 1) == end
+    assert trend == trend_service.trend_from_series(1, "time_in_bed", series)
+    assert trend != trend_service.compute_trend(1, "time_in_bed", test_db)
@@ -0,0 +1,48 @@
+"""
+Tests for the chunked CSV import command (app/import_csv.py):
+- the three exports are upserted independently and end up in one row per day
+- files with a resident_id column are split across residents
+- re-importing the same files does not duplicate rows
+"""
+
+from datetime import date
+
+from app.import_csv import import_file
+from app.orm_models.inbed_daily import InBedDaily
+
+
+def _write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_import_merges_exports_by_day(tmp_path, test_db, sample_resident):
+    tib = _write(tmp_path / "tib.csv", "Date,Time in bed\n01/07/2025,28800\n02/07/2025,27000.5\n")
+    act = _write(
+        tmp_path / "act.csv",
+        "Date,At rest,Low,High\n01/07/2025,20000,5000,3800\n02/07/2025,19000,4000,3000\n",
+    )
+    out = _write(tmp_path / "out.csv", "Date,Night,Day\n01/07/2025,2,1\n02/07/2025,0,3\n")
+
+    for path, kind in ((tib, "time_in_bed"), (act, "activity"), (out, "times_out")):
+        import_file(test_db, path, kind, sample_resident.id, chunk_size=1)
+
+    rows = test_db.query(InBedDaily).order_by(InBedDaily.date).all()
+    assert len(rows) == 2
+    assert rows[0].date == date(2025, 7, 1)
+    assert rows[0].time_in_bed == 28800.0
+    assert rows[0].low_activity == 5000.0
+    assert rows[1].times_out_bed_day == 3
+
+
+def test_import_multi_resident_file_is_idempotent(tmp_path, test_db):
+    tib = _write(
+        tmp_path / "tib.csv",
+        "resident_id,Date,Time in bed\n1,01/07/2025,100\n2,01/07/2025,200\n2,02/07/2025,\n",
+    )
+
+    assert import_file(test_db, tib, "time_in_bed", resident_id=99) == 3
+    import_file(test_db, tib, "time_in_bed", resident_id=99)
+
+    rows = test_db.query(InBedDaily).order_by(InBedDaily.resident_id, InBedDaily.date).all()
+    assert [(r.resident_id, r.time_in_bed) for r in rows] == [(1, 100.0), (2, 200.0), (2, None)]
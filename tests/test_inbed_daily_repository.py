@@ -0,0 +1,147 @@
+"""
+Tests for the InBedDaily write path and the (resident_id, date) schema:
+- upsert_daily_rows inserts, updates in place and is idempotent
+- partial-column upserts leave the other metric columns untouched
+- the migration deduplicates and indexes a legacy table; at startup it refuses
+  to delete duplicates instead
+- the row count of the data version is kept by the write path, and filled in
+  for existing databases by a migration
+"""
+
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from app.migrations import inbed_daily_resident_date, resident_data_revision_rows, run_migrations
+from app.orm_models.inbed_daily import InBedDaily
+from app.repository.inbed_daily_repository import get_data_version, upsert_daily_rows
+from app.services.ingest_service import store_daily_rows, store_daily_upload
+
+
+def _row(day: int, time_in_bed: float) -> dict:
+    return {
+        "resident_id": 1,
+        "date": date(2025, 7, day),
+        "time_in_bed": time_in_bed,
+        "at_rest": 20000.0,
+    }
+
+
+def test_upsert_is_idempotent(test_db, sample_resident):
+    rows = [_row(1, 28800.0), _row(2, 27000.0)]
+    upsert_daily_rows(test_db, rows)
+    upsert_daily_rows(test_db, rows)
+    test_db.commit()
+
+    assert test_db.query(InBedDaily).count() == 2
+
+
+def test_upsert_updates_existing_day(test_db, sample_resident):
+    upsert_daily_rows(test_db, [_row(1, 28800.0)])
+    upsert_daily_rows(test_db, [_row(1, 14400.0)])
+    test_db.commit()
+
+    stored = test_db.query(InBedDaily).one()
+    assert stored.time_in_bed == 14400.0
+
+
+def test_partial_upsert_keeps_other_columns(test_db, sample_resident):
+    upsert_daily_rows(test_db, [_row(1, 28800.0)])
+    upsert_daily_rows(test_db, [{"resident_id": 1, "date": date(2025, 7, 1), "low_activity": 5.0}])
+    test_db.commit()
+
+    stored = test_db.query(InBedDaily).one()
+    assert stored.time_in_bed == 28800.0
+    assert stored.low_activity == 5.0
+
+
+def test_duplicate_day_is_rejected(test_db, sample_resident):
+    test_db.add(InBedDaily(resident_id=1, date=date(2025, 7, 1), time_in_bed=1.0))
+    test_db.add(InBedDaily(resident_id=1, date=date(2025, 7, 1), time_in_bed=2.0))
+    with pytest.raises(IntegrityError):
+        test_db.commit()
+
+
+def _legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE inbed_daily (id INTEGER PRIMARY KEY, date DATE, resident_id INTEGER, time_in_bed FLOAT)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO inbed_daily (id, date, resident_id, time_in_bed) VALUES "
+                "(1, '2025-07-01', 1, 1.0), (2, '2025-07-01', 1, 2.0), (3, '2025-07-02', 1, 3.0)"
+            )
+        )
+    return engine
+
+
+def test_migration_dedupes_and_indexes_legacy_table(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    assert inbed_daily_resident_date.upgrade(engine) == 1
+    # second run is a no-op
+    assert inbed_daily_resident_date.upgrade(engine) == 0
+
+    index_names = {ix["name"] for ix in inspect(engine).get_indexes("inbed_daily")}
+    assert inbed_daily_resident_date.INDEX_NAME in index_names
+    with engine.connect() as conn:
+        kept = conn.execute(text("SELECT id FROM inbed_daily ORDER BY id")).scalars().all()
+    assert kept == [2, 3]
+    engine.dispose()
+
+
+def test_startup_migration_does_not_delete_rows(tmp_path):
+    engine = _legacy_engine(tmp_path)
+
+    with pytest.raises(inbed_daily_resident_date.DuplicateRowsError, match="1 duplicate"):
+        run_migrations(engine)
+
+    index_names = {ix["name"] for ix in inspect(engine).get_indexes("inbed_daily")}
+    assert inbed_daily_resident_date.INDEX_NAME not in index_names
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM inbed_daily")).scalar_one() == 3
+    engine.dispose()
+
+
+def test_data_version_row_count_is_kept_by_the_write_path(test_db, sample_resident):
+    # the second record of day 1 is an update
+    assert store_daily_upload(test_db, [_row(1, 1.0), _row(2, 2.0), _row(1, 3.0)]) == (2, 1)
+    assert get_data_version(test_db, 1).n_rows == 2
+    store_daily_rows(test_db, [_row(2, 4.0), _row(3, 5.0)])
+
+    version = get_data_version(test_db, 1)
+    assert version.n_rows == test_db.query(InBedDaily).count() == 3
+    assert (version.last_date, version.revision) == (date(2025, 7, 3), 2)
+    assert get_data_version(test_db, 2) == (0, None, 0)
+
+
+def test_migration_counts_rows_of_existing_residents(tmp_path):
+    engine = _legacy_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE resident_data_revisions "
+                "(resident_id INTEGER PRIMARY KEY, revision INTEGER NOT NULL, updated_at DATETIME)"
+            )
+        )
+        conn.execute(text("INSERT INTO resident_data_revisions VALUES (1, 5, NULL)"))
+        conn.execute(
+            text("INSERT INTO inbed_daily (id, date, resident_id) VALUES (4, '2025-07-01', 2)")
+        )
+
+    assert resident_data_revision_rows.upgrade(engine) is True
+    # second run is a no-op
+    assert resident_data_revision_rows.upgrade(engine) is False
+
+    with engine.connect() as conn:
+        counters = conn.execute(
+            text("SELECT resident_id, revision, n_rows FROM resident_data_revisions ORDER BY 1")
+        ).all()
+    assert [tuple(r) for r in counters] == [(1, 5, 3), (2, 0, 1)]
+    engine.dispose()
@@ -0,0 +1,65 @@
+"""
+Tests for the insight cache (app/services/insight_cache.py):
+- LRU eviction, TTL expiry and version mismatches
+- the trend endpoint is served from cache until the resident's data changes
+"""
+
+from datetime import date, timedelta
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.services.ingest_service import store_daily_rows
+from app.services.insight_cache import InsightCache, insight_cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = InsightCache(maxsize=2)
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    cache.get("a", 1)
+    cache.put("c", 1, "C")
+
+    assert cache.get("b", 1) == (False, None)
+    assert cache.get("a", 1) == (True, "A")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_version_change_is_a_miss():
+    cache = InsightCache()
+    calls = []
+    cache.get_or_compute("k", 1, lambda: calls.append(1) or "v1")
+    cache.get_or_compute("k", 1, lambda: calls.append(1) or "v1")
+    assert cache.get_or_compute("k", 2, lambda: "v2") == "v2"
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_ttl_expires_entries():
+    cache = InsightCache(ttl=0)
+    cache.put("k", 1, "v")
+    assert cache.get("k", 1) == (False, None)
+
+
+def test_trend_cached_until_data_changes(client, test_db, sample_resident, sample_30_days_data):
+    url = f"/api/insights/trend/time_in_bed/{sample_resident.id}"
+    first = client.get(url).json()
+    client.get(url)
+    assert insight_cache.stats()["hits"] == 1
+
+    # a correction of the newest day (same count, same last date) must invalidate
+    newest = test_db.query(InBedDaily).order_by(InBedDaily.date.desc()).first()
+    store_daily_rows(
+        test_db, [{"resident_id": sample_resident.id, "date": newest.date, "time_in_bed": 3600.0}]
+    )
+    corrected = client.get(url).json()
+    assert corrected["last_7_days_hours"] != first["last_7_days_hours"]
+
+    # a day appended outside the ingest path changes count/date and invalidates too
+    test_db.add(
+        InBedDaily(
+            date=date.today() + timedelta(days=1), time_in_bed=0, resident_id=sample_resident.id
+        )
+    )
+    test_db.commit()
+    appended = client.get(url).json()
+    assert appended["last_7_days_hours"] != corrected["last_7_days_hours"]
@@ -0,0 +1,111 @@
+"""
+Tests for the latency instrumentation:
+- histogram buckets and the Prometheus text rendering
+- per-stage service timings and per-route request timings reach /metrics
+- service debug logging is off by default and structured when enabled
+"""
+
+import logging
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.services import instrumentation
+from app.services.instrumentation import Histogram
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_histogram_buckets_are_cumulative():
+    hist = Histogram("demo_seconds", "Demo.", buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(seconds, route="/x")
+
+    lines = hist.render()
+
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/x"} 4' in lines
+    assert 'demo_seconds_sum{route="/x"} 3.65' in lines
+
+
+def test_stage_records_duration_even_on_error():
+    with pytest.raises(ValueError), instrumentation.stage("trend", "analysis"):
+        raise ValueError("boom")
+
+    snapshot = instrumentation.STAGE_DURATION.snapshot()
+    counts, _ = snapshot[(("service", "trend"), ("stage", "analysis"))]
+    assert sum(counts) == 1
+
+
+def _after_warm_up(client):
+    """Wait for the startup warm-up (it runs every analysis once), then reset."""
+    deadline = time.monotonic() + 10
+    while client.get("/ready").status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    instrumentation.reset()
+
+
+def test_metrics_endpoint_reports_routes_stages_and_collectors(client, test_db, sample_resident):
+    for i in range(30):
+        test_db.add(
+            InBedDaily(
+                resident_id=sample_resident.id,
+                date=date(2024, 1, 1) + timedelta(days=i),
+                time_in_bed=8 * 3600 + (i % 5) * 900,
+            )
+        )
+    test_db.commit()
+    _after_warm_up(client)
+    client.get(f"/api/insights/anomalies/time_in_bed/{sample_resident.id}")
+    client.get(f"/api/insights/changepoints/time_in_bed/{sample_resident.id}")
+    client.get("/api/insights/trend/time_in_bed/99999")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    # route templates, not concrete ids
+    assert (
+        'momo_http_request_duration_seconds_count{method="GET",'
+        'route="/api/insights/anomalies/{metric}/{resident_id}",status="200"} 1'
+    ) in body
+    assert 'route="/api/insights/trend/{metric}/{resident_id}",status="404"' in body
+    assert "/api/insights/anomalies/time_in_bed/" not in body
+    for service, stage_name in [
+        ("anomalies", "fetch"),
+        ("anomalies", "prepare"),
+        ("anomalies", "analysis"),
+        ("anomalies", "serialize"),
+        ("changepoints", "analysis"),
+    ]:
+        assert (
+            f'momo_insight_stage_duration_seconds_count{{service="{service}",stage="{stage_name}"}} 1'
+            in body
+        )
+    assert "momo_insight_cache_misses_total" in body
+    assert 'momo_analysis_pool_tasks_total{outcome="completed"}' in body
+
+
+def test_service_debug_logging(client, sample_resident, sample_30_days_data, caplog):
+    _after_warm_up(client)
+    with caplog.at_level(logging.INFO, logger="app"):
+        client.get(f"/api/insights/anomalies/time_in_bed/{sample_resident.id}")
+    assert not caplog.records
+
+    with caplog.at_level(logging.DEBUG, logger="app"):
+        client.get(f"/api/insights/changepoints/time_in_bed/{sample_resident.id}")
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(
+        m.startswith(f"change points resident={sample_resident.id} metric=time_in_bed")
+        for m in messages
+    )
@@ -1,6 +1,12 @@
+import subprocess
+import sys
+import time
+
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.services import warmup
+from app.services.warmup import readiness
 
 client = TestClient(app)
 
@@ -9,3 +15,93 @@ def test_health_check():
     """Test if the API is running"""
     response = client.get("/")
     assert response.status_code == 200
+
+
+def test_ready_is_503_before_warm_up():
+    """Without the lifespan hook having warmed up, the app reports not ready"""
+    readiness.reset()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["ready"] is False
+
+
+def test_ready_flips_after_startup_warm_up():
+    """The lifespan warm-up runs every step and then marks the app ready"""
+    with TestClient(app) as started:
+        deadline = time.monotonic() + 10
+        response = started.get("/ready")
+        while response.status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            response = started.get("/ready")
+
+    assert response.status_code == 200
+    status = response.json()
+    assert status["ready"] is True
+    assert status["error"] is None
+    assert set(status["steps_seconds"]) == {"database", "analysis_pool", "analysis"}
+
+
+def test_failed_database_step_keeps_app_unready(monkeypatch):
+    """Without its database the app stays unready and reports why"""
+
+    def unreachable():
+        raise OSError("database unreachable")
+
+    monkeypatch.setitem(warmup.STEPS, "database", unreachable)
+    monkeypatch.setitem(warmup.STEPS, "analysis", lambda: None)
+    readiness.reset()
+    warmup.warm_up()
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    status = response.json()
+    assert status["ready"] is False
+    assert status["error"] == "database: database unreachable"
+
+
+def test_failed_database_step_recovers_on_probe(monkeypatch):
+    """A database that comes back later makes the next probe ready"""
+    attempts = []
+
+    def busy_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("database is locked")
+
+    monkeypatch.setitem(warmup.STEPS, "database", busy_once)
+    monkeypatch.setitem(warmup.STEPS, "analysis", lambda: None)
+    readiness.reset()
+    warmup.warm_up()
+    assert readiness.ready is False
+
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert len(attempts) == 2
+    # ready: no more probing
+    client.get("/ready")
+    assert len(attempts) == 2
+
+
+def test_failed_optional_step_does_not_block_readiness(monkeypatch):
+    def broken():
+        raise RuntimeError("no workers")
+
+    monkeypatch.setitem(warmup.STEPS, "analysis_pool", broken)
+    monkeypatch.setitem(warmup.STEPS, "analysis", lambda: None)
+    readiness.reset()
+    warmup.warm_up()
+
+    status = client.get("/ready").json()
+    assert status["ready"] is True
+    assert status["error"] == "analysis_pool: no workers"
+
+
+def test_app_import_does_not_load_heavy_analysis_libraries():
+    """pandas / ruptures / SciPy must stay off the serving import path"""
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('pandas', 'ruptures', 'scipy') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == ""
@@ -0,0 +1,103 @@
+"""
+Tests for the NumPy-backed MetricSeries:
+- gap filling and statistics match the pandas operations they replace
+- rows straight from a newest-first cursor end up oldest first
+- the services give the same answers from a series as from a DataFrame
+- RowBatch windows never reach into the rows of another resident
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.repository.metric_series import MetricSeries, RowBatch, window_sums
+from app.services import anomaly_service
+from app.services.formatting import format_seconds_h_min
+
+START = date(2025, 1, 1)
+
+
+def _rows(values):
+    return [(START + timedelta(days=i), v) for i, v in enumerate(values)]
+
+
+CASES = [
+    [1.0, 2.0, 3.0],
+    [None, 2.0, None, 4.0, None],
+    [None, None, 5.0],
+    [7.0, None, None],
+    [None, None],
+    [],
+]
+
+
+@pytest.mark.parametrize("values", CASES)
+def test_filled_matches_pandas_ffill_bfill(values):
+    series = MetricSeries.from_rows(_rows(values))
+    expected = pd.Series(values, dtype="float64").ffill().bfill().to_numpy()
+
+    np.testing.assert_array_equal(series.filled().values, expected)
+
+
+@pytest.mark.parametrize("values", CASES)
+def test_mean_and_std_match_pandas(values):
+    series = MetricSeries.from_rows(_rows(values))
+    expected = pd.Series(values, dtype="float64")
+
+    np.testing.assert_equal(series.mean(), expected.mean())
+    np.testing.assert_equal(series.std(), expected.std(ddof=0))
+
+
+def test_newest_first_rows_are_reversed():
+    rows = list(reversed(_rows([1.0, None, 3.0])))
+
+    series = MetricSeries.from_rows(rows, newest_first=True)
+
+    assert series.date_at(0) == START
+    assert series.date_at(2) == START + timedelta(days=2)
+    np.testing.assert_array_equal(series.values, [1.0, np.nan, 3.0])
+    np.testing.assert_array_equal(series.tail(2).values, [np.nan, 3.0])
+
+
+def test_anomalies_from_series_match_dataframe_computation():
+    rng = np.random.default_rng(3)
+    values = [None if i % 9 == 4 else float(v) for i, v in enumerate(rng.normal(28000, 2500, 30))]
+
+    result = anomaly_service.anomalies_from_series(
+        1, "time_in_bed", MetricSeries.from_rows(_rows(values))
+    )
+
+    df = pd.DataFrame(_rows(values), columns=["date", "value"])
+    filled = df["value"].astype("float64").ffill().bfill()
+    z = (filled - filled.mean()) / filled.std(ddof=0)
+    mask = z.abs() >= anomaly_service.Z_THRESHOLD
+    assert result.anomaly_indices == [int(i) for i in df.index[mask]]
+    assert result.anomaly_dates == df.loc[mask, "date"].tolist()
+    assert result.anomaly_values == [format_seconds_h_min(v) for v in filled[mask]]
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(9000, "2h 30min"), (3600, "1h"), (-120.0, "2min"), (None, "N/A"), (np.nan, "N/A")],
+)
+def test_format_seconds_h_min(value, expected):
+    assert format_seconds_h_min(value) == expected
+
+
+def test_row_batch_windows_stay_within_each_resident():
+    def rows(resident_id, values):
+        return [(START + timedelta(days=i), v, resident_id) for i, v in enumerate(values)]
+
+    first, second = rows(1, [1.0, None, 3.0, 4.0]), rows(2, [10.0, 20.0])
+    batch = RowBatch({1: (first[:2], first[2:]), 2: ([], second)})
+
+    positions = batch.changed_positions()
+    values, in_segment = batch.windows(positions, 3)
+    counts, sums = window_sums(values)
+
+    assert positions.tolist() == [2, 3, 4, 5]
+    assert in_segment.sum(axis=1).tolist() == [3, 3, 1, 2]
+    assert counts[:, 0].tolist() == [2, 2, 1, 2]
+    assert sums[:, 0].tolist() == [4.0, 7.0, 10.0, 30.0]
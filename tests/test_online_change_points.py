@@ -0,0 +1,104 @@
+"""
+Tests for the online change-point detector (online_change_point_service):
+- days stored one at a time give the same state as a replay of the history
+- a level shift is reported on the last day before it, and stays put as
+  later days arrive
+- corrections replay the history; a missing state is replayed on read
+- no change points before the warm-up is complete
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.orm_models.inbed_daily import InBedDaily
+from app.orm_models.online_change_point import OnlineChangePointState
+from app.services import online_change_point_service as online
+from app.services.ingest_service import store_daily_rows
+
+START = date(2025, 1, 1)
+SHIFT_DAY = 60
+
+
+def _values(n: int) -> list:
+    rng = np.random.default_rng(7)
+    values = 28800.0 + rng.normal(0, 1200, n) + np.where(np.arange(n) >= SHIFT_DAY, 7200, 0)
+    return [None if i % 17 == 9 else round(float(v), 1) for i, v in enumerate(values)]
+
+
+def _day(i: int, time_in_bed: float | None) -> dict:
+    return {
+        "resident_id": 1,
+        "date": START + timedelta(days=i),
+        "time_in_bed": time_in_bed,
+        "at_rest": 20000.0 + (i % 5) * 100,
+    }
+
+
+def _state(db, metric="time_in_bed") -> tuple:
+    db.expire_all()
+    row = db.get(OnlineChangePointState, (1, metric))
+    return (row.n_rows, row.n_values, row.last_date, row.state, row.change_points)
+
+
+def test_daily_appends_match_history_replay(test_db, sample_resident):
+    for i, v in enumerate(_values(120)):
+        store_daily_rows(test_db, [_day(i, v)])
+    appended = _state(test_db)
+
+    online.rebuild_all(test_db)
+    assert _state(test_db) == appended
+
+
+def test_level_shift_is_found_and_stays(test_db, sample_resident):
+    values = _values(120)
+    store_daily_rows(test_db, [_day(i, v) for i, v in enumerate(values[:90])])
+    first = online.current_change_points(test_db, 1, "time_in_bed")
+
+    for i in range(90, 120):
+        store_daily_rows(test_db, [_day(i, values[i])])
+    later = online.current_change_points(test_db, 1, "time_in_bed")
+
+    assert first.change_point_dates == [str(START + timedelta(days=SHIFT_DAY - 1))]
+    assert later.change_point_dates == first.change_point_dates
+    assert later.change_point_indices == first.change_point_indices
+    assert "online PELT" in later.description
+    assert online.current_change_points(test_db, 1, "at_rest").n_change_points == 0
+
+
+def test_correction_replays_history(test_db, sample_resident):
+    values = _values(100)
+    store_daily_rows(test_db, [_day(i, v) for i, v in enumerate(values)])
+    # move the shift 20 days earlier
+    store_daily_rows(
+        test_db, [_day(i, values[i] and values[i] + 7200) for i in range(40, SHIFT_DAY)]
+    )
+    corrected = _state(test_db)
+
+    online.rebuild_all(test_db)
+    assert _state(test_db) == corrected
+    result = online.current_change_points(test_db, 1, "time_in_bed")
+    assert result.change_point_dates == [str(START + timedelta(days=39))]
+
+
+def test_missing_state_is_replayed_on_read(test_db, sample_resident):
+    values = _values(100)
+    store_daily_rows(test_db, [_day(i, v) for i, v in enumerate(values)])
+    stored = online.current_change_points(test_db, 1, "time_in_bed")
+
+    # rows written outside the ingest path make the state stale
+    test_db.add(InBedDaily(resident_id=1, date=START + timedelta(days=100), time_in_bed=36000.0))
+    test_db.commit()
+    replayed = online.current_change_points(test_db, 1, "time_in_bed")
+
+    assert replayed.change_point_dates == stored.change_point_dates
+    assert f"up to {START + timedelta(days=100)}" in replayed.description
+
+
+def test_no_change_points_during_warmup(test_db, sample_resident):
+    store_daily_rows(test_db, [_day(i, 28800.0 + (i % 2) * 7200) for i in range(10)])
+
+    result = online.current_change_points(test_db, 1, "time_in_bed")
+    assert result.n_change_points == 0
+    assert result.description.startswith("No online change points yet: 10 of 30")
+    assert online.current_change_points(test_db, 2, "time_in_bed") is None
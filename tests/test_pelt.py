@@ -0,0 +1,78 @@
+"""
+Tests for the NumPy PELT engine (app/services/pelt.py):
+- breakpoints match ruptures.Pelt(model="l2") on standardized random series
+- the change_point_service wrapper uses the default grid (min_size=2, jump=5)
+- OnlinePelt, fed one value at a time, matches the batch engine (jump=1) and
+  survives a state round trip
+"""
+
+import numpy as np
+import pytest
+import ruptures as rpt
+
+from app.services.pelt import OnlinePelt, Pelt
+
+
+def _series(rng, n):
+    x = rng.normal(size=n)
+    for _ in range(rng.integers(0, 4)):
+        x[rng.integers(0, n) :] += rng.normal(0, 3)
+    return (x - x.mean()) / x.std()
+
+
+@pytest.mark.parametrize("n", [2, 7, 30, 31, 90, 365])
+@pytest.mark.parametrize("pen", [0.5, 1, 5])
+def test_matches_ruptures_on_standardized_series(n, pen):
+    rng = np.random.default_rng(n)
+    for _ in range(20):
+        x = _series(rng, n)
+        expected = rpt.Pelt(model="l2").fit(x).predict(pen=pen)
+        assert Pelt(model="l2").fit(x).predict(pen=pen) == expected
+
+
+@pytest.mark.parametrize("min_size,jump", [(1, 1), (2, 2), (3, 5)])
+def test_matches_ruptures_on_other_grids(min_size, jump):
+    rng = np.random.default_rng(0)
+    for n in (10, 50, 120):
+        x = _series(rng, n)
+        expected = rpt.Pelt(model="l2", min_size=min_size, jump=jump).fit(x).predict(pen=1)
+        assert Pelt(min_size=min_size, jump=jump).fit(x).predict(pen=1) == expected
+
+
+def test_constant_signal_has_no_change_points():
+    assert Pelt().fit(np.zeros(30)).predict(pen=1) == [30]
+
+
+def test_clear_level_shift_is_found():
+    x = np.r_[np.zeros(15), np.ones(15) * 4]
+    assert Pelt().fit((x - x.mean()) / x.std()).predict(pen=1) == [15, 30]
+
+
+@pytest.mark.parametrize("pen", [0.5, 1, 5])
+def test_online_pelt_matches_batch_pelt(pen):
+    rng = np.random.default_rng(int(pen * 10))
+    for n in (2, 3, 30, 90, 365):
+        x = _series(rng, n)
+        online = OnlinePelt(pen, max_candidates=n + 1, max_history=n, label_size=1)
+        for i, v in enumerate(x):
+            online.update(float(v), (i,))
+        expected = Pelt(jump=1).fit(x).predict(pen=pen)[:-1]
+        assert [b for b, _ in online.change_points()] == expected
+        # labels name the last observation before each change
+        assert [label for _, label in online.change_points()] == [(b - 1,) for b in expected]
+
+
+def test_online_pelt_state_round_trip():
+    x = np.r_[np.zeros(40), np.full(40, 3.0), np.zeros(40)] + np.random.default_rng(1).normal(
+        size=120
+    )
+    continuous = OnlinePelt(4.0, max_candidates=10, max_history=2, label_size=2)
+    restored = OnlinePelt(4.0, max_candidates=10, max_history=2, label_size=2)
+    for i, v in enumerate(x):
+        continuous.update(float(v), (i, v))
+        restored = OnlinePelt.from_bytes(restored.to_bytes())
+        restored.update(float(v), (i, v))
+
+    assert restored.change_points() == continuous.change_points()
+    assert [(b, label[0]) for b, label in restored.change_points()] == [(40, 39), (80, 79)]
+    assert restored.candidates.shape[1] <= 10
@@ -0,0 +1,102 @@
+"""
+Tests for the insight precompute job (precomputed_insights):
+- stored results equal the live endpoint responses
+- only residents whose data changed are recomputed on the next run
+- the endpoints serve stored rows of the current data version, and fall back
+  to live computation once a write makes them stale
+"""
+
+from datetime import date, timedelta
+
+from app.orm_models.precomputed_insight import PrecomputedInsight
+from app.orm_models.resident import Resident
+from app.services import precompute_service
+from app.services.ingest_service import store_daily_rows
+from app.services.insight_cache import insight_cache
+
+START = date(2025, 1, 1)
+
+PATHS = [
+    "summary/{rid}",
+    "trend/time_in_bed/{rid}",
+    "changepoints/at_rest/{rid}",
+    "anomalies/low_activity/{rid}",
+]
+
+
+def _seed(db, resident_ids, n_days=40):
+    rows = []
+    for rid in resident_ids:
+        db.add(Resident(id=rid, name=f"Resident {rid}", room_number=str(100 + rid)))
+        for i in range(n_days):
+            value = 28800.0 + ((i * 37 + rid * 11) % 23) * 240
+            rows.append(
+                {
+                    "resident_id": rid,
+                    "date": START + timedelta(days=i),
+                    "time_in_bed": value,
+                    "at_rest": value * 0.7,
+                    "low_activity": 5000.0 + (i % 5) * 300,
+                    "high_activity": None if i % 9 == 3 else 3600.0,
+                }
+            )
+    db.commit()
+    store_daily_rows(db, rows)
+    db.commit()
+
+
+def test_stored_results_match_live_responses(client, test_db):
+    _seed(test_db, [1, 2])
+    live = {p: client.get("/api/insights/" + p.format(rid=1)).json() for p in PATHS}
+    insight_cache.clear()
+
+    stats = precompute_service.precompute(test_db, workers=0)
+    stored = {p: client.get("/api/insights/" + p.format(rid=1)).json() for p in PATHS}
+
+    assert stats.residents == 2
+    # summary + 3 analyses x 4 metrics per resident
+    assert stats.rows == 2 * 13
+    assert stored == live
+    assert insight_cache.stats()["stored_hits"] == len(PATHS)
+
+
+def test_only_changed_residents_are_recomputed(test_db):
+    _seed(test_db, [1, 2, 3])
+    precompute_service.precompute(test_db, workers=0)
+    assert precompute_service.residents_to_refresh(test_db) == []
+
+    store_daily_rows(
+        test_db, [{"resident_id": 2, "date": START + timedelta(days=40), "time_in_bed": 30000.0}]
+    )
+    test_db.commit()
+
+    assert precompute_service.residents_to_refresh(test_db) == [2]
+    assert precompute_service.precompute(test_db, workers=0).residents == 1
+
+
+def test_stale_rows_fall_back_to_live_computation(client, test_db):
+    _seed(test_db, [1])
+    precompute_service.precompute(test_db, workers=0)
+    row = test_db.get(PrecomputedInsight, (1, "trend", "time_in_bed", 28))
+    row.payload = row.payload.replace('"description":"', '"description":"stored: ')
+    test_db.commit()
+
+    served = client.get("/api/insights/trend/time_in_bed/1").json()
+    assert served["description"].startswith("stored: ")
+
+    client.post(
+        "/api/ingest/daily",
+        content=f'{{"resident_id": 1, "date": "{START + timedelta(days=40)}", "time_in_bed": 1}}',
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    live = client.get("/api/insights/trend/time_in_bed/1").json()
+    assert not live["description"].startswith("stored: ")
+
+
+def test_not_enough_data_is_stored_as_null(client, test_db):
+    _seed(test_db, [1], n_days=3)
+    precompute_service.precompute(test_db, workers=0)
+
+    row = test_db.get(PrecomputedInsight, (1, "trend", "time_in_bed", 28))
+    assert row.payload == "null"
+    assert client.get("/api/insights/trend/time_in_bed/1").status_code == 404
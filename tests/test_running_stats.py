@@ -0,0 +1,83 @@
+"""
+Tests for the incrementally maintained window statistics:
+- appending one day at a time matches a full recompute of the window
+- corrections and backfills fall back to a recompute
+- score_latest matches a direct z-score of the newest day
+"""
+
+import statistics
+from datetime import date, timedelta
+
+import pytest
+
+from app.orm_models.metric_window_stats import MetricWindowStats
+from app.services import running_stats_service
+from app.services.ingest_service import store_daily_rows
+
+START = date(2025, 1, 1)
+
+
+def _day(i: int, time_in_bed: float | None) -> dict:
+    return {
+        "resident_id": 1,
+        "date": START + timedelta(days=i),
+        "time_in_bed": time_in_bed,
+        "at_rest": 20000.0 + i,
+        "low_activity": 5000.0,
+        "high_activity": 3800.0,
+    }
+
+
+def _values(n: int) -> list:
+    # a few gaps (None) so non-null counting is exercised
+    return [None if i % 11 == 5 else 28800.0 + (i * 37 % 13) * 300 for i in range(n)]
+
+
+def _snapshot(db) -> dict:
+    rows = db.query(MetricWindowStats).filter(MetricWindowStats.resident_id == 1).all()
+    return {
+        r.metric: (r.n_rows, r.n_values, r.total, r.total_sq, r.first_date, r.last_date)
+        for r in rows
+    }
+
+
+def test_appends_match_full_recompute(test_db, sample_resident):
+    for i, v in enumerate(_values(45)):
+        store_daily_rows(test_db, [_day(i, v)])
+    incremental = _snapshot(test_db)
+
+    running_stats_service.rebuild_resident(test_db, 1)
+    rebuilt = _snapshot(test_db)
+
+    for metric, (n_rows, n_values, total, total_sq, first, last) in rebuilt.items():
+        inc = incremental[metric]
+        assert inc[:2] == (n_rows, n_values)
+        assert inc[2] == pytest.approx(total)
+        assert inc[3] == pytest.approx(total_sq)
+        assert inc[4:] == (first, last)
+    assert rebuilt["time_in_bed"][0] == running_stats_service.WINDOW
+
+
+def test_correction_recomputes_window(test_db, sample_resident):
+    store_daily_rows(test_db, [_day(i, 28800.0) for i in range(10)])
+    store_daily_rows(test_db, [_day(3, 0.0)])
+
+    stats = test_db.get(MetricWindowStats, (1, "time_in_bed"))
+    assert stats.total == pytest.approx(9 * 28800.0)
+
+
+def test_score_latest_matches_direct_zscore(test_db, sample_resident):
+    values = _values(40)
+    for i, v in enumerate(values):
+        store_daily_rows(test_db, [_day(i, v)])
+
+    window = [v for v in values[-running_stats_service.WINDOW :] if v is not None]
+    expected = (values[-1] - statistics.fmean(window)) / statistics.pstdev(window)
+
+    latest = running_stats_service.score_latest(test_db, 1, "time_in_bed")
+    assert latest.date == START + timedelta(days=39)
+    assert latest.z_score == pytest.approx(expected)
+
+
+def test_score_latest_without_data(test_db, sample_resident):
+    assert running_stats_service.score_latest(test_db, 1, "time_in_bed") is None
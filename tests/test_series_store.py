@@ -0,0 +1,202 @@
+"""
+Tests for the memory-mapped series store (series_store, SERIES_STORE_DIR):
+- windows read from the store match the SQL windows (gaps, NULLs, `end`),
+  consecutive days included
+- the grid grows (more residents, older and newer days) and other processes'
+  mappings follow
+- residents whose history is not in the store, and writes that were not
+  committed, are read from SQL until a rebuild
+- overlapping writers: a row is read from the store only once every write
+  staged to it is published; windows are copies, and a write staged while
+  one is read sends it to SQL
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.orm_models.resident import Resident
+from app.repository import insights_repository
+from app.repository.inbed_daily_repository import iter_daily_rows
+from app.repository.metric_series import RowBatch
+from app.repository.series_store import SeriesStore
+from app.services.ingest_service import store_daily_rows
+
+START = date(2025, 1, 1)
+METRICS = list(insights_repository.METRIC_COLUMNS)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = SeriesStore(str(tmp_path / "series"), METRICS)
+    monkeypatch.setattr(insights_repository, "SERIES_STORE", store)
+    return store
+
+
+def _day(resident_id: int, i: int) -> dict:
+    return {
+        "resident_id": resident_id,
+        "date": START + timedelta(days=i),
+        "time_in_bed": None if i % 11 == 5 else 28800.0 + (i * 37 % 13) * 300,
+        "at_rest": 20000.0 + i,
+        "low_activity": 5000.0,
+        "high_activity": None,
+    }
+
+
+def _sql_series(db, resident_id, metric, limit, end=None):
+    store, insights_repository.SERIES_STORE = insights_repository.SERIES_STORE, None
+    try:
+        return insights_repository.get_last_n_metric_series(resident_id, metric, limit, db, end)
+    finally:
+        insights_repository.SERIES_STORE = store
+
+
+def _assert_same(db, store, resident_id, limit, end=None):
+    for metric in METRICS:
+        got = store.get_last_n_series(resident_id, metric, limit, end)
+        want = _sql_series(db, resident_id, metric, limit, end)
+        assert got is not None
+        np.testing.assert_array_equal(got.dates, want.dates)
+        np.testing.assert_array_equal(got.values, want.values)
+
+
+def _residents(db, n: int) -> None:
+    db.add_all(Resident(name=f"Resident {i}", room_number=str(i)) for i in range(n))
+    db.commit()
+
+
+def test_windows_match_sql(test_db, sample_resident, store):
+    # day 40 missing: windows across it are gathered, later ones are views
+    days = [i for i in range(90) if i != 40]
+    store_daily_rows(test_db, [_day(1, i) for i in days[:60]])
+    for i in days[60:]:
+        store_daily_rows(test_db, [_day(1, i)])
+
+    for limit in (1, 7, 30, 60, 200):
+        _assert_same(test_db, store, 1, limit)
+    _assert_same(test_db, store, 1, 30, end=START + timedelta(days=45))
+    _assert_same(test_db, store, 1, 30, end=START - timedelta(days=1))
+
+    # a copy: a later correction of the same days doesn't change it
+    window = store.get_last_n_series(1, "at_rest", 30)
+    store_daily_rows(test_db, [{**_day(1, 89), "at_rest": 1.0}])
+    assert window.values[-1] == _day(1, 89)["at_rest"]
+    assert store.get_last_n_series(1, "at_rest", 30).values[-1] == 1.0
+    store_daily_rows(test_db, [_day(1, 89)])
+    assert (
+        insights_repository.get_last_n_series_all_metrics(1, 30, test_db)["at_rest"].values[-1]
+        == _day(1, 89)["at_rest"]
+    )
+    with pytest.raises(ValueError):
+        store.get_last_n_series(1, "steps", 30)
+
+
+def test_grid_grows_and_other_workers_follow(test_db, store):
+    _residents(test_db, 70)
+    store_daily_rows(test_db, [_day(1, 100 + i) for i in range(30)])
+    # another worker maps the store before it grows
+    other = SeriesStore(store.path, METRICS)
+    assert other.get_last_n_series(1, "at_rest", 30) is not None
+
+    # older and newer days than the grid holds, and more residents than its rows
+    store_daily_rows(test_db, [_day(1, i) for i in range(100)])
+    store_daily_rows(test_db, [_day(1, 2000)])
+    store_daily_rows(test_db, [_day(rid, i) for rid in range(2, 71) for i in range(3)])
+
+    for reader in (store, other):
+        _assert_same(test_db, reader, 1, 150)
+        _assert_same(test_db, reader, 70, 30)
+
+
+def _rebuild(db, store) -> None:
+    rows = (
+        (r.resident_id, r.date, *(getattr(r, m) for m in METRICS))
+        for batch in iter_daily_rows(db, None, None, None, 1000)
+        for r in batch
+    )
+    store.rebuild(rows)
+
+
+def test_unknown_history_is_read_from_sql_until_rebuilt(test_db, sample_resident, store):
+    # stored before the store was enabled
+    insights_repository.SERIES_STORE = None
+    store_daily_rows(test_db, [_day(1, i) for i in range(60)])
+    insights_repository.SERIES_STORE = store
+    store_daily_rows(test_db, [_day(1, 60)])
+    assert store.get_last_n_series(1, "time_in_bed", 30) is None
+
+    _rebuild(test_db, store)
+    _assert_same(test_db, store, 1, 61)
+
+
+def test_uncommitted_write_is_read_from_sql_until_rebuilt(
+    test_db, sample_resident, store, monkeypatch
+):
+    store_daily_rows(test_db, [_day(1, i) for i in range(30)])
+    assert store.get_last_n_series(1, "time_in_bed", 30) is not None
+
+    def fail():
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as m:
+        m.setattr(test_db, "commit", fail)
+        with pytest.raises(RuntimeError):
+            store_daily_rows(test_db, [_day(1, 30)])
+    # staged, but never committed; later writes do not make it readable again
+    store_daily_rows(test_db, [_day(1, 31)])
+    assert store.get_last_n_series(1, "time_in_bed", 30) is None
+    assert len(insights_repository.get_last_n_metric_series(1, "time_in_bed", 40, test_db)) == 31
+
+    _rebuild(test_db, store)
+    _assert_same(test_db, store, 1, 40)
+
+
+def _batch(resident_id: int, values: dict) -> RowBatch:
+    """A batch writing `values` (day -> value of every metric) for one resident."""
+    rows = [
+        (START + timedelta(days=i), *[v] * len(METRICS), resident_id) for i, v in values.items()
+    ]
+    return RowBatch({resident_id: ([], rows)})
+
+
+def test_overlapping_writers(tmp_path):
+    store = SeriesStore(str(tmp_path / "series"), METRICS)
+    store.publish(store.stage(_batch(1, {0: 100.0, 1: 100.0, 2: 100.0}), 30))
+    assert store.get_last_n_series(1, "at_rest", 3).values.tolist() == [100.0] * 3
+
+    # A stages, then B stages the same day before A publishes
+    a = store.stage(_batch(1, {2: 200.0}), 30)
+    b = store.stage(_batch(1, {2: 999.0}), 30)
+    assert a == b == [1]
+    store.publish(a)
+    # B's value is not committed yet
+    assert store.get_last_n_series(1, "at_rest", 3) is None
+    store.publish(b)
+    assert store.get_last_n_series(1, "at_rest", 3).values.tolist() == [100.0, 100.0, 999.0]
+
+    # B rolls back (never publishes): read from SQL, also after A publishes
+    a = store.stage(_batch(1, {2: 200.0}), 30)
+    store.stage(_batch(1, {2: 555.0}), 30)
+    store.publish(a)
+    assert store.get_last_n_series(1, "at_rest", 3) is None
+    assert store.get_last_n_series_all_metrics(1, 3) is None
+
+
+def test_write_staged_during_a_read_is_read_from_sql(tmp_path, monkeypatch):
+    store = SeriesStore(str(tmp_path / "series"), METRICS)
+    store.publish(store.stage(_batch(1, {0: 100.0, 1: 100.0}), 30))
+    window = SeriesStore._window
+
+    def staged_meanwhile(gen, metric, row, days):
+        # another worker stages and publishes a write between the check and the copy
+        values = window(gen, metric, row, days)
+        store.publish(store.stage(_batch(1, {1: 200.0}), 30))
+        return values
+
+    monkeypatch.setattr(SeriesStore, "_window", staticmethod(staged_meanwhile))
+    assert store.get_last_n_series(1, "at_rest", 2) is None
+    assert store.get_last_n_series_all_metrics(1, 2) is None
+    monkeypatch.undo()
+    assert store.get_last_n_series(1, "at_rest", 2).values.tolist() == [100.0, 200.0]